@@ -0,0 +1,141 @@
+"""
+Benchmark: CSV parse time and peak memory, pandas vs the Arrow reader.
+
+Writes synthetic merchant files of the requested sizes and, in a fresh process per
+case, holds the file in memory the way Streamlit's uploader does and parses it with:
+
+    pd.read_csv          whole file with default inference (the original upload page)
+    pandas chunks        scan_csv with the inferred schema and the pd.read_csv C engine
+    arrow chunks         scan_csv with the inferred schema and the multithreaded Arrow reader
+
+Peak memory is the highest resident memory sampled while parsing, above what the
+process used once the file was loaded.
+
+Usage:
+    python benchmarks/bench_csv_parsing.py --sizes-mb 10 100 500
+"""
+import argparse
+import gc
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import pandas as pd
+
+# Add repo root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from services.csv_stream import scan_csv
+from services.schema_inference import infer_csv_schema
+from benchmarks.bench_upload_paths import make_merchant_frame
+
+CASES = ("pd.read_csv", "pandas chunks", "arrow chunks")
+
+# Rows generated per block while writing the synthetic file
+WRITE_BLOCK_ROWS = 500_000
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+def write_merchant_csv(path: str, size_mb: int):
+    """Append synthetic merchant rows until the file reaches size_mb"""
+    target = size_mb * 1024 * 1024
+    seed = 0
+    written = 0
+    with open(path, "w", newline="") as f:
+        while written < target:
+            block = make_merchant_frame(WRITE_BLOCK_ROWS, seed=seed)
+            block["merchant_id"] = [f"M{seed:03d}{i:07d}" for i in range(len(block))]
+            csv_text = block.to_csv(index=False, header=(seed == 0))
+            if len(csv_text) > target - written:
+                # Cut at a line boundary so the file stays valid
+                csv_text = csv_text[:csv_text.rfind("\n", 0, target - written) + 1]
+                written = target
+            else:
+                written += len(csv_text)
+            f.write(csv_text)
+            seed += 1
+
+def rss_mb() -> float:
+    """Current resident memory of this process (Linux)"""
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * PAGE_SIZE / (1024 * 1024)
+
+class PeakMemory:
+    """Sample RSS on a background thread and keep the highest value seen"""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.peak = rss_mb()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.sample, daemon=True)
+
+    def sample(self):
+        while not self.stopped.wait(self.interval):
+            self.peak = max(self.peak, rss_mb())
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stopped.set()
+        self.thread.join()
+        self.peak = max(self.peak, rss_mb())
+
+def run_case(case: str, path: str) -> dict:
+    """Parse the file once in this process; returns seconds, rows and peak memory"""
+    with open(path, "rb") as f:
+        uploaded_file = io.BytesIO(f.read())
+    # The upload page's views over the buffer make BytesIO copy the bytes once; do it up front
+    uploaded_file.getbuffer().release()
+    schema = infer_csv_schema(uploaded_file) if case != "pd.read_csv" else None
+    gc.collect()
+    baseline = rss_mb()
+
+    with PeakMemory() as memory:
+        start = time.perf_counter()
+        if case == "pd.read_csv":
+            uploaded_file.seek(0)
+            df = pd.read_csv(uploaded_file)
+            rows = len(df)
+        else:
+            engine = "arrow" if case == "arrow chunks" else "pandas"
+            rows = scan_csv(uploaded_file, schema=schema, engine=engine)["rows"]
+        elapsed = time.perf_counter() - start
+
+    return {"seconds": elapsed, "rows": rows, "peak_mb": memory.peak - baseline}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes-mb", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--child", nargs=2, metavar=("CASE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_case(*args.child)))
+        return
+
+    print(f"{'file':>8} {'parser':<15} {'time':>9} {'throughput':>14} {'peak memory':>12}")
+    with tempfile.TemporaryDirectory() as root:
+        for size_mb in args.sizes_mb:
+            path = os.path.join(root, f"merchants_{size_mb}mb.csv")
+            write_merchant_csv(path, size_mb)
+            for case in CASES:
+                # A fresh process per case so peak RSS is not shared between parsers
+                output = subprocess.run(
+                    [sys.executable, __file__, "--child", case, path],
+                    check=True, capture_output=True, text=True,
+                ).stdout
+                result = json.loads(output)
+                print(
+                    f"{size_mb:>6}MB {case:<15} {result['seconds']:>8.2f}s "
+                    f"{size_mb / result['seconds']:>10.1f} MB/s {result['peak_mb']:>9.0f} MB"
+                )
+            os.remove(path)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark: upload throughput against the number of parallel writers.
+
+Appends a synthetic merchant file to the local stand-in warehouse with
+services/parallel_writer.py, one connection per worker, and prints rows/second
+for each worker count. The stand-in queues statements beyond --warehouse-slots,
+so throughput flattens once the simulated warehouse saturates.
+
+Usage:
+    python benchmarks/bench_parallel_writer.py --rows 20000 --latency 0.05 --workers 1 2 4 8 16
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# Add repo root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from services.table_writer import create_table_from_dataframe, insert_chunks_to_table
+from services.parallel_writer import parallel_insert_chunks
+from services.local_warehouse import LocalWarehouse
+from benchmarks.bench_upload_paths import make_merchant_frame, TARGET_TABLE
+
+
+def iter_chunks(df, chunk_rows: int):
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+def run(df, workers: int, args) -> float:
+    with tempfile.TemporaryDirectory() as root:
+        warehouse = LocalWarehouse(root, round_trip_latency=args.latency, max_concurrency=args.warehouse_slots)
+        create_table_from_dataframe(df, TARGET_TABLE, warehouse.connect())
+
+        start = time.perf_counter()
+        if workers == 0:
+            insert_chunks_to_table(iter_chunks(df, args.chunk_rows), TARGET_TABLE, warehouse.connect())
+        else:
+            parallel_insert_chunks(iter_chunks(df, args.chunk_rows), TARGET_TABLE, warehouse.connect, workers=workers)
+        elapsed = time.perf_counter() - start
+
+        loaded = warehouse.count_rows(TARGET_TABLE)
+        assert loaded == len(df), f"expected {len(df)} rows, found {loaded}"
+        return elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated seconds per warehouse round trip")
+    parser.add_argument("--warehouse-slots", type=int, default=8, help="Statements the stand-in runs concurrently")
+    parser.add_argument("--chunk-rows", type=int, default=50_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    args = parser.parse_args()
+
+    df = make_merchant_frame(args.rows)
+    print(f"{args.rows:,} rows, {args.latency * 1000:.0f} ms per round trip, {args.warehouse_slots} warehouse slots\n")
+    print(f"{'writers':<12} {'time':>10} {'throughput':>17} {'speed-up':>9}")
+
+    baseline = run(df, 0, args)
+    print(f"{'sequential':<12} {baseline:>9.2f}s {len(df) / baseline:>12,.0f} rows/s {1.0:>8.1f}x")
+    for workers in args.workers:
+        elapsed = run(df, workers, args)
+        print(f"{workers:<12} {elapsed:>9.2f}s {len(df) / elapsed:>12,.0f} rows/s {baseline / elapsed:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark: batched parameterized INSERT vs Parquet bulk load.
+
+Runs both upload paths against the local stand-in warehouse with a simulated
+network round trip per statement, using a synthetic merchant file shaped like
+sample_merchant_data.csv.
+
+Usage:
+    python benchmarks/bench_upload_paths.py --rows 20000 --latency 0.05
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+# Add repo root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from services.table_writer import create_table_from_dataframe, insert_data_to_table
+from services.bulk_load import bulk_load_dataframe
+from services.local_warehouse import LocalWarehouse
+
+TARGET_TABLE = "dg_dev.z3_stg.merchant_asset_size_review"
+UPLOAD_VOLUME = "dg_dev.sandbox.csv_uploads"
+
+
+def make_merchant_frame(rows: int, seed: int = 7) -> pd.DataFrame:
+    """Synthetic merchant upload with the columns of sample_merchant_data.csv"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "merchant_id": [f"M{i:07d}" for i in range(rows)],
+        "merchant_name": [f"Merchant {i}" for i in range(rows)],
+        "business_reviewed_size_pending": rng.choice(["MICRO", "SMALL", "MEDIUM", "LARGE"], rows),
+        "business_reviewed_gender_pending": rng.choice(["MALE", "FEMALE"], rows),
+        "revenue": rng.integers(1_000, 1_000_000, rows),
+        "location": rng.choice(["Manila", "Cebu", "Davao", "Makati", "Quezon City"], rows),
+        "review_status": np.full(rows, None, dtype=object),
+    })
+
+def run(label: str, load, df: pd.DataFrame, latency: float):
+    with tempfile.TemporaryDirectory() as root:
+        warehouse = LocalWarehouse(root, round_trip_latency=latency)
+        conn = warehouse.connect()
+        create_table_from_dataframe(df, TARGET_TABLE, conn)
+        warehouse.statement_count = 0
+
+        start = time.perf_counter()
+        load(df, conn, warehouse)
+        elapsed = time.perf_counter() - start
+
+        loaded = warehouse.count_rows(TARGET_TABLE)
+        assert loaded == len(df), f"{label}: expected {len(df)} rows, found {loaded}"
+        print(f"{label:<22} {elapsed:>9.2f}s {len(df) / elapsed:>12,.0f} rows/s {warehouse.statement_count:>10} statements")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated seconds per warehouse round trip")
+    args = parser.parse_args()
+
+    df = make_merchant_frame(args.rows)
+    print(f"{args.rows:,} rows x {len(df.columns)} columns, {args.latency * 1000:.0f} ms per round trip\n")
+    print(f"{'path':<22} {'time':>10} {'throughput':>17} {'statements':>10}")
+
+    run("batched INSERT", lambda d, c, wh: insert_data_to_table(d, TARGET_TABLE, c, mode="overwrite"), df, args.latency)
+    run("Parquet bulk load", lambda d, c, wh: bulk_load_dataframe(d, TARGET_TABLE, c, wh.files, UPLOAD_VOLUME, mode="overwrite"), df, args.latency)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+"""
+Review field domains for the Merchant Business Size and Gender Review App.
+Shared by the editor dropdowns and the CSV upload validation rules.
+"""
+
+# Dropdown values for review fields (no blank option)
+BUSINESS_SIZE_OPTIONS = ["MICRO", "SMALL", "MEDIUM", "LARGE"]
+GENDER_OPTIONS = ["MALE", "FEMALE"]
@@ -0,0 +1,25 @@
+"""
+Validation Rules for the CSV Upload Feature.
+Rows are checked against the rule set of the target table before anything is written.
+Update rules here when criteria change — no need to modify the app view code.
+
+Checks:
+- required: the column must have a value
+- unique: the column's values must not repeat within the file (every copy is rejected)
+- allowed_values: non-empty values must be one of "values"
+"""
+from config.review_options import BUSINESS_SIZE_OPTIONS, GENDER_OPTIONS
+
+VALIDATION_RULES = {
+    "dg_dev.z3_stg.merchant_asset_size_review": [
+        {"check": "required", "column": "merchant_id"},
+        {"check": "unique", "column": "merchant_id"},
+        {"check": "allowed_values", "column": "business_reviewed_size_pending", "values": BUSINESS_SIZE_OPTIONS},
+        {"check": "allowed_values", "column": "business_reviewed_gender_pending", "values": GENDER_OPTIONS},
+    ],
+}
+
+
+def get_validation_rules(table_name: str) -> list:
+    """Rule set for a target table; tables without rules are not validated"""
+    return VALIDATION_RULES.get(table_name, [])
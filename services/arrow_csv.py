@@ -0,0 +1,122 @@
+"""
+Arrow-backed CSV reader for the upload page.
+
+The file is read in windows of whole lines and each window is parsed with
+pyarrow's read_csv, which splits it into blocks and parses and converts them on its
+thread pool (pa_csv.open_csv, the streaming reader, is always single-threaded). The
+windowed rows are handed to pandas as Arrow-backed (ArrowDtype) columns, so strings
+are never turned into per-cell Python objects while the file is scanned or loaded. Values
+only become Python objects in marshal_frame, where INSERT parameters are bound; the
+Parquet bulk path writes the Arrow columns as they are.
+
+Column types come from the pandas read options produced by services/schema_inference.py,
+so both readers agree on the schema; any other column keeps the type Arrow inferred in
+the first window. Windows are cut at newlines, which holds because quoted values may
+not span lines (Arrow's default, newlines_in_values=False). Memory is bounded by one
+window plus one chunk rather than by the file.
+"""
+from typing import Dict, Any, Iterator, List, Optional
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+
+# Bytes of CSV text in the first window, kept small so a preview parses little
+BLOCK_SIZE = 8 * 1024 * 1024
+
+# Bytes of CSV text in every later window; read_csv parses its blocks in parallel
+WINDOW_SIZE = 32 * 1024 * 1024
+
+# Smallest block a window is split into for the parser threads
+MIN_THREAD_BLOCK_SIZE = 1024 * 1024
+
+# pandas dtype from the inferred schema -> Arrow column type
+ARROW_TYPES = {
+    'Int64': pa.int64(),
+    'float64': pa.float64(),
+    'boolean': pa.bool_(),
+    'category': pa.dictionary(pa.int32(), pa.string()),
+}
+
+# date_format from the inferred schema -> Arrow column type
+ARROW_DATE_TYPES = {
+    '%Y-%m-%d': pa.date32(),
+    'ISO8601': pa.timestamp('us'),
+}
+
+
+def arrow_column_types(read_options: Optional[Dict[str, Any]]) -> Dict[str, pa.DataType]:
+    """Translate pd.read_csv dtype/parse_dates options into Arrow column types"""
+    if not read_options:
+        return {}
+    column_types = {}
+    for col, dtype in read_options.get("dtype", {}).items():
+        # str keeps IDs such as merchant_id as text
+        column_types[col] = pa.string() if dtype is str else ARROW_TYPES[dtype]
+    for col, date_format in read_options.get("date_format", {}).items():
+        column_types[col] = ARROW_DATE_TYPES[date_format]
+    return column_types
+
+def open_arrow_source(uploaded_file):
+    """Zero-copy Arrow reader over the uploaded file's bytes"""
+    if hasattr(uploaded_file, "open_arrow"):
+        # Compressed uploads (services/file_readers.py) decompress in Arrow's native stream
+        return uploaded_file.open_arrow()
+    if hasattr(uploaded_file, "getbuffer"):
+        return pa.BufferReader(pa.py_buffer(uploaded_file.getbuffer()))
+    uploaded_file.seek(0)
+    return pa.PythonFile(uploaded_file, mode="r")
+
+def iter_line_windows(source, first_size: int = BLOCK_SIZE, size: int = WINDOW_SIZE) -> Iterator[memoryview]:
+    """Yield the source's bytes in windows of whole lines, the first one about first_size bytes"""
+    carry = b""
+    read_size = first_size
+    while True:
+        data = source.read(read_size)
+        if not data:
+            break
+        data = carry + data if carry else data
+        cut = data.rfind(b"\n")
+        if cut < 0:
+            # A line longer than the window: keep reading until it ends
+            carry = data
+            continue
+        carry = data[cut + 1:]
+        read_size = size
+        yield memoryview(data)[:cut + 1]
+    if carry:
+        yield memoryview(carry)
+
+def parse_window(window, column_names: Optional[List[str]], column_types: Dict[str, pa.DataType]) -> pa.Table:
+    """Parse one window of whole lines on Arrow's thread pool; without column_names it starts with the header"""
+    # Enough blocks for every parser thread, but not so small that splitting costs more than it saves
+    block_size = max(MIN_THREAD_BLOCK_SIZE, -(-len(window) // pa.cpu_count()))
+    return pa_csv.read_csv(
+        pa.py_buffer(window),
+        read_options=pa_csv.ReadOptions(use_threads=True, block_size=block_size, column_names=column_names),
+        convert_options=pa_csv.ConvertOptions(
+            column_types=column_types,
+            # Empty fields are nulls, as with pd.read_csv
+            strings_can_be_null=True,
+        ),
+    )
+
+def iter_arrow_csv_chunks(uploaded_file, chunk_rows: int, read_options: Optional[Dict[str, Any]] = None) -> Iterator[pd.DataFrame]:
+    """Yield the uploaded CSV as DataFrame chunks of chunk_rows rows with Arrow-backed dtypes"""
+    column_names = None
+    column_types = arrow_column_types(read_options)
+    pending = None
+    for window in iter_line_windows(open_arrow_source(uploaded_file)):
+        table = parse_window(window, column_names, column_types)
+        if column_names is None:
+            # Later windows have no header and must keep the first window's types
+            column_names = table.column_names
+            column_types = {field.name: field.type for field in table.schema}
+        pending = table if pending is None else pa.concat_tables([pending, table])
+        while pending.num_rows >= chunk_rows:
+            yield pending.slice(0, chunk_rows).to_pandas(types_mapper=pd.ArrowDtype)
+            pending = pending.slice(chunk_rows)
+    if pending is None:
+        # Nothing to read: let Arrow report the empty file as open_csv did
+        parse_window(b"", None, column_types)
+    elif pending.num_rows:
+        yield pending.to_pandas(types_mapper=pd.ArrowDtype)
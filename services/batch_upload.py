@@ -0,0 +1,222 @@
+"""
+Multi-file batch uploads.
+
+Every file of a batch is scanned and validated in its own worker process, so a dozen
+regional files are parsed side by side instead of one after another. Each file is
+spilled to a temporary file and the workers are handed its path, so the upload bytes
+are not copied into every worker's arguments and the app process holds no second copy
+of the batch while the workers run. The workers return only summaries (row counts, schema, rejected row positions); the files are then
+combined into one batch scan with a single schema, and the load streams the valid rows
+of every file, in upload order, into one staging table that is published into the
+target with one statement. Either the whole batch lands or none of it does.
+
+"unique" rules hold across the batch: a key that appears in more than one file is
+rejected in each of them, since a single load cannot keep both copies.
+"""
+import hashlib
+import io
+import mmap
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Dict, Any, Callable, Iterator, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from services.csv_stream import conform_chunk, widen_sql_type
+from services.file_readers import reader_for
+from services.schema_inference import SAMPLE_ROWS
+from services.validation import add_rejections, filter_valid_rows, rule_label, validate_chunks
+from services.volume_backup import STREAM_CHUNK_SIZE, BufferReader, open_source_stream
+
+# Worker processes scanning the files of a batch at once
+MAX_PREPARE_PROCESSES = 4
+
+
+class MappedFile(io.BufferedReader):
+    """Read-only memory map of a spilled file with the getbuffer() of an uploaded file
+
+    The readers take their zero-copy Arrow path over it, and its pages come from the
+    OS page cache rather than the worker's heap.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self.mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        super().__init__(BufferReader(self.mapped), STREAM_CHUNK_SIZE)
+
+    def getbuffer(self):
+        return memoryview(self.mapped)
+
+
+def prepare_file(name: str, path: str, file_hash: str, chunk_rows: int, rules: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Scan and validate one file of a batch, read from path; runs in a worker process
+
+    Errors are returned rather than raised, so one unreadable file is reported
+    alongside the others instead of failing the whole batch.
+    """
+    prepared = {"name": name, "file_hash": file_hash, "error": None, "scan": None, "validation": None, "unique_values": {}}
+    try:
+        reader = reader_for(name)
+        prepared["label"] = reader.label
+        with MappedFile(path) as source:
+            scan = reader.scan(source, chunk_rows, reader.infer_schema(source, SAMPLE_ROWS))
+            prepared["scan"] = scan
+            if rules:
+                # Values of "unique" columns are kept to find keys repeated across files
+                kept = {rule["column"]: [] for rule in rules if rule["check"] == "unique"}
+
+                def keep_unique_columns(chunks):
+                    for chunk in chunks:
+                        for col, values in kept.items():
+                            if col in chunk.columns:
+                                values.append(chunk[col].astype("string").to_numpy(dtype=object))
+                        yield chunk
+
+                prepared["validation"] = validate_chunks(keep_unique_columns(reader.chunk_factory(source, scan, chunk_rows)()), rules)
+                prepared["unique_values"] = {
+                    col: np.concatenate(values) if values else np.empty(0, dtype=object)
+                    for col, values in kept.items()
+                }
+    except Exception as e:
+        prepared["label"] = prepared.get("label", "Unknown")
+        prepared["error"] = str(e)
+    return prepared
+
+def batch_hash(file_hashes: List[str]) -> str:
+    """Content hash of a batch: its files' hashes in upload order"""
+    return hashlib.sha256("\n".join(file_hashes).encode("utf-8")).hexdigest()
+
+def mark_cross_file_duplicates(prepared: List[Dict[str, Any]], rules: List[Dict[str, Any]]):
+    """Reject the rows of every file whose "unique" key also appears in another file of the batch"""
+    files = [f for f in prepared if f["validation"] and not f["error"] and not f["validation"]["missing_columns"]]
+    if len(files) < 2:
+        return
+    for rule in rules:
+        if rule["check"] != "unique":
+            continue
+        col = rule["column"]
+        values = pd.DataFrame({
+            "value": np.concatenate([f["unique_values"][col] for f in files]),
+            "file": np.repeat(np.arange(len(files)), [len(f["unique_values"][col]) for f in files]),
+        }).dropna().drop_duplicates()
+        shared = values.loc[values["value"].duplicated(keep=False), "value"].unique()
+        if not len(shared):
+            continue
+        label = f"{rule_label(rule)} in another file of the batch"
+        for f in files:
+            positions = np.flatnonzero(pd.Series(f["unique_values"][col]).isin(shared).to_numpy())
+            if len(positions):
+                f["validation"] = add_rejections(f["validation"], positions, label)
+
+def combine_batch(prepared: List[Dict[str, Any]], rules: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine the prepared files into one batch scan with a single schema
+
+    The batch has the first readable file's columns; a file with other columns is
+    reported as an error. Column types are widened across files, ignoring files where
+    the column is empty. The result has the keys of a single-file scan ("rows",
+    "columns", "sql_types", "file_hash") plus a per-file report under "files".
+    """
+    first = next((f for f in prepared if not f["error"]), None)
+    columns = first["scan"]["columns"] if first else []
+    sql_types: Dict[str, Optional[str]] = {col: None for col in columns}
+    for f in prepared:
+        if f["error"]:
+            continue
+        scan = f["scan"]
+        if set(scan["columns"]) != set(columns):
+            missing = sorted(set(columns) - set(scan["columns"]))
+            extra = sorted(set(scan["columns"]) - set(columns))
+            f["error"] = (
+                f"columns differ from {first['name']}"
+                + (f"; missing {', '.join(missing)}" if missing else "")
+                + (f"; unexpected {', '.join(extra)}" if extra else "")
+            )
+            continue
+        for col in columns:
+            if scan["non_null"][col]:
+                sql_types[col] = widen_sql_type(sql_types[col], scan["sql_types"][col])
+    for col in columns:
+        # Empty in every file: keep what the first file's scan chose
+        if sql_types[col] is None:
+            sql_types[col] = first["scan"]["sql_types"][col]
+
+    if rules:
+        mark_cross_file_duplicates(prepared, rules)
+
+    files = []
+    for f in prepared:
+        rows = f["scan"]["rows"] if f["scan"] else 0
+        rejected = f["validation"]["rejected_rows"] if f["validation"] and not f["error"] else 0
+        # The kept key values have served their purpose; leave them out of the result
+        report = {key: value for key, value in f.items() if key != "unique_values"}
+        files.append({**report, "rows": rows, "rejected_rows": rejected, "valid_rows": 0 if f["error"] else rows - rejected})
+
+    validation = None
+    if rules:
+        validated = [f["validation"] for f in files if f["validation"] and not f["error"]]
+        rule_counts: Dict[str, int] = {}
+        for file_validation in validated:
+            for label, count in file_validation["rule_counts"].items():
+                rule_counts[label] = rule_counts.get(label, 0) + count
+        validation = {
+            "rows": sum(f["rows"] for f in files),
+            "missing_columns": sorted({col for v in validated for col in v["missing_columns"]}),
+            "rule_counts": rule_counts,
+            "rejected_rows": sum(f["rejected_rows"] for f in files),
+        }
+
+    return {
+        "rows": sum(f["rows"] for f in files),
+        "valid_rows": sum(f["valid_rows"] for f in files),
+        "columns": columns,
+        "sql_types": sql_types,
+        "file_hash": batch_hash([f["file_hash"] for f in files]),
+        "files": files,
+        "errors": {f["name"]: f["error"] for f in files if f["error"]},
+        "validation": validation,
+    }
+
+def spill_to_file(uploaded_file, path: str):
+    """Write the uploaded file's bytes to path, streamed from its buffer without moving its position"""
+    source = open_source_stream(uploaded_file)
+    try:
+        with open(path, "wb") as target:
+            shutil.copyfileobj(source, target, STREAM_CHUNK_SIZE)
+    finally:
+        if source is not uploaded_file:
+            source.close()
+
+def prepare_batch(files: List[Tuple[str, Any, str]], rules: List[Dict[str, Any]], chunk_rows: int, max_processes: int = MAX_PREPARE_PROCESSES) -> Dict[str, Any]:
+    """Scan and validate (name, uploaded file, file_hash) files in parallel worker processes and combine them"""
+    workers = max(1, min(len(files), max_processes))
+    with tempfile.TemporaryDirectory(prefix="batch-prepare-") as spill_dir:
+        paths = []
+        for i, (_, uploaded_file, _) in enumerate(files):
+            paths.append(os.path.join(spill_dir, str(i)))
+            spill_to_file(uploaded_file, paths[-1])
+        # Spawned rather than forked: the app process runs threads whose locks a fork would copy
+        with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as pool:
+            futures = [
+                pool.submit(prepare_file, name, path, file_hash, chunk_rows, rules)
+                for (name, _, file_hash), path in zip(files, paths)
+            ]
+            prepared = [future.result() for future in futures]
+    return combine_batch(prepared, rules)
+
+def batch_chunk_factory(uploaded_files: List[Any], batch: Dict[str, Any], chunk_rows: int) -> Callable[[], Iterator[pd.DataFrame]]:
+    """Chunk factory streaming the valid rows of every file in upload order, conformed to the batch schema"""
+    def batch_chunks():
+        for uploaded_file, f in zip(uploaded_files, batch["files"]):
+            if f["error"]:
+                continue
+            file_chunks = reader_for(uploaded_file.name).chunk_factory(uploaded_file, f["scan"], chunk_rows)
+            make_chunks = lambda file_chunks=file_chunks: (
+                conform_chunk(chunk[batch["columns"]], batch["sql_types"]) for chunk in file_chunks()
+            )
+            if f["validation"] and f["validation"]["rejected_rows"]:
+                make_chunks = filter_valid_rows(make_chunks, f["validation"])
+            yield from make_chunks()
+    return batch_chunks
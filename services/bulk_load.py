@@ -0,0 +1,114 @@
+"""
+Bulk-load path for the CSV upload page.
+
+Instead of one parameterized INSERT per ~35 rows, the data is written as Parquet
+part files to the upload volume and loaded with a single server-side
+INSERT ... SELECT FROM read_files(...). The batched INSERT path in table_writer
+stays available as a fallback, but only for a load known to have written nothing:
+one that failed while staging its files, or whose statement was rejected before it
+ran. Once the statement has been sent, a dropped connection or client timeout can
+hide a load that committed, and loading the rows again would duplicate them.
+"""
+import io
+import uuid
+from typing import Dict, Any, BinaryIO, Iterable, Optional
+import pandas as pd
+
+from services.parallel_writer import is_pre_execution_error
+from services.table_writer import col_list_sql_for, constant_params
+
+# Sub-folder of the upload volume holding Parquet files while they are being loaded
+STAGING_DIR = "_staging"
+
+
+class LoadStatementError(Exception):
+    """The load statement failed after it was sent; the original exception is chained"""
+
+
+def wrote_nothing(error: Exception) -> bool:
+    """Whether a failed bulk load certainly left the table untouched, so another path may load the rows"""
+    return not isinstance(error, LoadStatementError) or is_pre_execution_error(error)
+
+def volume_root(volume_name: str) -> str:
+    """Convert catalog.schema.volume into its /Volumes path"""
+    parts = volume_name.strip().split(".")
+    catalog, schema, volume = parts[0], parts[1], parts[2]
+    return f"/Volumes/{catalog}/{schema}/{volume}"
+
+def write_parquet_to_volume(df: pd.DataFrame, volume_name: str, files, file_name: str = None) -> str:
+    """Write DataFrame as a Parquet file under the volume staging folder"""
+    if not file_name:
+        file_name = f"upload_{uuid.uuid4().hex}.parquet"
+    parquet_path = f"{volume_root(volume_name)}/{STAGING_DIR}/{file_name}"
+
+    buffer = io.BytesIO()
+    df.to_parquet(buffer, index=False)
+    buffer.seek(0)
+
+    files.upload(parquet_path, buffer, overwrite=True)
+    return parquet_path
+
+def load_parquet_into_table(parquet_path: str, table_name: str, columns, conn, mode: str = "append", constants: Optional[Dict[str, Any]] = None):
+    """Load a staged Parquet file or folder into the table with one server-side statement"""
+    col_list_sql = col_list_sql_for(columns)
+    target_cols_sql = col_list_sql_for(list(columns) + list(constants or {}))
+    # Constant columns are not written to Parquet; they are bound once in the SELECT
+    const_params = constant_params(constants)
+    select_sql = col_list_sql + "".join(f", :{key}" for key in const_params)
+    escaped_path = parquet_path.replace("'", "''")
+
+    # INSERT OVERWRITE replaces the table contents in a single Delta commit;
+    # INSERT INTO appends. Either way the warehouse reads the file itself.
+    insert_kind = "OVERWRITE" if mode == "overwrite" else "INTO"
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                f"INSERT {insert_kind} {table_name} ({target_cols_sql}) "
+                f"SELECT {select_sql} FROM read_files('{escaped_path}', format => 'parquet')",
+                const_params
+            )
+    except Exception as e:
+        raise LoadStatementError(str(e)) from e
+
+def bulk_load_dataframe(df: pd.DataFrame, table_name: str, conn, files, volume_name: str, mode: str = "append", constants: Optional[Dict[str, Any]] = None) -> int:
+    """Stage DataFrame as Parquet on the volume and load it into the table"""
+    return bulk_load_chunks([df], table_name, conn, files, volume_name, mode=mode, constants=constants)
+
+def bulk_load_chunks(chunks: Iterable[pd.DataFrame], table_name: str, conn, files, volume_name: str, mode: str = "append", constants: Optional[Dict[str, Any]] = None) -> int:
+    """Stage each chunk as a Parquet part file and load the whole folder with one statement"""
+    upload_dir = f"upload_{uuid.uuid4().hex}"
+    part_paths = []
+    columns = None
+    total_rows = 0
+    try:
+        for chunk in chunks:
+            if len(chunk) == 0:
+                continue
+            columns = columns or list(chunk.columns)
+            part_name = f"{upload_dir}/part-{len(part_paths):05d}.parquet"
+            part_paths.append(write_parquet_to_volume(chunk, volume_name, files, file_name=part_name))
+            total_rows += len(chunk)
+
+        if part_paths:
+            folder = f"{volume_root(volume_name)}/{STAGING_DIR}/{upload_dir}"
+            load_parquet_into_table(folder, table_name, columns, conn, mode=mode, constants=constants)
+    finally:
+        # The CSV backup is the audit copy; the Parquet parts are only a transport
+        for path in part_paths:
+            try:
+                files.delete(path)
+            except Exception:
+                pass
+    return total_rows
+
+def bulk_load_parquet_file(source: BinaryIO, table_name: str, columns, conn, files, volume_name: str, mode: str = "append", constants: Optional[Dict[str, Any]] = None):
+    """Load an uploaded Parquet file as it is: copy its bytes to the volume and load them with one statement"""
+    parquet_path = f"{volume_root(volume_name)}/{STAGING_DIR}/upload_{uuid.uuid4().hex}.parquet"
+    files.upload(parquet_path, source, overwrite=True)
+    try:
+        load_parquet_into_table(parquet_path, table_name, columns, conn, mode=mode, constants=constants)
+    finally:
+        try:
+            files.delete(parquet_path)
+        except Exception:
+            pass
@@ -0,0 +1,208 @@
+"""
+Chunked CSV ingestion for the upload page.
+
+The uploaded file is never materialised as one DataFrame: a scan pass collects row
+counts, null counts and a column schema widened across all chunks, and the load pass
+re-reads the file chunk by chunk, conforming each chunk to that schema before it is
+written. Peak memory depends on the chunk size, not the file size.
+
+When a sampled schema is supplied (services/schema_inference.py) its dtype map is
+applied by the reader itself, so chunks arrive already typed. The "arrow" engine
+(services/arrow_csv.py) parses with pyarrow's multithreaded reader and yields
+Arrow-backed columns; "pandas" uses the pd.read_csv C engine.
+"""
+from typing import Dict, Any, Callable, Iterable, Iterator, List, Optional, Tuple
+import pandas as pd
+
+from services.arrow_csv import iter_arrow_csv_chunks
+from services.profiler import DatasetProfiler
+from services.schema_inference import DECIMAL_TYPE_PATTERN, decimal_scale, decimal_sql_type, measure_decimals
+from services.table_writer import infer_sql_type
+
+# Rows per chunk for the scan and load passes
+DEFAULT_CHUNK_ROWS = 50_000
+
+CSV_ENGINES = ('arrow', 'pandas')
+DEFAULT_ENGINE = 'arrow'
+
+# Widening order when chunks disagree on a column's type
+SQL_TYPE_RANK = {'BOOLEAN': 0, 'BIGINT': 1, 'DOUBLE': 2, 'STRING': 3}
+
+# Largest DECIMAL precision; a wider exact type falls back to DOUBLE
+MAX_DECIMAL_PRECISION = 38
+
+# Integer digits of the largest BIGINT
+BIGINT_DIGITS = 19
+
+# Nullable pandas dtype used to carry each SQL type through a chunk
+CHUNK_DTYPES = {'BOOLEAN': 'boolean', 'BIGINT': 'Int64', 'DOUBLE': 'float64', 'STRING': 'string'}
+
+
+def iter_csv_chunks(uploaded_file, chunk_rows: int = DEFAULT_CHUNK_ROWS, read_options: Optional[Dict[str, Any]] = None, engine: str = 'pandas') -> Iterator[pd.DataFrame]:
+    """Yield the uploaded CSV as DataFrame chunks"""
+    if engine == 'arrow':
+        yield from iter_arrow_csv_chunks(uploaded_file, chunk_rows, read_options)
+        return
+    uploaded_file.seek(0)
+    with pd.read_csv(uploaded_file, chunksize=chunk_rows, **(read_options or {})) as reader:
+        for chunk in reader:
+            yield chunk
+
+def read_csv_preview(uploaded_file, rows: int = 10, read_options: Optional[Dict[str, Any]] = None, engine: str = 'pandas') -> pd.DataFrame:
+    """Read only the first rows of the uploaded CSV"""
+    if engine == 'arrow':
+        # The Arrow reader stops after the first block
+        return next(iter_csv_chunks(uploaded_file, rows, read_options, engine), pd.DataFrame())
+    uploaded_file.seek(0)
+    return pd.read_csv(uploaded_file, nrows=rows, **(read_options or {}))
+
+def exact_digits(sql_type: str) -> Optional[Tuple[int, int]]:
+    """Integer digits and scale of a BIGINT or DECIMAL(p,s) type, None for other types"""
+    if sql_type == 'BIGINT':
+        return BIGINT_DIGITS, 0
+    match = DECIMAL_TYPE_PATTERN.match(sql_type)
+    if match:
+        precision, scale = int(match.group(1)), int(match.group(2))
+        return precision - scale, scale
+    return None
+
+def widen_sql_type(current: Optional[str], new: str) -> str:
+    """Return the narrowest SQL type that can hold values of both types
+
+    DECIMAL widens with BIGINT or another DECIMAL to a DECIMAL holding the digits of
+    both (DOUBLE past MAX_DECIMAL_PRECISION) and with DOUBLE to DOUBLE; DATE widens
+    with TIMESTAMP to TIMESTAMP.
+    """
+    if current is None or current == new:
+        return new
+    if current in SQL_TYPE_RANK and new in SQL_TYPE_RANK:
+        return current if SQL_TYPE_RANK[current] >= SQL_TYPE_RANK[new] else new
+    if {current, new} == {'DATE', 'TIMESTAMP'}:
+        return 'TIMESTAMP'
+    digits = [exact_digits(current), exact_digits(new)]
+    if None not in digits:
+        integer_digits = max(d[0] for d in digits)
+        scale = max(d[1] for d in digits)
+        if integer_digits + scale <= MAX_DECIMAL_PRECISION:
+            return f'DECIMAL({integer_digits + scale},{scale})'
+        return 'DOUBLE'
+    if 'DOUBLE' in (current, new) and any(digits):
+        return 'DOUBLE'
+    return 'STRING'
+
+def scan_csv(uploaded_file, chunk_rows: int = DEFAULT_CHUNK_ROWS, schema: Optional[Dict[str, Any]] = None, engine: str = DEFAULT_ENGINE, profile: bool = False) -> Dict[str, Any]:
+    """Single streaming pass collecting row count, null counts and column types
+
+    With profile=True the same pass also collects distinct counts, min/max and top
+    values per column (services/profiler.py) under "profile".
+
+    With a sampled schema the chunks are read with its dtype map and keep its SQL types.
+    If a row past the sample does not parse as its inferred type, the scan is redone
+    with pandas' default inference and "schema_fallback" is set. The engine that
+    succeeded is returned so the load pass reads the file the same way.
+    """
+    attempts = []
+    if schema is not None:
+        attempts.append((engine, schema["read_options"], schema["sql_types"]))
+        if engine != 'pandas':
+            # The Arrow parser is stricter (e.g. about padded numbers) than pd.read_csv
+            attempts.append(('pandas', schema["read_options"], schema["sql_types"]))
+    attempts.append(('pandas', None, None))
+
+    for attempt, (attempt_engine, read_options, fixed_types) in enumerate(attempts):
+        try:
+            result = _scan_chunks(uploaded_file, chunk_rows, read_options, fixed_types, attempt_engine, profile)
+        except (ValueError, TypeError, OverflowError):
+            if attempt == len(attempts) - 1:
+                raise
+            continue
+        result["schema_fallback"] = schema is not None and fixed_types is None
+        return result
+
+def _scan_chunks(uploaded_file, chunk_rows: int, read_options: Optional[Dict[str, Any]], fixed_types: Optional[Dict[str, str]], engine: str, profile: bool = False) -> Dict[str, Any]:
+    result = scan_chunks(iter_csv_chunks(uploaded_file, chunk_rows, read_options, engine), fixed_types, profile)
+    return {**result, "read_options": read_options, "engine": engine}
+
+def scan_chunks(chunks: Iterable[pd.DataFrame], fixed_types: Optional[Dict[str, str]] = None, profile: bool = False) -> Dict[str, Any]:
+    """Row count, null counts and column types of a chunk stream from any reader"""
+    profiler = DatasetProfiler() if profile else None
+    rows = 0
+    columns = []
+    sql_types: Dict[str, Optional[str]] = {}
+    dtypes: Dict[str, str] = {}
+    non_null: Dict[str, int] = {}
+    # Most integer digits and decimal places of sampled DECIMAL columns read as floats
+    decimal_digits: Dict[str, tuple] = {}
+
+    for chunk in chunks:
+        if not columns:
+            columns = list(chunk.columns)
+            sql_types = dict(fixed_types) if fixed_types else {col: None for col in columns}
+            non_null = {col: 0 for col in columns}
+        rows += len(chunk)
+        if profiler:
+            profiler.update(chunk)
+        counts = chunk.notna().sum()
+        for col in columns:
+            non_null[col] += int(counts[col])
+            # An all-null chunk says nothing about the column's type
+            if counts[col] == 0:
+                continue
+            if not fixed_types:
+                sql_types[col] = widen_sql_type(sql_types[col], infer_sql_type(chunk[col].dtype))
+            elif sql_types[col].startswith('DECIMAL') and pd.api.types.is_float_dtype(chunk[col].dtype):
+                integer_digits, scale = measure_decimals(chunk[col])
+                seen = decimal_digits.get(col, (0, 0))
+                decimal_digits[col] = (max(seen[0], integer_digits), max(seen[1], scale))
+            chunk_dtype = str(chunk[col].dtype)
+            dtypes[col] = chunk_dtype if dtypes.get(col, chunk_dtype) == chunk_dtype else 'object'
+
+    for col, (integer_digits, scale) in decimal_digits.items():
+        # The sample's scale still counts: "1.50" reads back as 1.5
+        sql_types[col] = decimal_sql_type(integer_digits, max(scale, decimal_scale(sql_types[col])))
+
+    for col in columns:
+        # Matches what pd.read_csv produces for a column that is empty everywhere
+        if sql_types[col] is None:
+            sql_types[col] = 'DOUBLE'
+        dtypes.setdefault(col, 'float64' if sql_types[col] == 'DOUBLE' else 'object')
+
+    return {
+        "rows": rows,
+        "columns": columns,
+        "sql_types": sql_types,
+        "dtypes": dtypes,
+        "non_null": non_null,
+        "null": {col: rows - non_null[col] for col in columns},
+        "profile": profiler.summary(columns) if profiler else None,
+    }
+
+def scan_constant_columns(scan: Dict[str, Any]) -> List[str]:
+    """Columns holding one value in every row of the scanned file, from the profile's exact distinct counts"""
+    profile = scan.get("profile")
+    if not profile:
+        return []
+    return [
+        col for col in scan["columns"]
+        if scan["null"][col] == 0 and profile[col]["distinct_is_exact"] and profile[col]["distinct"] == 1
+    ]
+
+def conform_chunk(chunk: pd.DataFrame, sql_types: Dict[str, str]) -> pd.DataFrame:
+    """Cast a chunk's columns to the scanned schema so every chunk binds the same types"""
+    for col, sql_type in sql_types.items():
+        if col not in chunk.columns or infer_sql_type(chunk[col].dtype) == sql_type:
+            continue
+        # Only widening casts reach here (plus all-null chunks read back as float64);
+        # DATE and DECIMAL columns come typed from the reader and are left alone
+        if sql_type in CHUNK_DTYPES and (sql_type in ('STRING', 'DOUBLE') or chunk[col].isna().all()):
+            chunk[col] = chunk[col].astype(CHUNK_DTYPES[sql_type])
+    return chunk
+
+def iter_upload_chunks(uploaded_file, sql_types: Dict[str, str], chunk_rows: int = DEFAULT_CHUNK_ROWS, read_options: Optional[Dict[str, Any]] = None, engine: str = 'pandas') -> Iterator[pd.DataFrame]:
+    """Yield chunks conformed to the scanned schema"""
+    for chunk in iter_csv_chunks(uploaded_file, chunk_rows, read_options, engine):
+        yield conform_chunk(chunk, sql_types)
+
+def upload_chunk_factory(uploaded_file, scan: Dict[str, Any], chunk_rows: int) -> Callable[[], Iterator[pd.DataFrame]]:
+    """Return a callable that restarts the chunk stream the way the scan read it, so a failed load can be retried"""
+    return lambda: iter_upload_chunks(uploaded_file, scan["sql_types"], chunk_rows, scan["read_options"], scan["engine"])
@@ -0,0 +1,69 @@
+"""
+Change detection for the review editor's data_editor tables.
+
+st.data_editor keeps what the user changed under its key in session state:
+{"edited_rows": {position: {column: new value}}, ...}, where position is the row's
+position in the frame the editor was given. Reading that delta touches only the rows
+that were edited, instead of comparing every row of the page cell by cell; rows whose
+edits put back the original values are dropped. When no editor state is available,
+the edited frame is compared with the original column-wise in one pass.
+
+The result is a frame of the record key and the edited columns, ready for
+services/review_writer.py.
+"""
+from typing import Dict, Any, List, Optional
+import pandas as pd
+
+
+def editor_edits(editor_state: Optional[Dict[str, Any]]) -> Optional[Dict[int, Dict[str, Any]]]:
+    """edited_rows of a data_editor's session state keyed by row position, or None without state"""
+    if not isinstance(editor_state, dict) or "edited_rows" not in editor_state:
+        return None
+    return {int(position): values for position, values in editor_state["edited_rows"].items()}
+
+def is_blank(values: pd.Series) -> pd.Series:
+    """True where a value is missing or an empty string"""
+    return (values.isna() | values.astype(object).eq("")).astype(bool)
+
+def fill_blank(values: pd.Series, fallback: pd.Series) -> pd.Series:
+    """values with the blank entries taken from fallback"""
+    return values.astype(object).where(~is_blank(values), fallback.astype(object))
+
+def differs(before: pd.Series, after: pd.Series) -> pd.Series:
+    """True where two aligned columns hold different values; two missing values are equal"""
+    same = before.astype(object).eq(after.astype(object)) | (before.isna() & after.isna())
+    return ~same.astype(bool)
+
+def apply_edits(frame: pd.DataFrame, edited_rows: Dict[int, Dict[str, Any]], columns: List[str]) -> pd.DataFrame:
+    """frame[columns] with the editor's edits to those columns applied"""
+    result = frame[columns].astype(object)
+    for position, values in edited_rows.items():
+        for col, value in values.items():
+            if col in result.columns and 0 <= position < len(result):
+                result.iat[position, result.columns.get_loc(col)] = value
+    return result
+
+def changed_rows(frame: pd.DataFrame, edited_rows: Dict[int, Dict[str, Any]], key: str, columns: List[str]) -> pd.DataFrame:
+    """Key and new values of the rows whose columns the editor's edits actually changed"""
+    positions = sorted(
+        position for position, values in edited_rows.items()
+        if 0 <= position < len(frame) and any(col in values for col in columns)
+    )
+    touched = frame.iloc[positions]
+    edits = {i: edited_rows[position] for i, position in enumerate(positions)}
+    after = apply_edits(touched, edits, [key] + columns)
+    before = touched[columns]
+    mask = pd.concat([differs(before[col], after[col]) for col in columns], axis=1).any(axis=1)
+    return after[mask.to_numpy()].reset_index(drop=True)
+
+def diff_frames(original: pd.DataFrame, edited: pd.DataFrame, key: str, columns: List[str]) -> pd.DataFrame:
+    """Key and new values of the rows where edited differs from original in any of columns"""
+    mask = pd.concat([differs(original[col], edited[col]) for col in columns], axis=1).any(axis=1)
+    return edited.loc[mask.to_numpy(), [key] + columns].astype(object).reset_index(drop=True)
+
+def editor_changes(original: pd.DataFrame, edited: pd.DataFrame, editor_state: Optional[Dict[str, Any]], key: str, columns: List[str]) -> pd.DataFrame:
+    """Rows changed in a data_editor: from its edited_rows delta, else by comparing the frames"""
+    edited_rows = editor_edits(editor_state)
+    if edited_rows is None:
+        return diff_frames(original, edited, key, columns)
+    return changed_rows(original, edited_rows, key, columns)
@@ -0,0 +1,245 @@
+"""
+Pluggable readers for the upload formats the upload page accepts.
+
+Every reader turns an uploaded file into the same things the CSV pipeline works with:
+a schema, a scan (row and null counts, column types, profile), a preview and a
+restartable stream of typed DataFrame chunks. The reader is picked from the file
+name's suffix:
+
+    .csv            CSV text, Arrow or pandas reader (services/csv_stream.py)
+    .csv.gz/.zst    the same, decompressed as a stream by Arrow's native codecs
+    .parquet        read column-wise with its own exact schema, never parsed as text;
+                    the bulk path can load the file itself without re-encoding it
+    .xlsx           first worksheet, streamed row by row (openpyxl read-only mode)
+
+Compressed and columnar files are typically 5-10x smaller than the CSV they replace,
+so they also cut the transfer through the browser and the app server.
+"""
+import io
+from typing import Dict, Any, Callable, Iterator, List, Optional
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from services.arrow_csv import open_arrow_source
+from services.csv_stream import scan_csv, scan_chunks, conform_chunk, read_csv_preview, upload_chunk_factory
+from services.schema_inference import SAMPLE_ROWS, infer_csv_schema
+from services.volume_backup import open_source_stream
+
+# Extensions for st.file_uploader; compound suffixes are checked by reader_for
+UPLOADER_TYPES = ["csv", "gz", "zst", "parquet", "xlsx"]
+
+
+class DecompressedFile(io.RawIOBase):
+    """Rewindable read-only stream of a compressed upload's decompressed bytes
+
+    Decompression runs in Arrow's native codec; rewinding to the start reopens the
+    stream, which is all the CSV readers need between passes.
+    """
+
+    def __init__(self, uploaded_file, codec: str):
+        self.uploaded_file = uploaded_file
+        self.codec = codec
+        self.stream = None
+        self.position = 0
+
+    def open_arrow(self):
+        return pa.CompressedInputStream(open_arrow_source(self.uploaded_file), self.codec)
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR and offset == 0:
+            return self.position
+        if whence != io.SEEK_SET or offset != 0:
+            raise io.UnsupportedOperation("a decompressed upload can only be rewound to the start")
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+        self.position = 0
+        return 0
+
+    def readinto(self, target):
+        if self.stream is None:
+            self.stream = self.open_arrow()
+        data = self.stream.read(len(target))
+        size = len(data)
+        target[:size] = data
+        self.position += size
+        return size
+
+    def close(self):
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+        super().close()
+
+
+class CsvReader:
+    """CSV text, optionally gzip or zstd compressed"""
+
+    columnar = False
+
+    def __init__(self, compression: Optional[str] = None):
+        self.compression = compression
+        self.compressed = compression is not None
+        self.label = f"{compression}-compressed CSV" if compression else "CSV"
+
+    def source(self, uploaded_file):
+        return DecompressedFile(uploaded_file, self.compression) if self.compression else uploaded_file
+
+    def infer_schema(self, uploaded_file, sample_rows: int = SAMPLE_ROWS) -> Optional[Dict[str, Any]]:
+        return infer_csv_schema(self.source(uploaded_file), sample_rows)
+
+    def scan(self, uploaded_file, chunk_rows: int, schema: Optional[Dict[str, Any]], profile: bool = False) -> Dict[str, Any]:
+        return scan_csv(self.source(uploaded_file), chunk_rows, schema=schema, profile=profile)
+
+    def preview(self, uploaded_file, scan: Dict[str, Any], rows: int = 10) -> pd.DataFrame:
+        return read_csv_preview(self.source(uploaded_file), rows, scan["read_options"], scan["engine"])
+
+    def chunk_factory(self, uploaded_file, scan: Dict[str, Any], chunk_rows: int) -> Callable[[], Iterator[pd.DataFrame]]:
+        return upload_chunk_factory(self.source(uploaded_file), scan, chunk_rows)
+
+
+def arrow_sql_type(arrow_type: pa.DataType) -> str:
+    """Delta column type for an Arrow (Parquet) column type"""
+    if pa.types.is_dictionary(arrow_type):
+        return arrow_sql_type(arrow_type.value_type)
+    if pa.types.is_boolean(arrow_type):
+        return 'BOOLEAN'
+    if pa.types.is_integer(arrow_type):
+        return 'BIGINT'
+    if pa.types.is_floating(arrow_type):
+        return 'DOUBLE'
+    if pa.types.is_decimal(arrow_type):
+        return f"DECIMAL({arrow_type.precision},{arrow_type.scale})"
+    if pa.types.is_date(arrow_type):
+        return 'DATE'
+    if pa.types.is_timestamp(arrow_type):
+        return 'TIMESTAMP'
+    return 'STRING'
+
+def parquet_columns(uploaded_file) -> List[str]:
+    """Column names of a Parquet upload, from its footer"""
+    return pq.read_schema(open_arrow_source(uploaded_file)).names
+
+def iter_parquet_chunks(uploaded_file, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    """Yield the Parquet file as Arrow-backed DataFrame chunks of at most chunk_rows rows"""
+    parquet_file = pq.ParquetFile(open_arrow_source(uploaded_file))
+    for batch in parquet_file.iter_batches(batch_size=chunk_rows):
+        yield batch.to_pandas(types_mapper=pd.ArrowDtype)
+
+
+class ParquetReader:
+    """Parquet file, read column-wise with the types stored in the file"""
+
+    columnar = True
+    compressed = True
+    label = "Parquet"
+
+    def infer_schema(self, uploaded_file, sample_rows: int = SAMPLE_ROWS) -> Optional[Dict[str, Any]]:
+        # The file carries its schema; nothing to sample
+        arrow_schema = pq.read_schema(open_arrow_source(uploaded_file))
+        columns = {
+            field.name: {"kind": str(field.type), "sql_type": arrow_sql_type(field.type)}
+            for field in arrow_schema
+        }
+        return {
+            "columns": columns,
+            "sql_types": {col: info["sql_type"] for col, info in columns.items()},
+            "read_options": None,
+            "memory": None,
+        }
+
+    def scan(self, uploaded_file, chunk_rows: int, schema: Optional[Dict[str, Any]], profile: bool = False) -> Dict[str, Any]:
+        schema = schema or self.infer_schema(uploaded_file)
+        result = scan_chunks(iter_parquet_chunks(uploaded_file, chunk_rows), schema["sql_types"], profile)
+        return {**result, "read_options": None, "engine": "parquet", "schema_fallback": False}
+
+    def preview(self, uploaded_file, scan: Dict[str, Any], rows: int = 10) -> pd.DataFrame:
+        return next(iter_parquet_chunks(uploaded_file, rows), pd.DataFrame())
+
+    def chunk_factory(self, uploaded_file, scan: Dict[str, Any], chunk_rows: int) -> Callable[[], Iterator[pd.DataFrame]]:
+        return lambda: (conform_chunk(chunk, scan["sql_types"]) for chunk in iter_parquet_chunks(uploaded_file, chunk_rows))
+
+
+def rows_to_frame(rows: List[tuple], header: List[str]) -> pd.DataFrame:
+    """DataFrame of worksheet rows; pandas infers each column's type from the cell values"""
+    return pd.DataFrame.from_records(rows, columns=header).infer_objects()
+
+def iter_excel_chunks(uploaded_file, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    """Yield the first worksheet as DataFrame chunks; the first row holds the column names"""
+    from openpyxl import load_workbook
+
+    source = open_source_stream(uploaded_file)
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        # Columns without a name (e.g. formatted but unused ones) are dropped from every row
+        header_row = next(rows, ())
+        positions = [i for i, value in enumerate(header_row) if value is not None]
+        header = [str(header_row[i]) for i in positions]
+        batch = []
+        for row in rows:
+            row = tuple(row[i] if i < len(row) else None for i in positions)
+            # Formatted but empty rows at the bottom of a sheet come back as all None
+            if all(value is None for value in row):
+                continue
+            batch.append(row)
+            if len(batch) == chunk_rows:
+                yield rows_to_frame(batch, header)
+                batch = []
+        if batch:
+            yield rows_to_frame(batch, header)
+    finally:
+        workbook.close()
+        if source is not uploaded_file:
+            source.close()
+
+
+class ExcelReader:
+    """First worksheet of an .xlsx workbook; column types come from the cell values"""
+
+    columnar = False
+    compressed = True
+    label = "Excel workbook"
+
+    def infer_schema(self, uploaded_file, sample_rows: int = SAMPLE_ROWS) -> Optional[Dict[str, Any]]:
+        # Cells are already typed; the scan widens them across chunks
+        return None
+
+    def scan(self, uploaded_file, chunk_rows: int, schema: Optional[Dict[str, Any]], profile: bool = False) -> Dict[str, Any]:
+        result = scan_chunks(iter_excel_chunks(uploaded_file, chunk_rows), None, profile)
+        return {**result, "read_options": None, "engine": "openpyxl", "schema_fallback": False}
+
+    def preview(self, uploaded_file, scan: Dict[str, Any], rows: int = 10) -> pd.DataFrame:
+        return next(iter_excel_chunks(uploaded_file, rows), pd.DataFrame())
+
+    def chunk_factory(self, uploaded_file, scan: Dict[str, Any], chunk_rows: int) -> Callable[[], Iterator[pd.DataFrame]]:
+        return lambda: (conform_chunk(chunk, scan["sql_types"]) for chunk in iter_excel_chunks(uploaded_file, chunk_rows))
+
+
+# Longer suffixes first so .csv.gz is not taken for something else
+READERS = {
+    ".csv.gz": CsvReader("gzip"),
+    ".csv.zst": CsvReader("zstd"),
+    ".csv": CsvReader(),
+    ".parquet": ParquetReader(),
+    ".xlsx": ExcelReader(),
+}
+
+
+def reader_for(file_name: str):
+    """Reader for an uploaded file, chosen by its suffix"""
+    name = file_name.lower()
+    for suffix, reader in READERS.items():
+        if name.endswith(suffix):
+            return reader
+    raise ValueError(f"Unsupported file type: {file_name}. Supported: {', '.join(READERS)}")
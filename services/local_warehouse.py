@@ -0,0 +1,326 @@
+"""
+Local stand-in for the Databricks SQL warehouse and Unity Catalog volumes.
+
+Backed by SQLite and a local folder, it understands the handful of statements the
+upload page issues (DESCRIBE, CREATE/DROP TABLE, INSERT INTO/OVERWRITE with VALUES
+or read_files) and can add a simulated network round trip to every statement.
+Used by the benchmarks to compare upload paths without a workspace.
+"""
+import os
+import re
+import sqlite3
+import threading
+import time
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+# SQLite cannot bind numpy scalars directly
+sqlite3.register_adapter(np.int64, int)
+sqlite3.register_adapter(np.int32, int)
+sqlite3.register_adapter(np.float64, float)
+sqlite3.register_adapter(np.bool_, bool)
+sqlite3.register_adapter(pd.Timestamp, str)
+
+THREE_PART_NAME = re.compile(r"\b([A-Za-z_]\w*)\.([A-Za-z_]\w*)\.([A-Za-z_]\w*)\b")
+READ_FILES = re.compile(
+    r"^INSERT\s+(INTO|OVERWRITE)\s+(\S+)\s*\((.*?)\)\s*SELECT\s+.*?\s+FROM\s+read_files\('([^']*)'.*\)$",
+    re.IGNORECASE | re.DOTALL,
+)
+COPY_INTO = re.compile(r"^COPY\s+INTO\s+(\S+)\s+FROM\s+'([^']*)'", re.IGNORECASE | re.DOTALL)
+INSERT_OVERWRITE = re.compile(r"^INSERT\s+OVERWRITE\s+(\S+)", re.IGNORECASE)
+DESCRIBE = re.compile(r"^DESCRIBE\s+(?:TABLE\s+)?(\S+)", re.IGNORECASE)
+DESCRIBE_HISTORY = re.compile(r"^DESCRIBE\s+HISTORY\s+(\S+)", re.IGNORECASE)
+MERGE = re.compile(r"^MERGE\s+INTO\s+(\S+)\s+(?:AS\s+)?(\w+)\s+USING\s+(.*)$", re.IGNORECASE | re.DOTALL)
+MERGE_SOURCE_ALIAS = re.compile(r"^\s*(?:AS\s+)?(\w+)\s*(?:\(([^)]*)\))?\s+ON\s+(.*)$", re.IGNORECASE | re.DOTALL)
+MERGE_WHEN = re.compile(r"\bWHEN\s+(NOT\s+MATCHED|MATCHED)\b", re.IGNORECASE)
+MERGE_CLAUSE = re.compile(r"^(?:AND\s+(.*?)\s+)?THEN\s+(.*)$", re.IGNORECASE | re.DOTALL)
+MERGE_INSERT = re.compile(r"^INSERT\s*\((.*?)\)\s*VALUES\s*\((.*)\)$", re.IGNORECASE | re.DOTALL)
+# Statements that change a table, and so bump its version like a Delta commit
+WRITE_TARGET = re.compile(
+    r"^(?:INSERT\s+(?:INTO|OVERWRITE)|COPY\s+INTO|DELETE\s+FROM|UPDATE|MERGE\s+INTO|"
+    r"CREATE\s+TABLE(?:\s+IF\s+NOT\s+EXISTS)?|DROP\s+TABLE(?:\s+IF\s+EXISTS)?)\s+(\w+)",
+    re.IGNORECASE,
+)
+
+
+def matching_paren(text: str, start: int) -> int:
+    """Index of the parenthesis closing the one at start"""
+    depth = 0
+    for i in range(start, len(text)):
+        if text[i] == "(":
+            depth += 1
+        elif text[i] == ")":
+            depth -= 1
+            if depth == 0:
+                return i
+    raise ValueError("Unbalanced parentheses")
+
+
+class LocalFiles:
+    """Minimal stand-in for WorkspaceClient().files backed by a local folder"""
+
+    def __init__(self, root_dir: str, latency: float = 0.0):
+        self.root_dir = root_dir
+        self.latency = latency
+
+    def local_path(self, file_path: str) -> str:
+        return os.path.join(self.root_dir, file_path.lstrip("/"))
+
+    def upload(self, file_path: str, contents, overwrite: bool = False):
+        time.sleep(self.latency)
+        target = self.local_path(file_path)
+        if os.path.exists(target) and not overwrite:
+            raise FileExistsError(file_path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, "wb") as out:
+            while True:
+                chunk = contents.read(1024 * 1024)
+                if not chunk:
+                    break
+                out.write(chunk)
+
+    def delete(self, file_path: str):
+        time.sleep(self.latency)
+        os.remove(self.local_path(file_path))
+
+
+class LocalCursor:
+    def __init__(self, connection: "LocalConnection"):
+        self.connection = connection
+        self.warehouse = connection.warehouse
+        self.rows = []
+        self.description = None
+        self.rowcount = -1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.rows = []
+
+    def execute(self, operation: str, parameters=None):
+        statement = " ".join(operation.split())
+        statement = THREE_PART_NAME.sub(r"\1__\2__\3", statement)
+        row_estimate = len(parameters) if parameters else 0
+        self.warehouse.simulate_round_trip(row_estimate)
+        with self.warehouse.lock:
+            self._execute(statement, parameters or {})
+            match = WRITE_TARGET.match(statement)
+            if match:
+                self.warehouse.bump_version(match.group(1), statement.split()[0].upper())
+
+    def _execute(self, statement: str, parameters):
+        db = self.warehouse.db
+        match = DESCRIBE_HISTORY.match(statement)
+        if match:
+            # Latest commit first: (version, timestamp, operation)
+            version = self.warehouse.versions.get(match.group(1))
+            if version is None:
+                raise sqlite3.OperationalError(f"Table or view not found: {match.group(1)}")
+            self._set_result([(version, None, "WRITE")], [("version",), ("timestamp",), ("operation",)])
+            return
+
+        match = DESCRIBE.match(statement)
+        if match:
+            info = db.execute(f"PRAGMA table_info({match.group(1)})").fetchall()
+            if not info:
+                raise sqlite3.OperationalError(f"Table or view not found: {match.group(1)}")
+            self._set_result([(row[1], row[2], None) for row in info])
+            return
+
+        statement = re.sub(r"\s+USING\s+DELTA\b", "", statement, flags=re.IGNORECASE)
+        # Null-safe equality
+        statement = statement.replace("<=>", " IS ")
+
+        if MERGE.match(statement):
+            self._merge(statement, parameters)
+            return
+
+        match = READ_FILES.match(statement) or COPY_INTO.match(statement)
+        if match:
+            if match.re is READ_FILES:
+                kind, table, path = match.group(1).upper(), match.group(2), match.group(4)
+            else:
+                kind, table, path = "INTO", match.group(1), match.group(2)
+            target_cols = match.group(3) if match.re is READ_FILES else None
+            self._load_files(table, path, overwrite=(kind == "OVERWRITE"), target_cols=target_cols, parameters=parameters)
+            return
+
+        match = INSERT_OVERWRITE.match(statement)
+        if match:
+            db.execute(f"DELETE FROM {match.group(1)}")
+            statement = "INSERT INTO" + statement[len("INSERT OVERWRITE"):]
+
+        cur = db.execute(statement, parameters)
+        self.rowcount = cur.rowcount
+        self._set_result(cur.fetchall(), cur.description)
+        db.commit()
+
+    def _load_files(self, table: str, path: str, overwrite: bool, target_cols: str = None, parameters=None):
+        db = self.warehouse.db
+        local = self.warehouse.files.local_path(path)
+        # Like read_files, ignore the pandas metadata stored alongside the Parquet schema
+        df = pq.read_table(local).to_pandas(ignore_metadata=True)
+        # Columns beyond the Parquet schema are constants bound as :c0, :c1, ...
+        if target_cols:
+            names = [name.strip().strip("`") for name in target_cols.split(",")]
+            for i, name in enumerate(names[len(df.columns):]):
+                df[name] = parameters[f"c{i}"]
+        cols = ",".join([f"`{col}`" for col in df.columns])
+        placeholders = ",".join(["?"] * len(df.columns))
+        if overwrite:
+            db.execute(f"DELETE FROM {table}")
+        db.executemany(
+            f"INSERT INTO {table} ({cols}) VALUES ({placeholders})",
+            df.astype(object).where(df.notna(), None).itertuples(index=False, name=None),
+        )
+        db.commit()
+        self.rowcount = len(df)
+        self._set_result([])
+
+    def _merge(self, statement: str, parameters):
+        """Run MERGE INTO as SQLite statements over a materialised source"""
+        db = self.warehouse.db
+        match = MERGE.match(statement)
+        table, target_alias, rest = match.group(1), match.group(2), match.group(3)
+
+        # Source is a table name or a parenthesised query, then an alias with optional column list
+        if rest.startswith("("):
+            end = matching_paren(rest, 0)
+            source, rest = rest[1:end], rest[end + 1:]
+        else:
+            source, rest = rest.split(" ", 1)
+        source_match = MERGE_SOURCE_ALIAS.match(rest)
+        source_alias, source_cols, rest = source_match.group(1), source_match.group(2), source_match.group(3)
+        on_sql, *clauses = MERGE_WHEN.split(rest)
+        on_sql = on_sql.strip()
+
+        db.execute("DROP TABLE IF EXISTS temp.merge_source")
+        db.execute("DROP TABLE IF EXISTS temp.merge_inserts")
+        if source_cols:
+            db.execute(f"CREATE TEMP TABLE merge_source AS WITH src({source_cols}) AS ({source}) SELECT * FROM src", parameters)
+        elif source.upper().startswith(("SELECT", "VALUES", "WITH")):
+            db.execute(f"CREATE TEMP TABLE merge_source AS SELECT * FROM ({source})", parameters)
+        else:
+            db.execute(f"CREATE TEMP TABLE merge_source AS SELECT * FROM {source}")
+        source_ref = f"temp.merge_source AS {source_alias}"
+        matched_sql = f"EXISTS (SELECT 1 FROM {table} AS {target_alias} WHERE {on_sql})"
+
+        counts = {"updated": 0, "deleted": 0, "inserted": 0}
+        # clauses alternate: kind ("MATCHED" / "NOT MATCHED"), body
+        parsed = [(kind.upper(), MERGE_CLAUSE.match(body.strip())) for kind, body in zip(clauses[0::2], clauses[1::2])]
+
+        # Decide which rows are new before matched rows are changed
+        insert_sql = None
+        for kind, clause in parsed:
+            if kind.startswith("NOT"):
+                condition, insert = clause.group(1), MERGE_INSERT.match(clause.group(2).strip())
+                where = f"NOT {matched_sql}" + (f" AND ({condition})" if condition else "")
+                db.execute(
+                    f"CREATE TEMP TABLE merge_inserts AS SELECT {insert.group(2)} FROM {source_ref} WHERE {where}",
+                    parameters,
+                )
+                insert_sql = f"INSERT INTO {table} ({insert.group(1)}) SELECT * FROM temp.merge_inserts"
+
+        earlier = []
+        for kind, clause in parsed:
+            if kind.startswith("NOT"):
+                continue
+            condition, action = clause.group(1), clause.group(2).strip()
+            # A row takes the first matching WHEN MATCHED clause only
+            where = " AND ".join([on_sql] + [f"NOT ({prior})" for prior in earlier] + ([f"({condition})"] if condition else []))
+            earlier.append(condition or "TRUE")
+            if action.upper().startswith("DELETE"):
+                cur = db.execute(
+                    f"DELETE FROM {table} AS {target_alias} WHERE EXISTS (SELECT 1 FROM {source_ref} WHERE {where})",
+                    parameters,
+                )
+                counts["deleted"] += cur.rowcount
+            else:
+                assignments = re.sub(rf"(^|,\s*){target_alias}\.", r"\1", action[len("UPDATE SET "):])
+                cur = db.execute(
+                    f"UPDATE {table} AS {target_alias} SET {assignments} FROM {source_ref} WHERE {where}",
+                    parameters,
+                )
+                counts["updated"] += cur.rowcount
+        if insert_sql:
+            counts["inserted"] = db.execute(insert_sql).rowcount
+        db.commit()
+
+        affected = sum(counts.values())
+        self.rowcount = affected
+        self._set_result(
+            [(affected, counts["updated"], counts["deleted"], counts["inserted"])],
+            [("num_affected_rows",), ("num_updated_rows",), ("num_deleted_rows",), ("num_inserted_rows",)],
+        )
+
+    def _set_result(self, rows, description=None):
+        self.rows = list(rows)
+        self.description = description
+
+    def fetchone(self):
+        return self.rows.pop(0) if self.rows else None
+
+    def fetchall(self):
+        rows, self.rows = self.rows, []
+        return rows
+
+    def fetchall_arrow(self):
+        import pyarrow as pa
+        columns = [d[0] for d in (self.description or [])]
+        return pa.Table.from_pandas(pd.DataFrame(self.fetchall(), columns=columns), preserve_index=False)
+
+
+class LocalConnection:
+    def __init__(self, warehouse: "LocalWarehouse"):
+        self.warehouse = warehouse
+
+    def cursor(self) -> LocalCursor:
+        return LocalCursor(self)
+
+    def close(self):
+        pass
+
+
+class LocalWarehouse:
+    """SQLite-backed stand-in warehouse with optional simulated latency"""
+
+    def __init__(self, root_dir: str, round_trip_latency: float = 0.0, per_param_latency: float = 0.0, max_concurrency: int = 8):
+        os.makedirs(root_dir, exist_ok=True)
+        self.root_dir = root_dir
+        self.round_trip_latency = round_trip_latency
+        self.per_param_latency = per_param_latency
+        self.statement_count = 0
+        # Per-table commit counter reported by DESCRIBE HISTORY
+        self.versions = {}
+        self.lock = threading.Lock()
+        # Statements beyond this many at once queue, like a saturated warehouse
+        self.slots = threading.BoundedSemaphore(max_concurrency)
+        self.db = sqlite3.connect(os.path.join(root_dir, "warehouse.db"), check_same_thread=False)
+        self.files = LocalFiles(root_dir, latency=round_trip_latency)
+
+    def simulate_round_trip(self, param_count: int = 0):
+        """Sleep like a network round trip; runs outside the lock so connections overlap"""
+        with self.lock:
+            self.statement_count += 1
+        with self.slots:
+            time.sleep(self.round_trip_latency + param_count * self.per_param_latency)
+
+    def connect(self) -> LocalConnection:
+        return LocalConnection(self)
+
+    def bump_version(self, table: str, command: str):
+        """Record a commit on table; CREATE of an existing table and DROP are not commits"""
+        if command == "DROP":
+            self.versions.pop(table, None)
+        elif command != "CREATE" or table not in self.versions:
+            self.versions[table] = self.versions.get(table, -1) + 1
+
+    def count_rows(self, table_name: str) -> int:
+        table = THREE_PART_NAME.sub(r"\1__\2__\3", table_name)
+        with self.lock:
+            return self.db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
@@ -0,0 +1,160 @@
+"""
+Concurrent batch writer for the upload page.
+
+Batches from the chunk stream are sent as parameterized INSERT INTO statements by a
+pool of worker threads, each with its own warehouse connection, so the warehouse is
+kept busy instead of waiting on one round trip at a time. Anything that fails is
+reported in batch order.
+
+An INSERT is not idempotent: if the connection drops after the warehouse committed a
+batch, sending it again would load its rows twice. So a batch is retried, with
+exponential backoff, only on errors that reject the statement before it runs
+(throttling, a warehouse still starting, a connection that could not be opened);
+any other error fails the batch, and the load, at once.
+
+Only appends are safe to parallelise. Overwrites go through the staging table
+(services/staging.py), which the writer fills with appends.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Any, Callable, Iterable, List, Sequence
+import pandas as pd
+
+from services.table_writer import build_insert_sql, constant_params, iter_insert_batches, split_constant_columns
+
+DEFAULT_WRITERS = 4
+MAX_WRITERS = 16
+
+# Error text of failures that reject a statement before the warehouse runs it
+PRE_EXECUTION_ERRORS = [
+    "429", "TOO MANY REQUESTS", "503", "SERVICE UNAVAILABLE", "TEMPORARILY_UNAVAILABLE",
+    "CONNECTION REFUSED", "NAME OR SERVICE NOT KNOWN",
+]
+
+
+class BatchWriteError(Exception):
+    """One or more batches failed after all retries"""
+
+    def __init__(self, failures: List[Dict[str, Any]]):
+        self.failures = sorted(failures, key=lambda failure: failure["batch"])
+        first = self.failures[0]
+        super().__init__(
+            f"{len(self.failures)} batch(es) failed; first failure at batch {first['batch']} "
+            f"(rows {first['first_row']}-{first['last_row']}): {first['error']}"
+        )
+
+
+def is_pre_execution_error(error: Exception) -> bool:
+    """Whether an error rejected the statement before it ran, so sending it again cannot apply it twice"""
+    message = str(error).upper()
+    return any(marker in message for marker in PRE_EXECUTION_ERRORS)
+
+def execute_with_retry(execute: Callable[[], Any], max_retries: int, backoff_seconds: float,
+                       should_retry: Callable[[Exception], bool] = lambda error: True):
+    """Run execute(), retrying with exponential backoff while should_retry(error) holds"""
+    for attempt in range(max_retries + 1):
+        try:
+            return execute()
+        except Exception as e:
+            if attempt == max_retries or not should_retry(e):
+                raise
+            time.sleep(backoff_seconds * (2 ** attempt))
+
+def parallel_insert_chunks(
+    chunks: Iterable[pd.DataFrame],
+    table_name: str,
+    connect: Callable[[], Any],
+    workers: int = DEFAULT_WRITERS,
+    max_retries: int = 3,
+    backoff_seconds: float = 0.5,
+    on_batch: Callable[[int], None] = None,
+    constants: Dict[str, Any] = None,
+    constant_columns: Sequence[str] = (),
+) -> int:
+    """Append the chunk stream to the table with a pool of connections; returns rows written
+
+    constant_columns hold one value in every chunk and are bound once per statement.
+    """
+    workers = max(1, min(workers, MAX_WRITERS))
+    local = threading.local()
+    connections = []
+    connections_lock = threading.Lock()
+
+    def get_worker_connection():
+        # One connection per worker thread, opened lazily
+        if not hasattr(local, "conn"):
+            local.conn = connect()
+            with connections_lock:
+                connections.append(local.conn)
+        return local.conn
+
+    def write_batch(sql: str, params: Dict[str, Any], row_count: int) -> int:
+        # Nothing is written while connecting, so that is always safe to retry
+        conn = execute_with_retry(get_worker_connection, max_retries, backoff_seconds)
+
+        def execute():
+            with conn.cursor() as cursor:
+                cursor.execute(sql, params)
+        execute_with_retry(execute, max_retries, backoff_seconds, is_pre_execution_error)
+        return row_count
+
+    failures = []
+    total_rows = 0
+    pending = {}
+
+    def collect(done):
+        nonlocal total_rows
+        for future in done:
+            batch_info = pending.pop(future)
+            try:
+                rows = future.result()
+                total_rows += rows
+                if on_batch:
+                    on_batch(rows)
+            except Exception as e:
+                failures.append({**batch_info, "error": str(e)})
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="upload-writer") as pool:
+            batch_index = 0
+            row_offset = 0
+            for chunk in chunks:
+                if len(chunk) == 0:
+                    continue
+                data_cols, chunk_constants = split_constant_columns(chunk, constants, constant_columns)
+                const_params = constant_params(chunk_constants)
+                for values_sql, params, row_count in iter_insert_batches(chunk, len(const_params), data_cols):
+                    # Stop feeding the pool once anything has failed for good
+                    if failures:
+                        break
+                    sql = build_insert_sql("INTO", table_name, data_cols, values_sql, chunk_constants)
+                    params.update(const_params)
+                    future = pool.submit(write_batch, sql, params, row_count)
+                    pending[future] = {
+                        "batch": batch_index,
+                        "first_row": row_offset,
+                        "last_row": row_offset + row_count - 1,
+                    }
+                    batch_index += 1
+                    row_offset += row_count
+
+                    # Keep at most two batches per worker in flight to bound memory
+                    if len(pending) >= workers * 2:
+                        done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+                        collect(done)
+                if failures:
+                    break
+
+            done, _ = wait(list(pending))
+            collect(done)
+    finally:
+        for conn in connections:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    if failures:
+        raise BatchWriteError(failures)
+    return total_rows
@@ -0,0 +1,137 @@
+"""
+Single-pass column profiler for CSV uploads.
+
+Fed the same chunks as the scan pass, it keeps per column: distinct count, min/max
+and the most frequent values. Every statistic is updated with vectorized pandas/numpy
+operations on the chunk; nothing is re-read afterwards. Distinct counts are exact
+while a column has few distinct values and switch to a HyperLogLog estimate once
+keeping every value would cost too much memory.
+"""
+from typing import Dict, Any, List, Optional
+import numpy as np
+import pandas as pd
+
+# 2^14 registers: ~0.8% standard error in 16 KB per column
+HLL_PRECISION = 14
+
+# Above this many distinct values a column's distinct count becomes an HLL estimate
+EXACT_DISTINCT_LIMIT = 100_000
+
+TOP_VALUES = 5
+# Candidates kept per column for the top values; exact when a column has fewer distinct values
+TOP_CANDIDATES = 1_000
+
+
+def hash_values(values: pd.Index) -> np.ndarray:
+    """64-bit hashes of values, consistent across chunks of the same dtype"""
+    return pd.util.hash_pandas_object(values, index=False).to_numpy(dtype=np.uint64)
+
+def bit_length(values: np.ndarray) -> np.ndarray:
+    """Bit length of each uint64, exactly (frexp on values that fit a float64 mantissa)"""
+    high = values >> np.uint64(11)
+    _, high_exponent = np.frexp(high.astype(np.float64))
+    _, low_exponent = np.frexp(values.astype(np.float64))
+    return np.where(high > 0, high_exponent + 11, low_exponent)
+
+
+class HyperLogLog:
+    """HyperLogLog distinct-count sketch over precomputed 64-bit hashes"""
+
+    def __init__(self, precision: int = HLL_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add_hashes(self, hashes: np.ndarray):
+        p = self.precision
+        index = (hashes >> np.uint64(64 - p)).astype(np.intp)
+        remainder = hashes << np.uint64(p)
+        # Position of the first set bit after the index bits
+        rank = np.minimum(64 - bit_length(remainder) + 1, 64 - p + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def estimate(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.exp2(-self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # Linear counting is more accurate for small cardinalities
+            return int(round(m * np.log(m / zeros)))
+        return int(round(raw))
+
+
+class ColumnProfiler:
+    def __init__(self):
+        self.sketch = HyperLogLog()
+        self.exact_hashes: Optional[np.ndarray] = np.empty(0, dtype=np.uint64)
+        self.minimum = None
+        self.maximum = None
+        self.top_counts = pd.Series(dtype="int64")
+        self.top_is_exact = True
+
+    def update(self, series: pd.Series):
+        # One counting pass; distinct values feed the sketches, counts feed the top values
+        counts = series.value_counts(dropna=True)
+        if counts.empty:
+            return
+        hashes = hash_values(counts.index)
+        self.sketch.add_hashes(hashes)
+        if self.exact_hashes is not None:
+            self.exact_hashes = np.union1d(self.exact_hashes, hashes)
+            if len(self.exact_hashes) > EXACT_DISTINCT_LIMIT:
+                self.exact_hashes = None
+
+        low, high = column_min_max(series, counts.index)
+        if not pd.isna(low):
+            self.minimum = low if self.minimum is None else min(self.minimum, low)
+            self.maximum = high if self.maximum is None else max(self.maximum, high)
+
+        if len(counts) > TOP_CANDIDATES:
+            counts = counts.iloc[:TOP_CANDIDATES]
+            self.top_is_exact = False
+        counts.index = counts.index.astype(object)
+        merged = self.top_counts.add(counts, fill_value=0).astype("int64")
+        if len(merged) > TOP_CANDIDATES:
+            merged = merged.nlargest(TOP_CANDIDATES)
+            self.top_is_exact = False
+        self.top_counts = merged
+
+    def summary(self) -> Dict[str, Any]:
+        exact = self.exact_hashes is not None
+        top = self.top_counts.sort_values(ascending=False, kind="stable").head(TOP_VALUES)
+        return {
+            "distinct": len(self.exact_hashes) if exact else self.sketch.estimate(),
+            "distinct_is_exact": exact,
+            "min": self.minimum,
+            "max": self.maximum,
+            "top_values": [(value, int(count)) for value, count in top.items()],
+            "top_is_exact": self.top_is_exact,
+        }
+
+
+def column_min_max(series: pd.Series, distinct: pd.Index):
+    """Smallest and largest non-null value as plain Python values"""
+    try:
+        low, high = series.min(skipna=True), series.max(skipna=True)
+    except TypeError:
+        # Unordered categoricals and dictionary columns: compare the distinct values
+        values = distinct.tolist()
+        low, high = min(values), max(values)
+    return to_python(low), to_python(high)
+
+def to_python(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class DatasetProfiler:
+    """Profile of every column, updated chunk by chunk"""
+
+    def __init__(self):
+        self.columns: Dict[str, ColumnProfiler] = {}
+
+    def update(self, chunk: pd.DataFrame):
+        for col in chunk.columns:
+            self.columns.setdefault(col, ColumnProfiler()).update(chunk[col])
+
+    def summary(self, columns: List[str]) -> Dict[str, Dict[str, Any]]:
+        return {col: self.columns.get(col, ColumnProfiler()).summary() for col in columns}
@@ -0,0 +1,167 @@
+"""
+Keyset-paginated reads of the review table.
+
+A page is the page_size rows that follow the last key of the previous page, in key
+order: WHERE key > :after_key ORDER BY key LIMIT n. Unlike OFFSET, the warehouse
+starts each page at its first key instead of reading and skipping every earlier row,
+so a page deep into a large table costs the same as the first one. Rows written
+elsewhere in the meantime do not shift later pages. The key must be unique; it is the
+record key the review writes merge on.
+
+Each editor view pushes its filters and columns into the query: filters are a
+{column: value} dict, where a list or tuple means IN and None means IS NULL, and every
+value is a bound parameter. A view reads only the rows and columns it shows, and its
+status counts come from one GROUP BY instead of from rows pulled into the session.
+
+While a page is on screen the next one is fetched in the background, so Next usually
+shows a page that has already arrived. A session holds at most the current page and
+the prefetched one per view. Prefetch workers never touch the session's connection,
+which is not safe to share between threads (PEP 249 threadsafety 1): each worker
+opens a connection of its own on first use and keeps it for its later reads.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, Hashable, List, Optional, Tuple
+
+# Page sizes offered in the editor
+PAGE_SIZE_OPTIONS = [250, 500, 1000, 2500]
+DEFAULT_PAGE_SIZE = 1000
+
+# Background page reads running at once across all sessions
+MAX_PREFETCH_WORKERS = 4
+
+PREFETCH_POOL = ThreadPoolExecutor(max_workers=MAX_PREFETCH_WORKERS, thread_name_prefix="page-prefetch")
+
+# The connection of each prefetch worker thread
+_worker = threading.local()
+
+
+def key_param(value: Any) -> Any:
+    """A key value read from a page as a plain Python query parameter"""
+    return value.item() if hasattr(value, "item") else value
+
+def filter_conditions(filters: Optional[Dict[str, Any]]) -> Tuple[List[str], Dict[str, Any]]:
+    """WHERE conditions and their parameters for a {column: value} filter dict"""
+    conditions: List[str] = []
+    params: Dict[str, Any] = {}
+    for i, (col, value) in enumerate((filters or {}).items()):
+        if isinstance(value, (list, tuple)):
+            if not value:
+                # Nothing selected matches nothing
+                conditions.append("FALSE")
+                continue
+            names = [f"f{i}_{j}" for j in range(len(value))]
+            conditions.append(f"`{col}` IN ({', '.join(f':{name}' for name in names)})")
+            params.update(zip(names, value))
+        elif value is None:
+            conditions.append(f"`{col}` IS NULL")
+        else:
+            conditions.append(f"`{col}` = :f{i}")
+            params[f"f{i}"] = value
+    return conditions, params
+
+def where_sql(conditions: List[str]) -> str:
+    return f" WHERE {' AND '.join(conditions)}" if conditions else ""
+
+def page_query(table_name: str, key: str, page_size: int, after_key: Any = None,
+               columns: Optional[List[str]] = None, filters: Optional[Dict[str, Any]] = None) -> Tuple[str, Dict[str, Any]]:
+    """Query and parameters for the page after after_key (the first page when None)
+
+    Only columns are selected (all when None; the key is always included) and only rows
+    matching filters. One row more than the page is asked for; its presence tells
+    whether a next page exists.
+    """
+    conditions, params = filter_conditions(filters)
+    if after_key is not None:
+        conditions.append(f"`{key}` > :after_key")
+        params["after_key"] = key_param(after_key)
+    if columns is None:
+        select_sql = "*"
+    else:
+        select_sql = ", ".join(f"`{col}`" for col in ([key] if key not in columns else []) + list(columns))
+    query = (
+        f"SELECT {select_sql} FROM {table_name}{where_sql(conditions)} "
+        f"ORDER BY `{key}` LIMIT {int(page_size) + 1}"
+    )
+    return query, params
+
+def read_page(table_name: str, key: str, page_size: int, conn, after_key: Any = None,
+              columns: Optional[List[str]] = None, filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Read the page after after_key
+
+    Returns the page's rows under "data", the key it starts after, the key the next page
+    starts after and whether there is a next page.
+    """
+    query, params = page_query(table_name, key, page_size, after_key, columns, filters)
+    with conn.cursor() as cursor:
+        cursor.execute(query, params)
+        data = cursor.fetchall_arrow().to_pandas()
+    has_next = len(data) > page_size
+    data = data.iloc[:page_size]
+    return {
+        "data": data,
+        "after_key": after_key,
+        "next_key": key_param(data[key].iloc[-1]) if len(data) else None,
+        "has_next": has_next,
+    }
+
+def count_by(table_name: str, column: str, conn, filters: Optional[Dict[str, Any]] = None) -> Dict[Any, int]:
+    """Number of rows matching filters for each value of column, counted in the warehouse"""
+    conditions, params = filter_conditions(filters)
+    with conn.cursor() as cursor:
+        cursor.execute(
+            f"SELECT `{column}`, COUNT(*) FROM {table_name}{where_sql(conditions)} GROUP BY `{column}`",
+            params,
+        )
+        return {value: int(count) for value, count in cursor.fetchall()}
+
+
+def prefetch_with_own_connection(fetch: Callable[[Any], Dict[str, Any]], connect: Callable[[], Any]) -> Dict[str, Any]:
+    """fetch(conn) on the calling prefetch worker's own connection, opened with connect() if it has none
+
+    A failed read closes the connection, so the worker's next read starts on a new one.
+    """
+    if getattr(_worker, "conn", None) is None:
+        _worker.conn = connect()
+    try:
+        return fetch(_worker.conn)
+    except Exception:
+        conn, _worker.conn = _worker.conn, None
+        try:
+            conn.close()
+        except Exception:
+            pass
+        raise
+
+
+class PagePrefetcher:
+    """The page after the one a session has on screen, read in the background"""
+
+    def __init__(self):
+        self.request: Optional[Hashable] = None
+        self.future = None
+
+    def start(self, request: Hashable, fetch: Callable[[Any], Dict[str, Any]], connect: Callable[[], Any]):
+        """Start reading the page identified by request with fetch(conn), replacing any earlier prefetch
+
+        conn is the worker's own connection, opened with connect() (see prefetch_with_own_connection).
+        """
+        if self.future is not None:
+            self.future.cancel()
+        self.request = request
+        self.future = PREFETCH_POOL.submit(prefetch_with_own_connection, fetch, connect)
+
+    def take(self, request: Hashable) -> Optional[Dict[str, Any]]:
+        """The prefetched page for request, waiting for it if still running
+
+        None if a different page was prefetched or the read failed; the caller then
+        reads the page itself, which reports any error in the foreground.
+        """
+        if self.future is None or self.request != request:
+            return None
+        future = self.future
+        self.request, self.future = None, None
+        try:
+            return future.result()
+        except Exception:
+            return None
@@ -0,0 +1,85 @@
+"""
+Incremental refresh of the review editor's pages.
+
+Every review write stamps reviewed_date_maker or reviewed_date_checker, so the rows
+changed since the last refresh are the ones whose stamps are at or after a high-water
+mark. A refresh reads only those rows and merges them by key into each page on screen,
+instead of re-reading every page. The mark trails the refresh time by a short overlap:
+a write stamped just before the mark but committed just after it is read again on the
+next refresh rather than missed, and merging a row twice changes nothing.
+
+A session's own writes need no read at all: the rows it wrote are rebuilt from the page
+they were edited on plus the values written, and merged the same way.
+
+A changed row leaves a page when it no longer matches the page's filters and joins it
+when it does and its key falls within the page's key range; the page stays in key order.
+"""
+from typing import Dict, Any, List, Optional, Tuple
+import pandas as pd
+
+# Columns stamped by every review write
+CHANGE_COLUMNS = ["reviewed_date_maker", "reviewed_date_checker"]
+
+# How far the high-water mark trails the refresh, for writes committed late
+SYNC_OVERLAP_SECONDS = 300
+
+
+def changed_since_query(table_name: str, since: str, change_columns: List[str] = CHANGE_COLUMNS) -> Tuple[str, Dict[str, Any]]:
+    """Query and parameters for the rows stamped at or after since"""
+    conditions = " OR ".join(f"`{col}` >= :since" for col in change_columns)
+    return f"SELECT * FROM {table_name} WHERE {conditions}", {"since": since}
+
+def read_changed_since(table_name: str, since: str, conn, change_columns: List[str] = CHANGE_COLUMNS) -> pd.DataFrame:
+    """Read the rows changed since the high-water mark"""
+    query, params = changed_since_query(table_name, since, change_columns)
+    with conn.cursor() as cursor:
+        cursor.execute(query, params)
+        return cursor.fetchall_arrow().to_pandas()
+
+def written_rows(before: pd.DataFrame, key: str, keys, values: Optional[pd.DataFrame] = None,
+                 constants: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+    """Rows as a write left them: before's rows for keys with the written values and constants applied"""
+    rows = before[before[key].isin(list(keys))].drop_duplicates(subset=[key], keep="last").astype(object)
+    if values is not None:
+        written = values.drop_duplicates(subset=[key], keep="last").set_index(key)
+        for col in written.columns:
+            rows[col] = rows[key].map(written[col]).to_numpy()
+    for col, value in (constants or {}).items():
+        rows[col] = value
+    return rows.reset_index(drop=True)
+
+def matches_filters(rows: pd.DataFrame, filters: Optional[Dict[str, Any]]) -> pd.Series:
+    """True for the rows a query with these filters would return (see review_reader.filter_conditions)"""
+    mask = pd.Series(True, index=rows.index)
+    for col, value in (filters or {}).items():
+        if isinstance(value, (list, tuple)):
+            mask &= rows[col].notna() & rows[col].isin(list(value))
+        elif value is None:
+            mask &= rows[col].isna()
+        else:
+            mask &= rows[col].eq(value).fillna(False).astype(bool)
+    return mask
+
+def in_page_range(keys: pd.Series, info: Dict[str, Any]) -> pd.Series:
+    """True for the keys within a page's range: after the key it starts after and up to the next page"""
+    mask = pd.Series(True, index=keys.index)
+    if info["after_key"] is not None:
+        mask &= keys > info["after_key"]
+    if info["has_next"]:
+        mask &= keys <= info["next_key"]
+    return mask
+
+def merge_changes(page: pd.DataFrame, changed: pd.DataFrame, key: str, filters: Optional[Dict[str, Any]], info: Dict[str, Any]) -> pd.DataFrame:
+    """page with the changed rows merged in by key, keeping its columns and key order"""
+    if changed.empty:
+        return page
+    kept = page[~page[key].isin(changed[key])]
+    joining = changed[(matches_filters(changed, filters) & in_page_range(changed[key], info)).to_numpy()]
+    if joining.empty:
+        return kept.reset_index(drop=True)
+    merged = pd.concat([kept, joining.reindex(columns=page.columns)], ignore_index=True)
+    return merged.sort_values(key, kind="stable").reset_index(drop=True)
+
+def changes_past_page(changed: pd.DataFrame, key: str, info: Dict[str, Any]) -> bool:
+    """Whether any changed row falls after the page, where a prefetched next page would be stale"""
+    return bool(info["has_next"] and len(changed) and (changed[key] > info["next_key"]).any())
@@ -0,0 +1,165 @@
+"""
+Set-based writes for the review editor.
+
+A maker's submission or a checker's decision changes many rows at once. Instead of one
+UPDATE per row, each is a single statement against the target and so a single Delta
+commit, however many rows it touches: all of it lands or none of it does.
+
+- Rows with their own values (submissions, approvals with the final size and gender)
+  are applied with one MERGE INTO keyed on the record key.
+- Rows that all get the same values (rejections) are changed with one
+  UPDATE ... WHERE key IN (...).
+
+Values that are the same for every row (status, reviewer, timestamp, comments) are
+bound once per statement. Small sets travel inline as parameters. A set that would
+exceed the statement parameter limit is first inserted into a staging table in
+parameter-limited batches and the statement reads from there, so the target still
+changes in one commit. The staging table's columns take the target's own types, so
+keys compare without casts.
+
+Privileges: staging creates and drops a table next to the target, so a reviewer
+whose selection is larger than one statement's parameters needs CREATE TABLE (plus
+USE SCHEMA) on the target's schema, in addition to SELECT and MODIFY on the target.
+Without it such a write fails before the target is touched, with an error saying so;
+smaller writes need no more than MODIFY.
+"""
+from typing import Dict, Any, Optional
+import pandas as pd
+
+from services.staging import staging_table_name
+from services.table_writer import (
+    MAX_PARAMS,
+    constant_params,
+    create_table_from_schema,
+    drop_table,
+    infer_sql_type,
+    insert_data_to_table,
+    marshal_frame,
+    param_keys,
+    values_template,
+)
+
+
+def affected_rows(cursor) -> Optional[int]:
+    """num_affected_rows reported by a DML statement, or None if the warehouse returned none"""
+    try:
+        row = cursor.fetchone()
+    except Exception:
+        row = None
+    if row and row[0] is not None:
+        return int(row[0])
+    rowcount = getattr(cursor, "rowcount", -1)
+    return rowcount if rowcount is not None and rowcount >= 0 else None
+
+def stage_rows(rows: pd.DataFrame, table_name: str, conn, sql_types: Optional[Dict[str, str]] = None) -> str:
+    """Load rows into a new staging table next to table_name and return its name
+
+    Columns are typed from sql_types (the target's column types) and inferred from the
+    frame otherwise.
+    """
+    staging_table = staging_table_name(table_name)
+    schema = {col: (sql_types or {}).get(col) or infer_sql_type(rows[col].dtype) for col in rows.columns}
+    try:
+        create_table_from_schema(schema, staging_table, conn)
+    except Exception as e:
+        raise RuntimeError(
+            f"{len(rows)} rows are too many for one statement and are staged in a table next to {table_name}, "
+            f"which needs CREATE TABLE on its schema: {e}"
+        ) from e
+    try:
+        insert_data_to_table(rows, staging_table, conn)
+    except Exception:
+        drop_table(staging_table, conn)
+        raise
+    return staging_table
+
+def set_constants_sql(constants: Optional[Dict[str, Any]], alias: str = "") -> list:
+    """SET assignments binding each constant column to its :c parameter"""
+    return [f"{alias}`{col}` = :{param}" for col, param in zip(constants or {}, constant_params(constants))]
+
+def merge_sql(table_name: str, key: str, columns, source_sql: str, constants: Optional[Dict[str, Any]] = None) -> str:
+    """MERGE updating the target rows matched on key with the source's columns and the constant columns"""
+    set_sql = ", ".join([f"t.`{col}` = s.`{col}`" for col in columns if col != key] + set_constants_sql(constants, "t."))
+    return (
+        f"MERGE INTO {table_name} AS t "
+        f"USING {source_sql} "
+        f"ON t.`{key}` = s.`{key}` "
+        f"WHEN MATCHED THEN UPDATE SET {set_sql}"
+    )
+
+def merge_rows(table_name: str, key: str, rows: pd.DataFrame, conn, constants: Optional[Dict[str, Any]] = None,
+               sql_types: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """Update the table's rows matching rows[key] with the other columns of rows and the constants, in one MERGE
+
+    sql_types are the target's column types, used for a staging table. Returns the
+    number of rows sent, the rows the warehouse reports as affected (None if it reports
+    nothing) and whether the rows went through a staging table.
+    """
+    # MERGE rejects two source rows for one target row; the last edit of a key wins
+    rows = rows.drop_duplicates(subset=[key], keep="last")
+    result = {"rows": len(rows), "affected": 0, "staged": False}
+    if rows.empty:
+        return result
+
+    columns = [key] + [col for col in rows.columns if col != key]
+    const_params = constant_params(constants)
+    col_list_sql = ", ".join(f"`{col}`" for col in columns)
+
+    if len(rows) * len(columns) + len(const_params) <= MAX_PARAMS:
+        values = marshal_frame(rows, columns)
+        params = dict(zip(param_keys(values.size), values.ravel().tolist()))
+        params.update(const_params)
+        source_sql = f"(VALUES {values_template(len(rows), len(columns))}) AS s({col_list_sql})"
+        with conn.cursor() as cursor:
+            cursor.execute(merge_sql(table_name, key, columns, source_sql, constants), params)
+            result["affected"] = affected_rows(cursor)
+        return result
+
+    # Too many values for one statement: stage them in batches, then MERGE once
+    staging_table = stage_rows(rows[columns], table_name, conn, sql_types)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(merge_sql(table_name, key, columns, f"{staging_table} AS s", constants), const_params)
+            result["affected"] = affected_rows(cursor)
+    finally:
+        drop_table(staging_table, conn)
+    result["staged"] = True
+    return result
+
+def update_where_keys_in(table_name: str, key: str, keys, conn, constants: Dict[str, Any],
+                         sql_types: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """Set the constant columns on every row whose key is in keys, with one UPDATE
+
+    Takes sql_types and returns the same shape as merge_rows.
+    """
+    keys = pd.Series(keys).dropna().drop_duplicates()
+    result = {"rows": len(keys), "affected": 0, "staged": False}
+    if keys.empty:
+        return result
+
+    const_params = constant_params(constants)
+    set_sql = ", ".join(set_constants_sql(constants))
+
+    if len(keys) + len(const_params) <= MAX_PARAMS:
+        names = [f"k{i}" for i in range(len(keys))]
+        params = dict(zip(names, marshal_frame(keys.to_frame(key))[:, 0].tolist()))
+        params.update(const_params)
+        in_sql = ", ".join(f":{name}" for name in names)
+        with conn.cursor() as cursor:
+            cursor.execute(f"UPDATE {table_name} SET {set_sql} WHERE `{key}` IN ({in_sql})", params)
+            result["affected"] = affected_rows(cursor)
+        return result
+
+    # Too many keys for one statement: stage them in batches, then UPDATE once
+    staging_table = stage_rows(keys.to_frame(key), table_name, conn, sql_types)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {table_name} SET {set_sql} WHERE `{key}` IN (SELECT `{key}` FROM {staging_table})",
+                const_params,
+            )
+            result["affected"] = affected_rows(cursor)
+    finally:
+        drop_table(staging_table, conn)
+    result["staged"] = True
+    return result
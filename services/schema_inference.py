@@ -0,0 +1,139 @@
+"""
+Sample-based schema inference for CSV uploads.
+
+The first rows of the file are read as raw strings and each column is classified as
+boolean, integer (nullable), decimal, date, timestamp, low-cardinality categorical or
+free text. The result is an explicit dtype map for pd.read_csv plus the matching Delta
+column types, so integer columns with gaps stay integers, IDs such as merchant_id stay
+strings (leading zeros included) and repeated labels are stored once as categories.
+
+A decimal's scale and integer digits seen in the sample can be exceeded further down
+the file; the scan pass (services/csv_stream.py) measures them over every chunk and
+widens the DECIMAL type, or falls back to DOUBLE, before the table is created.
+"""
+import re
+from typing import Dict, Any, Tuple
+import numpy as np
+import pandas as pd
+
+# Rows read to classify columns
+SAMPLE_ROWS = 10_000
+
+# A text column is categorical when it has at most this many distinct values
+# and they repeat (distinct / non-null at most CATEGORY_MAX_RATIO)
+CATEGORY_MAX_DISTINCT = 64
+CATEGORY_MAX_RATIO = 0.5
+
+# Decimals with up to this many significant digits round-trip through float64 exactly
+DECIMAL_MAX_DIGITS = 15
+DECIMAL_PRECISION = 18
+
+BOOLEAN_VALUES = {"true", "false"}
+INTEGER_PATTERN = re.compile(r"^[+-]?(0|[1-9]\d{0,17})$")
+DECIMAL_PATTERN = re.compile(r"^[+-]?(\d+)\.(\d+)$")
+DATE_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+TIMESTAMP_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}(:\d{2}(\.\d{1,9})?)?$")
+DECIMAL_TYPE_PATTERN = re.compile(r"^DECIMAL\((\d+),(\d+)\)$")
+
+
+def decimal_sql_type(integer_digits: int, scale: int) -> str:
+    """DECIMAL type holding values with these digits, or DOUBLE when float64 cannot carry them exactly"""
+    if integer_digits + scale <= DECIMAL_MAX_DIGITS:
+        return f"DECIMAL({DECIMAL_PRECISION},{scale})"
+    return "DOUBLE"
+
+def decimal_scale(sql_type: str) -> int:
+    """Scale of a DECIMAL(p,s) type"""
+    return int(DECIMAL_TYPE_PATTERN.match(sql_type).group(2))
+
+def measure_decimals(values: pd.Series) -> Tuple[int, int]:
+    """Most integer digits and decimal places among float values parsed from decimal text
+
+    A float64 parsed from text with up to DECIMAL_MAX_DIGITS significant digits prints
+    back as that text (less trailing zeros), so its digits are counted from the shortest
+    repr. Values with more digits, or not finite, come back as more than DECIMAL_MAX_DIGITS.
+    """
+    unique = values.dropna().unique()
+    if len(unique) == 0:
+        return 0, 0
+    if not np.isfinite(unique).all():
+        return DECIMAL_MAX_DIGITS + 1, 0
+    text = pd.Series([np.format_float_positional(value, trim="-") for value in np.abs(unique)])
+    parts = text.str.partition(".")
+    integer_digits = int(parts[0].str.lstrip("0").str.len().max())
+    scale = int(parts[2].str.len().max())
+    return integer_digits, scale
+
+
+def classify_column(values: pd.Series) -> Dict[str, Any]:
+    """Classify one column of raw sample strings into a pandas dtype and SQL type"""
+    non_null = values.dropna()
+    if non_null.empty:
+        return {"kind": "text", "dtype": "object", "sql_type": "STRING"}
+
+    text = non_null.str.strip()
+    if text.str.lower().isin(BOOLEAN_VALUES).all():
+        return {"kind": "boolean", "dtype": "boolean", "sql_type": "BOOLEAN"}
+    if text.str.match(INTEGER_PATTERN).all():
+        return {"kind": "integer", "dtype": "Int64", "sql_type": "BIGINT"}
+
+    # Decimals may be mixed with plain integers such as "50000"
+    decimal_parts = text.str.extract(DECIMAL_PATTERN)
+    if (decimal_parts[0].notna() | text.str.match(INTEGER_PATTERN)).all():
+        whole = decimal_parts[0].fillna(text.str.lstrip("+-"))
+        integer_digits = int(whole.str.lstrip("0").str.len().max())
+        scale = int(decimal_parts[1].str.len().max())
+        return {"kind": "decimal", "dtype": "float64", "sql_type": decimal_sql_type(integer_digits, scale)}
+
+    if text.str.match(DATE_PATTERN).all():
+        return {"kind": "date", "dtype": "datetime64[ns]", "sql_type": "DATE", "date_format": "%Y-%m-%d"}
+    if text.str.match(TIMESTAMP_PATTERN).all():
+        return {"kind": "timestamp", "dtype": "datetime64[ns]", "sql_type": "TIMESTAMP", "date_format": "ISO8601"}
+
+    distinct = non_null.nunique()
+    if distinct <= CATEGORY_MAX_DISTINCT and distinct / len(non_null) <= CATEGORY_MAX_RATIO:
+        return {"kind": "categorical", "dtype": "category", "sql_type": "STRING"}
+    return {"kind": "text", "dtype": "object", "sql_type": "STRING"}
+
+def read_options_for(columns: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """pd.read_csv keyword arguments that apply the inferred types while parsing"""
+    dtype = {}
+    parse_dates = []
+    date_format = {}
+    for col, info in columns.items():
+        if info["kind"] in ("date", "timestamp"):
+            parse_dates.append(col)
+            date_format[col] = info["date_format"]
+        elif info["dtype"] == "object":
+            # Read as str so IDs such as merchant_id keep leading zeros
+            dtype[col] = str
+        else:
+            dtype[col] = info["dtype"]
+    options: Dict[str, Any] = {"dtype": dtype}
+    if parse_dates:
+        options["parse_dates"] = parse_dates
+        options["date_format"] = date_format
+    return options
+
+def infer_csv_schema(uploaded_file, sample_rows: int = SAMPLE_ROWS) -> Dict[str, Any]:
+    """Infer column types from the first rows and measure their memory with and without the dtype map"""
+    uploaded_file.seek(0)
+    raw_sample = pd.read_csv(uploaded_file, nrows=sample_rows, dtype=str)
+    columns = {col: classify_column(raw_sample[col]) for col in raw_sample.columns}
+    read_options = read_options_for(columns)
+
+    uploaded_file.seek(0)
+    default_sample = pd.read_csv(uploaded_file, nrows=sample_rows)
+    uploaded_file.seek(0)
+    typed_sample = pd.read_csv(uploaded_file, nrows=sample_rows, **read_options)
+
+    return {
+        "columns": columns,
+        "sql_types": {col: info["sql_type"] for col, info in columns.items()},
+        "read_options": read_options,
+        "memory": {
+            "sample_rows": len(raw_sample),
+            "default_bytes": int(default_sample.memory_usage(index=False, deep=True).sum()),
+            "typed_bytes": int(typed_sample.memory_usage(index=False, deep=True).sum()),
+        },
+    }
@@ -0,0 +1,57 @@
+"""
+Atomic overwrite for the upload page.
+
+Rows are loaded into a throw-away staging Delta table next to the target and then
+published with a single INSERT OVERWRITE ... SELECT. Readers never see a truncated
+or partially loaded target, a failed load leaves the target untouched, and the
+staging table can take concurrent appends while it is being filled.
+"""
+import time
+import uuid
+from typing import Dict, Any, Callable
+
+from services.table_writer import create_table_from_schema, drop_table
+
+
+def staging_table_name(table_name: str) -> str:
+    """Unique staging table in the same schema as the target"""
+    return f"{table_name}__staging_{uuid.uuid4().hex[:8]}"
+
+def publish_staging_table(staging_table: str, table_name: str, columns, conn):
+    """Replace the target's contents with the staging table in one Delta commit"""
+    col_list_sql = ",".join([f"`{col}`" for col in columns])
+    with conn.cursor() as cursor:
+        cursor.execute(
+            f"INSERT OVERWRITE {table_name} ({col_list_sql}) "
+            f"SELECT {col_list_sql} FROM {staging_table}"
+        )
+
+def append_staging_table(staging_table: str, table_name: str, columns, conn):
+    """Append the staging table's rows to the target in one Delta commit"""
+    col_list_sql = ",".join([f"`{col}`" for col in columns])
+    with conn.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table_name} ({col_list_sql}) "
+            f"SELECT {col_list_sql} FROM {staging_table}"
+        )
+
+def overwrite_via_staging(load_into: Callable[[str], Any], table_name: str, sql_types: Dict[str, str], conn) -> Dict[str, Any]:
+    """Run load_into(staging_table), publish the staging table over the target and drop it"""
+    staging_table = staging_table_name(table_name)
+    create_table_from_schema(sql_types, staging_table, conn)
+    try:
+        start = time.perf_counter()
+        load_result = load_into(staging_table)
+        staged = time.perf_counter()
+
+        publish_staging_table(staging_table, table_name, list(sql_types), conn)
+        published = time.perf_counter()
+    finally:
+        drop_table(staging_table, conn)
+
+    return {
+        "staging_table": staging_table,
+        "load_result": load_result,
+        "stage_seconds": staged - start,
+        "publish_seconds": published - staged,
+    }
@@ -0,0 +1,204 @@
+"""
+Table write helpers for the CSV upload page.
+Kept free of Streamlit so the benchmarks can drive them against the local stand-in warehouse.
+"""
+from functools import lru_cache
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+
+# Databricks SQL has a 256 parameter limit per statement
+MAX_PARAMS = 250  # Use 250 to be safe
+
+
+def infer_sql_type(dtype) -> str:
+    """Infer SQL data type from pandas dtype, including nullable and categorical dtypes"""
+    if pd.api.types.is_bool_dtype(dtype):
+        return 'BOOLEAN'
+    elif pd.api.types.is_integer_dtype(dtype):
+        return 'BIGINT'
+    elif pd.api.types.is_float_dtype(dtype):
+        return 'DOUBLE'
+    elif pd.api.types.is_datetime64_any_dtype(dtype):
+        return 'TIMESTAMP'
+    else:
+        return 'STRING'
+
+def table_exists(table_name: str, conn) -> bool:
+    """Check if table exists"""
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"DESCRIBE TABLE {table_name}")
+            return True
+    except Exception:
+        return False
+
+def is_missing_table_error(error: Exception) -> bool:
+    """Whether an error says the table does not exist, as opposed to the probe itself failing"""
+    message = str(error).upper()
+    return any(marker in message for marker in ["TABLE_OR_VIEW_NOT_FOUND", "TABLE OR VIEW NOT FOUND", "SCHEMA_NOT_FOUND"])
+
+def probe_table_exists(table_name: str, conn) -> bool:
+    """Check if table exists, raising the error when the warehouse could not answer (unlike table_exists)"""
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"DESCRIBE TABLE {table_name}")
+            return True
+    except Exception as e:
+        if is_missing_table_error(e):
+            return False
+        raise
+
+def drop_table(table_name: str, conn):
+    """Drop a table if it exists"""
+    with conn.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {table_name}")
+
+def create_table_from_dataframe(df: pd.DataFrame, table_name: str, conn):
+    """Create Delta table from DataFrame"""
+    sql_types = {col: infer_sql_type(dtype) for col, dtype in df.dtypes.items()}
+    create_table_from_schema(sql_types, table_name, conn)
+
+def create_table_from_schema(sql_types: Dict[str, str], table_name: str, conn):
+    """Create Delta table from a column -> SQL type mapping"""
+    columns_def = []
+    for col, sql_type in sql_types.items():
+        # Escape column names with backticks
+        columns_def.append(f"`{col}` {sql_type}")
+    
+    create_sql = f"""
+    CREATE TABLE IF NOT EXISTS {table_name} (
+        {', '.join(columns_def)}
+    ) USING DELTA
+    """
+    
+    with conn.cursor() as cursor:
+        cursor.execute(create_sql)
+
+def col_list_sql_for(columns) -> str:
+    """Backtick-quoted column list for INSERT statements"""
+    return ",".join([f"`{col}`" for col in columns])
+
+def batch_size_for(num_cols: int, reserved_params: int = 0) -> int:
+    """Rows per INSERT that stay under the warehouse parameter limit"""
+    return max(1, (MAX_PARAMS - reserved_params) // num_cols)
+
+def constant_params(constants: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Bind each constant column once per statement as c0..cN"""
+    return {f"c{i}": value for i, value in enumerate((constants or {}).values())}
+
+def build_insert_sql(kind: str, table_name: str, columns, values_sql: str, constants: Optional[Dict[str, Any]] = None) -> str:
+    """INSERT INTO/OVERWRITE for a VALUES batch, with constant columns selected once instead of per row"""
+    col_list_sql = col_list_sql_for(list(columns) + list(constants or {}))
+    if not constants:
+        return f"INSERT {kind} {table_name} ({col_list_sql}) VALUES {values_sql}"
+    constants_sql = "".join(f", :{key}" for key in constant_params(constants))
+    return f"INSERT {kind} {table_name} ({col_list_sql}) SELECT *{constants_sql} FROM (VALUES {values_sql})"
+
+@lru_cache(maxsize=64)
+def values_template(num_rows: int, num_cols: int) -> str:
+    """VALUES placeholder list for a batch shape; identical SQL text for every full batch"""
+    return ",".join(
+        "(" + ",".join(f":p{row * num_cols + col}" for col in range(num_cols)) + ")"
+        for row in range(num_rows)
+    )
+
+@lru_cache(maxsize=64)
+def param_keys(count: int) -> Tuple[str, ...]:
+    """Parameter names p0..p{count-1} matching values_template"""
+    return tuple(f"p{i}" for i in range(count))
+
+def marshal_frame(df: pd.DataFrame, columns=None) -> np.ndarray:
+    """Row-major object array of native Python values with None for missing, built column by column"""
+    columns = list(df.columns) if columns is None else list(columns)
+    values = np.empty((len(df), len(columns)), dtype=object)
+    for j, col in enumerate(columns):
+        series = df[col]
+        # object conversion turns numpy scalars into int/float/bool/str
+        column = series.to_numpy(dtype=object)
+        missing = series.isna().to_numpy()
+        if missing.any():
+            column[missing] = None
+        values[:, j] = column
+    return values
+
+def frame_constant_columns(df: pd.DataFrame) -> List[str]:
+    """Columns holding one value (or only nulls) in every row of the frame"""
+    if len(df) < 2:
+        return []
+    return [col for col in df.columns if df[col].nunique(dropna=False) == 1]
+
+def split_constant_columns(df: pd.DataFrame, constants: Optional[Dict[str, Any]] = None, constant_columns: Sequence[str] = ()) -> Tuple[list, Dict[str, Any]]:
+    """Split columns into those that vary and constant_columns, bound with their first row's value
+
+    constant_columns are decided once for a whole load, so every chunk of it produces the
+    same column list and statement text.
+    """
+    constants = dict(constants or {})
+    data_cols = [col for col in df.columns if col not in constant_columns]
+    if not data_cols:
+        # Keep at least one column in VALUES so the statement still carries the row count
+        data_cols = [df.columns[0]]
+    for col in df.columns:
+        if col not in data_cols:
+            constants[col] = marshal_frame(df.iloc[:1], [col])[0, 0]
+    return data_cols, constants
+
+def iter_insert_batches(df: pd.DataFrame, reserved_params: int = 0, columns=None) -> Iterator[Tuple[str, Dict[str, Any], int]]:
+    """Yield (VALUES sql, params, row count) for each parameter-limited batch of the DataFrame"""
+    values = marshal_frame(df, columns)
+    num_cols = values.shape[1]
+    batch_size = batch_size_for(num_cols, reserved_params)
+    
+    # Process rows in batches
+    for i in range(0, len(values), batch_size):
+        batch = values[i:i + batch_size]
+        num_rows = len(batch)
+        params = dict(zip(param_keys(num_rows * num_cols), batch.ravel().tolist()))
+        yield values_template(num_rows, num_cols), params, num_rows
+
+def insert_data_to_table(df: pd.DataFrame, table_name: str, conn, mode: str = "append", constants: Optional[Dict[str, Any]] = None,
+                         constant_columns: Optional[Sequence[str]] = None):
+    """Insert DataFrame data into Delta table with batching to avoid parameter limit
+
+    constant_columns are the data columns known to hold one value across the whole load;
+    None means df is the whole load and they are found in it.
+    """
+    if df.empty:
+        return
+    
+    # Constant columns (upload metadata, or data columns with a single value across the
+    # load) cost one parameter per statement, not one per row
+    if constant_columns is None:
+        constant_columns = frame_constant_columns(df)
+    data_cols, constants = split_constant_columns(df, constants, constant_columns)
+    const_params = constant_params(constants)
+    
+    # For overwrite mode, we need to handle the first batch specially
+    is_first_batch = True
+    
+    for values_sql, params, _ in iter_insert_batches(df, len(const_params), data_cols):
+        params.update(const_params)
+        with conn.cursor() as cursor:
+            if mode == "overwrite" and is_first_batch:
+                # First batch in overwrite mode uses INSERT OVERWRITE
+                cursor.execute(build_insert_sql("OVERWRITE", table_name, data_cols, values_sql, constants), params)
+                is_first_batch = False
+            else:
+                # Subsequent batches or append mode use INSERT INTO
+                cursor.execute(build_insert_sql("INTO", table_name, data_cols, values_sql, constants), params)
+
+def insert_chunks_to_table(chunks: Iterable[pd.DataFrame], table_name: str, conn, mode: str = "append", constants: Optional[Dict[str, Any]] = None,
+                           constant_columns: Sequence[str] = ()) -> int:
+    """Insert a stream of DataFrame chunks; only the first chunk may overwrite
+
+    constant_columns hold one value in every chunk (e.g. scan_constant_columns of the file).
+    """
+    total_rows = 0
+    for chunk in chunks:
+        if len(chunk) == 0:
+            continue
+        insert_data_to_table(chunk, table_name, conn, mode=mode if total_rows == 0 else "append", constants=constants,
+                             constant_columns=constant_columns)
+        total_rows += len(chunk)
+    return total_rows
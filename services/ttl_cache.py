@@ -0,0 +1,68 @@
+"""
+Small thread-safe TTL cache with hit/miss counters.
+
+Used by the upload page to remember volume permission checks and table existence
+probes per user and securable; answers that do not change between uploads made
+minutes apart are not re-fetched from the workspace on every upload.
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable
+
+
+class TTLCache:
+    def __init__(self, ttl_seconds: float, max_entries: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.entries: Dict[Hashable, tuple] = {}
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key: Hashable, default=None):
+        """Return the cached value, or default if it is missing or expired"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                self.hits += 1
+                return entry[0]
+            self.entries.pop(key, None)
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any):
+        with self.lock:
+            if len(self.entries) >= self.max_entries and key not in self.entries:
+                # Evict the entry closest to expiry
+                oldest = min(self.entries, key=lambda k: self.entries[k][1])
+                del self.entries[oldest]
+            self.entries[key] = (value, time.monotonic() + self.ttl_seconds)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any], should_cache: Callable[[Any], bool] = None) -> Any:
+        """Return the cached value or compute it; should_cache can keep failures out of the cache"""
+        missing = object()
+        value = self.get(key, missing)
+        if value is not missing:
+            return value
+        value = compute()
+        if should_cache is None or should_cache(value):
+            self.set(key, value)
+        return value
+
+    def invalidate(self, predicate: Callable[[Hashable], bool] = None) -> int:
+        """Drop all entries, or those whose key matches predicate; returns how many were dropped"""
+        with self.lock:
+            keys = [key for key in self.entries if predicate is None or predicate(key)]
+            for key in keys:
+                del self.entries[key]
+            return len(keys)
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,297 @@
+"""
+Batch-level checkpoints so an interrupted upload can resume where it stopped.
+
+A resumable upload stages the file into a staging table named after the file's
+content hash and the upload's options, one chunk at a time. Every staged row carries
+its batch number (the chunk's index in the file), and a checkpoint row is appended to
+the checkpoint table after each batch commits: file hash, options, batches and rows
+committed, target table version. Resuming the same file with the same options deletes
+anything staged at or after the checkpoint first, so a batch that was written but not
+yet checkpointed is replayed, never duplicated. The target is only touched by the
+final publish statement.
+
+The options (mode, upsert key, schema, metadata columns, rows skipped by validation)
+are part of the key: the same file uploaded with other options stages separately
+instead of resuming batches that were staged for something else.
+
+Each checkpoint row carries its owner (the upload job) and a lease that every
+checkpoint renews. While an owner holds an unexpired lease, another upload of the
+same file and options is refused rather than staging into the same table; when two
+start at once, the first to have claimed wins and the other backs off before touching
+the staging table. A failed upload releases its lease so it can be resumed. A failed
+publish is final (the publish is one statement, so the target is unchanged) and drops
+the staging table; so does an upload left unfinished for longer than RESUME_WINDOW.
+"""
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Callable, Iterable, List, Optional
+import pandas as pd
+
+from services.table_writer import create_table_from_schema, drop_table
+from services.upload_ledger import table_version
+
+CHECKPOINT_COLUMNS = {
+    'file_hash': 'STRING',
+    'target_table': 'STRING',
+    'options_hash': 'STRING',
+    'staging_table': 'STRING',
+    'chunk_rows': 'BIGINT',
+    'constants': 'STRING',
+    'batches_committed': 'BIGINT',
+    'rows_committed': 'BIGINT',
+    'table_version': 'BIGINT',
+    'status': 'STRING',
+    'owner': 'STRING',
+    'lease_expires': 'STRING',
+    'updated_at': 'STRING',
+}
+
+# Staging-only column holding each row's batch number
+BATCH_COLUMN = "_upload_batch"
+
+STAGING = "staging"
+PUBLISHING = "publishing"
+COMPLETE = "complete"
+FAILED = "failed"
+
+# How long a checkpoint keeps other uploads of the same file and options away
+LEASE_SECONDS = 30 * 60
+
+# Unfinished uploads not resumed within this long are dropped with their staging table
+RESUME_WINDOW = timedelta(days=1)
+
+
+def utc_stamp(moment: datetime) -> str:
+    """Fixed-width UTC timestamp, so stamps compare correctly as strings"""
+    return moment.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%f+00:00')
+
+def options_key(options: Dict[str, Any]) -> str:
+    """Short hash of the upload options a checkpoint is only valid for"""
+    return hashlib.sha256(json.dumps(options, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+
+def resume_staging_table(target_table: str, file_hash: str, options_hash: str) -> str:
+    """Staging table for a file and options, stable across attempts so a resumed upload finds its batches"""
+    return f"{target_table}__resume_{file_hash[:12]}_{options_hash[:8]}"
+
+def ensure_checkpoint_table(checkpoint_table: str, conn):
+    """Create the checkpoint table, adding columns that an older version of it lacks"""
+    create_table_from_schema(CHECKPOINT_COLUMNS, checkpoint_table, conn)
+    with conn.cursor() as cursor:
+        cursor.execute(f"DESCRIBE {checkpoint_table}")
+        existing = {row[0] for row in cursor.fetchall()}
+    missing = [f"`{col}` {sql_type}" for col, sql_type in CHECKPOINT_COLUMNS.items() if col not in existing]
+    if missing:
+        with conn.cursor() as cursor:
+            cursor.execute(f"ALTER TABLE {checkpoint_table} ADD COLUMNS ({', '.join(missing)})")
+
+def checkpoint_rows(checkpoint_table: str, conn, target_table: str, file_hash: Optional[str] = None,
+                    options_hash: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Checkpoint rows of uploads into the table (of one file and options when given), oldest first"""
+    columns = list(CHECKPOINT_COLUMNS)
+    conditions = ["target_table = :target_table"]
+    params = {"target_table": target_table}
+    if file_hash is not None:
+        conditions.append("file_hash = :file_hash AND options_hash = :options_hash")
+        params.update(file_hash=file_hash, options_hash=options_hash)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                f"SELECT {', '.join(columns)} FROM {checkpoint_table} "
+                f"WHERE {' AND '.join(conditions)} ORDER BY updated_at",
+                params,
+            )
+            rows = cursor.fetchall()
+    except Exception:
+        # No checkpoint table yet: nothing to resume
+        return []
+    return [dict(zip(columns, row)) for row in rows]
+
+def unfinished(checkpoint: Optional[Dict[str, Any]]) -> bool:
+    return checkpoint is not None and checkpoint['status'] not in (COMPLETE, FAILED)
+
+def holds_lease(checkpoint: Dict[str, Any], now: str) -> bool:
+    return unfinished(checkpoint) and bool(checkpoint['lease_expires']) and checkpoint['lease_expires'] > now
+
+def active_owners(rows: List[Dict[str, Any]], now: str) -> List[str]:
+    """Owners whose latest checkpoint holds an unexpired lease, in the order they first claimed"""
+    first_claim: Dict[str, str] = {}
+    latest: Dict[str, Dict[str, Any]] = {}
+    for row in rows:
+        first_claim.setdefault(row['owner'], row['updated_at'])
+        latest[row['owner']] = row
+    active = [owner for owner, row in latest.items() if holds_lease(row, now)]
+    return sorted(active, key=lambda owner: (first_claim[owner], owner))
+
+def latest_checkpoint(checkpoint_table: str, file_hash: str, target_table: str, options_hash: str, conn) -> Optional[Dict[str, Any]]:
+    """Most recent checkpoint of an unfinished upload of this file into the table with these options"""
+    rows = checkpoint_rows(checkpoint_table, conn, target_table, file_hash, options_hash)
+    return rows[-1] if rows and unfinished(rows[-1]) else None
+
+def save_checkpoint(checkpoint_table: str, checkpoint: Dict[str, Any], conn, lease: bool = True) -> Dict[str, Any]:
+    """Append a checkpoint row, renewing its owner's lease (or releasing it); the newest row is the current state"""
+    now = datetime.now(timezone.utc)
+    checkpoint = {
+        **checkpoint,
+        'updated_at': utc_stamp(now),
+        'lease_expires': utc_stamp(now + timedelta(seconds=LEASE_SECONDS)) if lease else None,
+    }
+    columns = list(CHECKPOINT_COLUMNS)
+    with conn.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {checkpoint_table} ({', '.join(columns)}) "
+            f"VALUES ({', '.join(':' + col for col in columns)})",
+            {col: checkpoint.get(col) for col in columns},
+        )
+    return checkpoint
+
+def expire_stale_checkpoints(checkpoint_table: str, target_table: str, conn):
+    """Give up on uploads into the table left unfinished beyond RESUME_WINDOW and drop their staging tables"""
+    now = datetime.now(timezone.utc)
+    cutoff = utc_stamp(now - RESUME_WINDOW)
+    latest: Dict[tuple, Dict[str, Any]] = {}
+    for row in checkpoint_rows(checkpoint_table, conn, target_table):
+        latest[(row['file_hash'], row['options_hash'])] = row
+    for row in latest.values():
+        if unfinished(row) and not holds_lease(row, utc_stamp(now)) and row['updated_at'] < cutoff:
+            drop_table(row['staging_table'], conn)
+            save_checkpoint(checkpoint_table, {**row, 'status': FAILED}, conn, lease=False)
+
+def stage_batches(
+    chunks: Iterable[pd.DataFrame],
+    staging_table: str,
+    write_batch: Callable[[pd.DataFrame, str, Dict[str, Any]], Any],
+    checkpoint: Dict[str, Any],
+    save: Callable[[Dict[str, Any]], Dict[str, Any]],
+    conn,
+) -> Dict[str, Any]:
+    """Write each chunk from the checkpoint on with write_batch(chunk, staging_table, constants) and checkpoint it"""
+    start = checkpoint['batches_committed']
+    constants = json.loads(checkpoint['constants'])
+    # Rows of a batch written after the last checkpoint are replayed, so clear them first
+    with conn.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {staging_table} WHERE `{BATCH_COLUMN}` >= :start", {"start": start})
+
+    for batch, chunk in enumerate(chunks):
+        if batch < start:
+            continue
+        if len(chunk):
+            write_batch(chunk, staging_table, {**constants, BATCH_COLUMN: batch})
+        checkpoint = save({
+            **checkpoint,
+            'batches_committed': batch + 1,
+            'rows_committed': checkpoint['rows_committed'] + len(chunk),
+        })
+    return checkpoint
+
+def release_quietly(cleanup: Callable[[], Any]):
+    """Run cleanup after a failure without hiding the upload's own error; an expired lease frees the upload anyway"""
+    try:
+        cleanup()
+    except Exception:
+        pass
+
+def resumable_upload(
+    chunks_from: Callable[[], Iterable[pd.DataFrame]],
+    write_batch: Callable[[pd.DataFrame, str, Dict[str, Any]], Any],
+    publish: Callable[[str], Any],
+    target_table: str,
+    sql_types: Dict[str, str],
+    file_hash: str,
+    chunk_rows: int,
+    constants: Dict[str, Any],
+    checkpoint_table: str,
+    conn,
+    owner: str,
+    options: Dict[str, Any],
+    republish_on_resume: bool = True,
+) -> Dict[str, Any]:
+    """Stage the file batch by batch with checkpoints, then publish(staging_table) into the target
+
+    An earlier unfinished upload of the same file with the same options and chunk size
+    is resumed from its last checkpoint, unless its owner still holds the lease, in
+    which case ValueError is raised. If it was interrupted while publishing, the
+    publish is run again when republish_on_resume (idempotent publishes such as an
+    overwrite or MERGE); otherwise a changed target version means the publish already
+    landed. Constant columns (upload metadata) are kept in the checkpoint, so resumed
+    batches get the same values as the batches staged before the interruption.
+    """
+    ensure_checkpoint_table(checkpoint_table, conn)
+    expire_stale_checkpoints(checkpoint_table, target_table, conn)
+    save = lambda checkpoint, lease=True: save_checkpoint(checkpoint_table, checkpoint, conn, lease)
+    options_hash = options_key(options)
+    rows_for = lambda: checkpoint_rows(checkpoint_table, conn, target_table, file_hash, options_hash)
+    in_progress = ValueError(
+        f"This file is already being uploaded into `{target_table}` with the same options. "
+        f"Wait for that upload to finish (or for its lease to lapse after {LEASE_SECONDS // 60} minutes)."
+    )
+
+    rows = rows_for()
+    if active_owners(rows, utc_stamp(datetime.now(timezone.utc))):
+        raise in_progress
+    previous = rows[-1] if rows and unfinished(rows[-1]) else None
+    if previous and previous['chunk_rows'] != chunk_rows:
+        # Batch numbers depend on the chunk size; start over
+        previous = None
+
+    if previous:
+        checkpoint = {**previous, 'owner': owner}
+    else:
+        checkpoint = {
+            'file_hash': file_hash,
+            'target_table': target_table,
+            'options_hash': options_hash,
+            'staging_table': resume_staging_table(target_table, file_hash, options_hash),
+            'chunk_rows': chunk_rows,
+            'constants': json.dumps(constants),
+            'batches_committed': 0,
+            'rows_committed': 0,
+            'table_version': table_version(target_table, conn),
+            'status': STAGING,
+            'owner': owner,
+        }
+    # Claim the upload, then check that no one claimed it first before touching staging
+    checkpoint = save(checkpoint)
+    if active_owners(rows_for(), utc_stamp(datetime.now(timezone.utc)))[:1] != [owner]:
+        save(checkpoint, lease=False)
+        raise in_progress
+
+    staging_table = checkpoint['staging_table']
+    if not previous:
+        drop_table(staging_table, conn)
+    create_table_from_schema({**sql_types, BATCH_COLUMN: 'BIGINT'}, staging_table, conn)
+    resumed_from = checkpoint['rows_committed'] if previous else None
+
+    publish_result = None
+    try:
+        published = (
+            previous is not None and previous['status'] == PUBLISHING and not republish_on_resume
+            and table_version(target_table, conn) != previous['table_version']
+        )
+        if not published:
+            if checkpoint['status'] == STAGING:
+                checkpoint = stage_batches(chunks_from(), staging_table, write_batch, checkpoint, save, conn)
+                checkpoint = save({**checkpoint, 'status': PUBLISHING, 'table_version': table_version(target_table, conn)})
+            publish_result = publish(staging_table)
+    except Exception:
+        if checkpoint['status'] != PUBLISHING:
+            # Staged batches are kept for a resume; release from the last batch checkpointed
+            release_quietly(lambda: save(rows_for()[-1], lease=False))
+            raise
+        # The publish is one statement: it either landed whole or left the target as it was.
+        # A publish that must not run twice and moved the target's version has landed.
+        if republish_on_resume or table_version(target_table, conn) == checkpoint['table_version']:
+            release_quietly(lambda: save({**checkpoint, 'status': FAILED}, lease=False))
+            release_quietly(lambda: drop_table(staging_table, conn))
+            raise
+
+    save({**checkpoint, 'status': COMPLETE, 'table_version': table_version(target_table, conn)}, lease=False)
+    drop_table(staging_table, conn)
+    return {
+        "staging_table": staging_table,
+        "resumed_from_rows": resumed_from,
+        "rows": checkpoint['rows_committed'],
+        "batches": checkpoint['batches_committed'],
+        "constants": json.loads(checkpoint['constants']),
+        "publish_result": publish_result,
+    }
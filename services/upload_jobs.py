@@ -0,0 +1,194 @@
+"""
+Background upload jobs shared by every session of the app.
+
+An upload is submitted to a process-wide pool with a fixed number of workers instead
+of running on the session's script thread, so it keeps going when the page reruns,
+the user navigates away or the websocket reconnects. Each job keeps a status record
+(stage, batches and rows done, rows/s, ETA, messages) that the page polls to draw
+progress; a user can run several uploads side by side and watch each one finish.
+
+A job reads its file through a JobFile of its own rather than the session's
+UploadedFile, whose position the page moves while drawing previews on every rerun.
+"""
+import io
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, Iterator, List, Optional
+import pandas as pd
+
+# Uploads running at once across all sessions; later submissions wait in the queue
+MAX_UPLOAD_JOBS = 4
+
+# Finished jobs kept per user for the status list
+KEEP_FINISHED_JOBS = 10
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+class JobFile(io.BytesIO):
+    """An uploaded file's bytes behind a handle with its own position, for one job"""
+
+    def __init__(self, uploaded_file):
+        # BytesIO shares a bytes object it is given until written to, so this is no copy
+        self.data = uploaded_file.getvalue()
+        super().__init__(self.data)
+        self.name = uploaded_file.name
+        self.size = len(self.data)
+
+    def getbuffer(self):
+        # BytesIO.getbuffer would first copy the shared bytes; readers only read them
+        return memoryview(self.data)
+
+
+class UploadJob:
+    """Status record of one upload, written by its worker and read by the page"""
+
+    def __init__(self, owner: str, title: str, total_rows: int, work: Callable[["UploadJob"], Dict[str, Any]], resumable: bool = False):
+        self.job_id = uuid.uuid4().hex[:12]
+        self.owner = owner
+        self.title = title
+        self.total_rows = total_rows
+        self.work = work
+        self.resumable = resumable
+        self.resumed_as: Optional[str] = None
+        self.lock = threading.Lock()
+        self.status = QUEUED
+        self.stage = "Waiting for a free upload worker"
+        self.batches_done = 0
+        self.rows_done = 0
+        self.submitted_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.load_started: Optional[float] = None
+        self.messages: List[tuple] = []
+        self.result: Dict[str, Any] = {}
+        self.error: Optional[str] = None
+
+    def set_stage(self, stage: str):
+        with self.lock:
+            self.stage = stage
+
+    def log(self, level: str, text: str):
+        """Keep a message for the page to show; level is an st.* call such as "info" or "warning" """
+        with self.lock:
+            self.messages.append((level, text))
+
+    def add_batch(self, rows: int):
+        with self.lock:
+            if self.load_started is None:
+                self.load_started = time.perf_counter()
+            self.batches_done += 1
+            self.rows_done += rows
+
+    def track_chunks(self, make_chunks: Callable[[], Iterator[pd.DataFrame]]) -> Callable[[], Iterator[pd.DataFrame]]:
+        """Chunk factory counting each chunk once the writer asks for the next one (or finishes)"""
+        def tracked_chunks():
+            # A fallback re-reads the file from the start, so progress starts over too
+            with self.lock:
+                self.batches_done = 0
+                self.rows_done = 0
+                self.load_started = None
+            pending = 0
+            for chunk in make_chunks():
+                if pending:
+                    self.add_batch(pending)
+                pending = len(chunk)
+                yield chunk
+            if pending:
+                self.add_batch(pending)
+        return tracked_chunks
+
+    def finish(self, status: str, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None):
+        with self.lock:
+            self.status = status
+            self.stage = "Finished" if status == SUCCEEDED else "Failed"
+            self.result = result or {}
+            self.error = error
+            self.finished_at = time.time()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Consistent copy of the record with throughput and ETA worked out"""
+        with self.lock:
+            elapsed = time.perf_counter() - self.load_started if self.load_started else 0.0
+            rows_per_second = self.rows_done / elapsed if elapsed > 0 else 0.0
+            remaining = max(0, self.total_rows - self.rows_done)
+            eta = remaining / rows_per_second if rows_per_second and self.status == RUNNING else None
+            return {
+                "job_id": self.job_id,
+                "title": self.title,
+                "status": self.status,
+                "resumable": self.resumable and self.resumed_as is None,
+                "stage": self.stage,
+                "total_rows": self.total_rows,
+                "rows_done": self.rows_done,
+                "batches_done": self.batches_done,
+                "rows_per_second": rows_per_second,
+                "eta_seconds": eta,
+                "submitted_at": self.submitted_at,
+                "finished_at": self.finished_at,
+                "messages": list(self.messages),
+                "result": dict(self.result),
+                "error": self.error,
+            }
+
+
+class UploadJobRunner:
+    """Bounded worker pool running upload jobs, with their status records by owner"""
+
+    def __init__(self, max_workers: int = MAX_UPLOAD_JOBS):
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="upload-job")
+        self.jobs: Dict[str, UploadJob] = {}
+        self.lock = threading.Lock()
+
+    def submit(self, owner: str, title: str, total_rows: int, work: Callable[[UploadJob], Dict[str, Any]], resumable: bool = False) -> UploadJob:
+        """Queue work(job); its return value becomes the job's result"""
+        job = UploadJob(owner, title, total_rows, work, resumable)
+        with self.lock:
+            self.jobs[job.job_id] = job
+            self.prune(owner)
+        self.pool.submit(self.run, job)
+        return job
+
+    def resume(self, job_id: str) -> Optional[UploadJob]:
+        """Run a failed resumable job's work again as a new job; it picks up from its last checkpoint"""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None or job.status != FAILED or not job.resumable or job.resumed_as is not None:
+                return None
+            # Resume once: two jobs must not stage into the same checkpointed table
+            job.resumed_as = "pending"
+        resumed = self.submit(job.owner, job.title, job.total_rows, job.work, job.resumable)
+        job.resumed_as = resumed.job_id
+        return resumed
+
+    def run(self, job: UploadJob):
+        with job.lock:
+            job.status = RUNNING
+            job.stage = "Starting"
+        try:
+            job.finish(SUCCEEDED, result=job.work(job))
+        except Exception as e:
+            job.finish(FAILED, error=str(e))
+
+    def prune(self, owner: str):
+        """Forget an owner's oldest finished jobs beyond KEEP_FINISHED_JOBS (caller holds the lock)"""
+        finished = sorted(
+            (job for job in self.jobs.values() if job.owner == owner and job.finished_at is not None),
+            key=lambda job: job.finished_at,
+        )
+        for job in finished[:max(0, len(finished) - KEEP_FINISHED_JOBS)]:
+            del self.jobs[job.job_id]
+
+    def jobs_for(self, owner: str) -> List[Dict[str, Any]]:
+        """Snapshots of an owner's jobs, newest first"""
+        with self.lock:
+            jobs = [job for job in self.jobs.values() if job.owner == owner]
+        return sorted((job.snapshot() for job in jobs), key=lambda job: job["submitted_at"], reverse=True)
+
+    def has_active_jobs(self, owner: str) -> bool:
+        with self.lock:
+            return any(job.owner == owner and job.finished_at is None for job in self.jobs.values())
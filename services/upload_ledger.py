@@ -0,0 +1,78 @@
+"""
+Ledger of CSV files already ingested, keyed by content hash.
+
+Each successful upload records the file's SHA-256, the target table, the table's
+Delta version right after the load and where the backup landed. When the same
+bytes are uploaded to the same table again and the table has not been written to
+since (its version is unchanged), the upload is a no-op: no backup copy, no load.
+"""
+import hashlib
+from typing import Dict, Any, Optional
+
+from services.table_writer import create_table_from_schema
+from services.volume_backup import STREAM_CHUNK_SIZE, open_source_stream
+
+LEDGER_COLUMNS = {
+    'file_hash': 'STRING',
+    'target_table': 'STRING',
+    'table_version': 'BIGINT',
+    'backup_path': 'STRING',
+    'row_count': 'BIGINT',
+    'uploaded_by': 'STRING',
+    'uploaded_at': 'STRING',
+}
+
+
+def content_hash(uploaded_file) -> str:
+    """SHA-256 of the uploaded file, streamed from its buffer without copying it"""
+    digest = hashlib.sha256()
+    source = open_source_stream(uploaded_file)
+    try:
+        while True:
+            data = source.read(STREAM_CHUNK_SIZE)
+            if not data:
+                break
+            digest.update(data)
+    finally:
+        if source is not uploaded_file:
+            source.close()
+    return digest.hexdigest()
+
+def table_version(table_name: str, conn) -> Optional[int]:
+    """Current Delta version of the table, or None if it cannot be read"""
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"DESCRIBE HISTORY {table_name} LIMIT 1")
+            row = cursor.fetchone()
+        return int(row[0]) if row else None
+    except Exception:
+        return None
+
+def find_previous_upload(ledger_table: str, file_hash: str, target_table: str, conn) -> Optional[Dict[str, Any]]:
+    """Latest ledger entry for this file and table, if the table is still as that upload left it"""
+    columns = list(LEDGER_COLUMNS)
+    with conn.cursor() as cursor:
+        cursor.execute(
+            f"SELECT {', '.join(columns)} FROM {ledger_table} "
+            f"WHERE file_hash = :file_hash AND target_table = :target_table "
+            f"ORDER BY uploaded_at DESC LIMIT 1",
+            {"file_hash": file_hash, "target_table": target_table},
+        )
+        row = cursor.fetchone()
+    if row is None:
+        return None
+    entry = dict(zip(columns, row))
+    if entry['table_version'] is None or table_version(target_table, conn) != entry['table_version']:
+        return None
+    return entry
+
+def record_upload(ledger_table: str, entry: Dict[str, Any], conn):
+    """Append an upload to the ledger, creating the ledger table on first use"""
+    create_table_from_schema(LEDGER_COLUMNS, ledger_table, conn)
+    columns = list(LEDGER_COLUMNS)
+    with conn.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {ledger_table} ({', '.join(columns)}) "
+            f"VALUES ({', '.join(':' + col for col in columns)})",
+            {col: entry.get(col) for col in columns},
+        )
@@ -0,0 +1,139 @@
+"""
+Pre-insert validation of upload files against a declarative rule set.
+
+Rules come from config/validation_rules.py. Each chunk is checked with whole-column
+operations (notna, isin); only the columns of "unique" rules are kept across chunks,
+so duplicates are found over the whole file with one duplicated() at the end. The
+result names every rejected row by its position in the file, which is enough to build
+a rejects file or to drop those rows while the load streams the chunks again.
+"""
+from typing import Dict, Any, Callable, Iterator, List
+import hashlib
+import io
+import numpy as np
+import pandas as pd
+
+# Column names added to the rejects file
+ROW_NUMBER_COLUMN = "_row_number"
+REASON_COLUMN = "_rejection_reason"
+
+
+def rule_label(rule: Dict[str, Any]) -> str:
+    """Human-readable description of a rule, used as the rejection reason"""
+    if rule["check"] == "required":
+        return f"{rule['column']} is required"
+    if rule["check"] == "unique":
+        return f"duplicate {rule['column']}"
+    if rule["check"] == "allowed_values":
+        return f"{rule['column']} not in {', '.join(map(str, rule['values']))}"
+    raise ValueError(f"Unknown validation check: {rule['check']}")
+
+def rule_failures(chunk: pd.DataFrame, rule: Dict[str, Any]) -> np.ndarray:
+    """Boolean mask of the chunk rows failing a row-level rule"""
+    column = chunk[rule["column"]]
+    if rule["check"] == "required":
+        return column.isna().to_numpy()
+    if rule["check"] == "allowed_values":
+        return (column.notna() & ~column.isin(rule["values"])).to_numpy(dtype=bool)
+    raise ValueError(f"Unknown validation check: {rule['check']}")
+
+def validate_chunks(chunks: Iterator[pd.DataFrame], rules: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Check every row of the chunk stream; returns rejected row positions, reasons and counts per rule"""
+    labels = [rule_label(rule) for rule in rules]
+    failures = {label: [] for label in labels}
+    unique_values = {rule["column"]: [] for rule in rules if rule["check"] == "unique"}
+    missing_columns: List[str] = []
+    rows = 0
+
+    for chunk in chunks:
+        if rows == 0:
+            missing_columns = sorted({rule["column"] for rule in rules} - set(chunk.columns))
+            if missing_columns:
+                break
+        positions = np.arange(rows, rows + len(chunk))
+        for rule, label in zip(rules, labels):
+            if rule["check"] != "unique":
+                failures[label].append(positions[rule_failures(chunk, rule)])
+        for col, values in unique_values.items():
+            values.append(chunk[col].reset_index(drop=True))
+        rows += len(chunk)
+
+    for rule, label in zip(rules, labels):
+        if rule["check"] == "unique" and not missing_columns:
+            values = pd.concat(unique_values[rule["column"]], ignore_index=True) if rows else pd.Series(dtype=object)
+            duplicated = (values.notna() & values.duplicated(keep=False)).to_numpy(dtype=bool)
+            failures[label] = [np.flatnonzero(duplicated)]
+
+    failed = {label: np.concatenate(found) if found else np.empty(0, dtype=np.int64) for label, found in failures.items()}
+    rejected = np.unique(np.concatenate(list(failed.values()))) if failed else np.empty(0, dtype=np.int64)
+
+    # One reason string per rejected row, listing every rule it broke
+    reasons = pd.Series("", index=rejected, dtype=object)
+    for label, found in failed.items():
+        if len(found):
+            hit = np.unique(found)
+            reasons.loc[hit] = reasons.loc[hit] + np.where(reasons.loc[hit] == "", "", "; ") + label
+
+    return {
+        "rows": rows,
+        "missing_columns": missing_columns,
+        "rule_counts": {label: int(len(np.unique(found))) for label, found in failed.items()},
+        "rejected_positions": rejected,
+        "rejected_reasons": reasons.to_numpy(dtype=object),
+        "rejected_rows": int(len(rejected)),
+    }
+
+def add_rejections(validation: Dict[str, Any], positions: np.ndarray, label: str) -> Dict[str, Any]:
+    """Validation result with more rejected row positions, counted under their own rule label"""
+    hit = np.unique(positions)
+    rejected = np.union1d(validation["rejected_positions"], hit)
+    reasons = pd.Series("", index=rejected, dtype=object)
+    reasons.loc[validation["rejected_positions"]] = validation["rejected_reasons"]
+    reasons.loc[hit] = reasons.loc[hit] + np.where(reasons.loc[hit] == "", "", "; ") + label
+    return {
+        **validation,
+        "rule_counts": {**validation["rule_counts"], label: int(len(hit))},
+        "rejected_positions": rejected,
+        "rejected_reasons": reasons.to_numpy(dtype=object),
+        "rejected_rows": int(len(rejected)),
+    }
+
+def iter_chunk_rejections(chunks: Iterator[pd.DataFrame], rejected_positions: np.ndarray) -> Iterator[tuple]:
+    """Yield (chunk, positions, rejected mask) with each chunk's rows matched to the rejected positions"""
+    rows = 0
+    for chunk in chunks:
+        positions = np.arange(rows, rows + len(chunk))
+        rows += len(chunk)
+        yield chunk, positions, np.isin(positions, rejected_positions, assume_unique=True)
+
+def filter_valid_rows(make_chunks: Callable[[], Iterator[pd.DataFrame]], validation: Dict[str, Any]) -> Callable[[], Iterator[pd.DataFrame]]:
+    """Chunk factory yielding only the rows that passed validation"""
+    def valid_chunks():
+        for chunk, _, rejected in iter_chunk_rejections(make_chunks(), validation["rejected_positions"]):
+            yield chunk[~rejected] if rejected.any() else chunk
+    return valid_chunks
+
+def build_rejects_csv(chunks: Iterator[pd.DataFrame], validation: Dict[str, Any]) -> bytes:
+    """CSV of the rejected rows with their 1-based data row number and rejection reasons"""
+    rejected_positions = validation["rejected_positions"]
+    reasons = pd.Series(validation["rejected_reasons"], index=rejected_positions, dtype=object)
+    output = io.StringIO()
+    header = True
+    for chunk, positions, rejected in iter_chunk_rejections(chunks, rejected_positions):
+        if not rejected.any():
+            continue
+        rejects = chunk[rejected].copy()
+        rejects.insert(0, ROW_NUMBER_COLUMN, positions[rejected] + 1)
+        rejects[REASON_COLUMN] = reasons.loc[positions[rejected]].to_numpy()
+        rejects.to_csv(output, index=False, header=header)
+        header = False
+    return output.getvalue().encode("utf-8")
+
+def rejected_rows_digest(validations: List[Dict[str, Any]]) -> str:
+    """Hash of the rejected row positions of one or more files: which rows an upload leaves out"""
+    digest = hashlib.sha256()
+    for validation in validations:
+        positions = validation["rejected_positions"] if validation else np.empty(0, dtype=np.int64)
+        digest.update(np.asarray(positions, dtype=np.int64).tobytes())
+        digest.update(b"|")
+    return digest.hexdigest()[:16]
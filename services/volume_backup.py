@@ -0,0 +1,125 @@
+"""
+CSV backup uploads to the Unity Catalog volume.
+
+The uploaded file is streamed to the volume straight from the upload buffer through
+a read-only view with its own position, so it is never copied into a second bytes
+object and the table load can read the same file at the same time. Backups can be
+gzip-compressed on the fly and run on a background thread.
+"""
+import io
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from services.bulk_load import volume_root
+from services.upload_pipeline import timed
+
+# Bytes read from the source per step while streaming
+STREAM_CHUNK_SIZE = 4 * 1024 * 1024
+
+# Multi-part extensions of accepted upload files
+COMPOUND_EXTENSIONS = ('csv.gz', 'csv.zst')
+
+# Shared by all sessions; backups are I/O bound
+_backup_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="volume-backup")
+
+
+class BufferReader(io.RawIOBase):
+    """Seekable reader over a memoryview, independent of the source file's position"""
+
+    def __init__(self, buffer):
+        self.buffer = memoryview(buffer)
+        self.position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def close(self):
+        # Release the export so the source buffer can be resized or freed again
+        if not self.closed:
+            self.buffer.release()
+        super().close()
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            self.position = offset
+        elif whence == io.SEEK_CUR:
+            self.position += offset
+        else:
+            self.position = len(self.buffer) + offset
+        return self.position
+
+    def readinto(self, target):
+        end = min(self.position + len(target), len(self.buffer))
+        size = max(0, end - self.position)
+        target[:size] = self.buffer[self.position:end]
+        self.position += size
+        return size
+
+
+class GzipStream(io.RawIOBase):
+    """Non-seekable stream yielding the gzip-compressed bytes of a source stream"""
+
+    def __init__(self, source, level: int = 6):
+        self.source = source
+        # wbits=31 writes a gzip header and trailer
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        self.pending = bytearray()
+        self.finished = False
+
+    def readable(self):
+        return True
+
+    def readinto(self, target):
+        while len(self.pending) < len(target) and not self.finished:
+            data = self.source.read(STREAM_CHUNK_SIZE)
+            if data:
+                self.pending += self.compressor.compress(data)
+            else:
+                self.pending += self.compressor.flush()
+                self.finished = True
+        size = min(len(target), len(self.pending))
+        target[:size] = self.pending[:size]
+        del self.pending[:size]
+        return size
+
+
+def open_source_stream(uploaded_file):
+    """Reader over the uploaded file that does not copy it or move its position"""
+    if hasattr(uploaded_file, "getbuffer"):
+        return io.BufferedReader(BufferReader(uploaded_file.getbuffer()), buffer_size=STREAM_CHUNK_SIZE)
+    uploaded_file.seek(0)
+    return uploaded_file
+
+def backup_file_path(volume_name: str, file_name: str, timestamp: str, compress: bool = False) -> str:
+    """Timestamped volume path for a backup, so uploads never overwrite each other"""
+    original_name = file_name.rsplit('.', 1)[0]
+    extension = file_name.rsplit('.', 1)[1] if '.' in file_name else 'csv'
+    for compound in COMPOUND_EXTENSIONS:
+        # Keep e.g. .csv.gz whole so the timestamp goes before it
+        if file_name.lower().endswith('.' + compound):
+            original_name, extension = file_name[:-len(compound) - 1], compound
+    backup_name = f"{original_name}_{timestamp}.{extension}"
+    if compress:
+        backup_name += ".gz"
+    return f"{volume_root(volume_name)}/{backup_name}"
+
+def upload_backup(uploaded_file, volume_file_path: str, files, compress: bool = False) -> str:
+    """Stream the uploaded file to the volume, optionally gzip-compressed"""
+    source = open_source_stream(uploaded_file)
+    stream = io.BufferedReader(GzipStream(source), buffer_size=STREAM_CHUNK_SIZE) if compress else source
+    try:
+        files.upload(volume_file_path, stream, overwrite=True)
+    finally:
+        if source is not uploaded_file:
+            source.close()
+    return volume_file_path
+
+def start_backup_upload(uploaded_file, volume_file_path: str, files, compress: bool = False) -> Future:
+    """Run upload_backup on the shared background pool; the future resolves to (path, seconds)"""
+    return _backup_pool.submit(timed(lambda: upload_backup(uploaded_file, volume_file_path, files, compress)))
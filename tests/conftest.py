@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Add repo root to path, as the benchmarks do
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
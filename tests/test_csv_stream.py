@@ -0,0 +1,17 @@
+import pandas as pd
+
+from services.csv_stream import scan_chunks, scan_constant_columns
+
+
+def test_scan_constant_columns_over_the_whole_scan():
+    chunks = [
+        pd.DataFrame({"id": [1, 2], "region": ["EU", "EU"], "block": [0, 0], "note": ["x", None]}),
+        pd.DataFrame({"id": [3, 4], "region": ["EU", "EU"], "block": [1, 1], "note": ["x", "x"]}),
+    ]
+    scan = scan_chunks(chunks, profile=True)
+    # block is constant within each chunk only; note has one value but also nulls
+    assert scan_constant_columns(scan) == ["region"]
+
+def test_scan_constant_columns_without_a_profile():
+    scan = scan_chunks([pd.DataFrame({"region": ["EU", "EU"]})])
+    assert scan_constant_columns(scan) == []
@@ -0,0 +1,46 @@
+import pytest
+
+from services.parallel_writer import execute_with_retry, is_pre_execution_error
+
+
+@pytest.mark.parametrize("message", [
+    "HTTP 429 Too Many Requests",
+    "503 Service Unavailable",
+    "TEMPORARILY_UNAVAILABLE: warehouse is starting",
+    "[Errno 111] Connection refused",
+    "Name or service not known",
+])
+def test_pre_execution_errors(message):
+    assert is_pre_execution_error(Exception(message))
+
+@pytest.mark.parametrize("message", [
+    "Read timed out",
+    "Connection reset by peer",
+    "[TABLE_OR_VIEW_NOT_FOUND] The table c.s.t cannot be found",
+    "",
+])
+def test_errors_after_the_statement_may_have_run(message):
+    assert not is_pre_execution_error(Exception(message))
+
+def test_execute_with_retry_stops_on_an_error_that_must_not_be_retried():
+    calls = []
+
+    def execute():
+        calls.append(1)
+        raise TimeoutError("Read timed out")
+
+    with pytest.raises(TimeoutError):
+        execute_with_retry(execute, max_retries=3, backoff_seconds=0, should_retry=is_pre_execution_error)
+    assert len(calls) == 1
+
+def test_execute_with_retry_retries_pre_execution_errors():
+    calls = []
+
+    def execute():
+        calls.append(1)
+        if len(calls) < 3:
+            raise Exception("503 Service Unavailable")
+        return "done"
+
+    assert execute_with_retry(execute, max_retries=3, backoff_seconds=0, should_retry=is_pre_execution_error) == "done"
+    assert len(calls) == 3
@@ -0,0 +1,33 @@
+import numpy as np
+
+from services.review_reader import filter_conditions, page_query
+
+
+def test_filter_conditions_none_and_empty_dict_add_nothing():
+    assert filter_conditions(None) == ([], {})
+    assert filter_conditions({}) == ([], {})
+
+def test_filter_conditions_empty_list_matches_nothing():
+    conditions, params = filter_conditions({"status": []})
+    assert conditions == ["FALSE"]
+    assert params == {}
+
+def test_filter_conditions_list_none_and_scalar():
+    conditions, params = filter_conditions({"status": ["open", "held"], "checker": None, "size": "SME"})
+    assert conditions == ["`status` IN (:f0_0, :f0_1)", "`checker` IS NULL", "`size` = :f2"]
+    assert params == {"f0_0": "open", "f0_1": "held", "f2": "SME"}
+
+def test_page_query_first_page_asks_for_one_extra_row():
+    query, params = page_query("c.s.t", "id", 50)
+    assert query == "SELECT * FROM c.s.t ORDER BY `id` LIMIT 51"
+    assert params == {}
+
+def test_page_query_after_key_with_filters_and_columns():
+    query, params = page_query("c.s.t", "id", 10, after_key=np.int64(42), columns=["size"], filters={"status": ["open"]})
+    assert query == "SELECT `id`, `size` FROM c.s.t WHERE `status` IN (:f0_0) AND `id` > :after_key ORDER BY `id` LIMIT 11"
+    assert params == {"f0_0": "open", "after_key": 42}
+    assert type(params["after_key"]) is int
+
+def test_page_query_does_not_select_the_key_twice():
+    query, _ = page_query("c.s.t", "id", 10, columns=["size", "id"])
+    assert query.startswith("SELECT `size`, `id` FROM")
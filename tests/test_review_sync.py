@@ -0,0 +1,72 @@
+import pandas as pd
+
+from services.review_sync import in_page_range, matches_filters, merge_changes, written_rows
+
+PAGE_INFO = {"after_key": 10, "next_key": 20, "has_next": True}
+
+
+def page(keys, status="open"):
+    return pd.DataFrame({"id": keys, "status": [status] * len(keys), "size": ["SME"] * len(keys)})
+
+def test_written_rows_applies_values_and_constants_to_the_written_keys():
+    before = page([1, 2, 3])
+    values = pd.DataFrame({"id": [2, 3, 3], "size": ["Large", "Micro", "Small"]})
+    rows = written_rows(before, "id", [2, 3], values, {"status": "checked"})
+    assert rows["id"].tolist() == [2, 3]
+    # The last value written for a key wins
+    assert rows["size"].tolist() == ["Large", "Small"]
+    assert rows["status"].tolist() == ["checked", "checked"]
+
+def test_written_rows_without_values_keeps_the_page_values():
+    rows = written_rows(page([1, 2]), "id", [1], constants={"status": "checked"})
+    assert rows.to_dict("records") == [{"id": 1, "status": "checked", "size": "SME"}]
+
+def test_matches_filters_none_and_empty_dict_match_everything():
+    rows = page([1, 2])
+    assert matches_filters(rows, None).tolist() == [True, True]
+    assert matches_filters(rows, {}).tolist() == [True, True]
+
+def test_matches_filters_empty_list_matches_nothing():
+    assert matches_filters(page([1, 2]), {"status": []}).tolist() == [False, False]
+
+def test_matches_filters_none_value_matches_nulls_only():
+    rows = pd.DataFrame({"id": [1, 2, 3], "checker": [None, "a", float("nan")]})
+    assert matches_filters(rows, {"checker": None}).tolist() == [True, False, True]
+    # A null never matches a list or a scalar, as in SQL
+    assert matches_filters(rows, {"checker": ["a", None]}).tolist() == [False, True, False]
+    assert matches_filters(rows, {"checker": "a"}).tolist() == [False, True, False]
+
+def test_in_page_range_is_exclusive_after_and_inclusive_at_next_key():
+    keys = pd.Series([10, 11, 20, 21])
+    assert in_page_range(keys, PAGE_INFO).tolist() == [False, True, True, False]
+
+def test_in_page_range_first_and_last_pages_are_open_ended():
+    keys = pd.Series([1, 100])
+    assert in_page_range(keys, {"after_key": None, "next_key": 20, "has_next": True}).tolist() == [True, False]
+    assert in_page_range(keys, {"after_key": 10, "next_key": 100, "has_next": False}).tolist() == [False, True]
+
+def test_merge_changes_without_changes_returns_the_page():
+    current = page([11, 12])
+    assert merge_changes(current, page([]), "id", None, PAGE_INFO) is current
+
+def test_merge_changes_updates_rows_in_place_and_keeps_key_order():
+    changed = pd.DataFrame({"id": [12], "status": ["open"], "size": ["Large"], "extra": ["x"]})
+    merged = merge_changes(page([11, 12, 13]), changed, "id", {"status": ["open"]}, PAGE_INFO)
+    assert merged["id"].tolist() == [11, 12, 13]
+    assert merged.loc[1, "size"] == "Large"
+    # The page keeps its own columns
+    assert list(merged.columns) == ["id", "status", "size"]
+
+def test_merge_changes_drops_rows_that_leave_the_filtered_page():
+    changed = page([12], status="checked")
+    merged = merge_changes(page([11, 12, 13]), changed, "id", {"status": "open"}, PAGE_INFO)
+    assert merged["id"].tolist() == [11, 13]
+
+def test_merge_changes_joins_rows_at_the_page_boundary_only_inside_the_range():
+    changed = page([10, 15, 20, 21])
+    merged = merge_changes(page([11, 19]), changed, "id", {"status": "open"}, PAGE_INFO)
+    assert merged["id"].tolist() == [11, 15, 19, 20]
+
+def test_merge_changes_with_empty_list_filter_empties_the_page():
+    merged = merge_changes(page([11, 12]), page([12]), "id", {"status": []}, PAGE_INFO)
+    assert merged["id"].tolist() == [11]
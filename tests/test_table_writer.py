@@ -0,0 +1,39 @@
+import pandas as pd
+
+from services.table_writer import build_insert_sql, frame_constant_columns, split_constant_columns
+
+
+def test_split_constant_columns_binds_only_the_given_columns():
+    df = pd.DataFrame({"id": [1, 2], "region": ["EU", "EU"], "block": [7, 7]})
+    data_cols, constants = split_constant_columns(df, {"uploaded_by": "me"}, ["region"])
+    # block repeats in this frame but is not in the load's constant set
+    assert data_cols == ["id", "block"]
+    assert constants == {"uploaded_by": "me", "region": "EU"}
+    assert type(constants["region"]) is str
+
+def test_split_constant_columns_same_columns_for_every_chunk():
+    chunks = [pd.DataFrame({"id": [1, 2], "block": [0, 0]}), pd.DataFrame({"id": [3, 4], "block": [1, 2]})]
+    assert {tuple(split_constant_columns(chunk, None, ["block"])[0]) for chunk in chunks} == {("id",)}
+
+def test_split_constant_columns_keeps_one_values_column():
+    df = pd.DataFrame({"a": [1, 1], "b": ["x", "x"]})
+    data_cols, constants = split_constant_columns(df, None, ["a", "b"])
+    assert data_cols == ["a"]
+    assert constants == {"b": "x"}
+
+def test_split_constant_columns_binds_missing_as_none():
+    df = pd.DataFrame({"id": [1, 2], "note": [None, None]})
+    assert split_constant_columns(df, None, ["note"])[1] == {"note": None}
+
+def test_frame_constant_columns():
+    df = pd.DataFrame({"id": [1, 2], "region": ["EU", "EU"], "note": [None, None]})
+    assert frame_constant_columns(df) == ["region", "note"]
+    assert frame_constant_columns(df.iloc[:1]) == []
+
+def test_build_insert_sql_without_constants():
+    sql = build_insert_sql("INTO", "c.s.t", ["id", "size"], "(:p0,:p1)")
+    assert sql == "INSERT INTO c.s.t (`id`,`size`) VALUES (:p0,:p1)"
+
+def test_build_insert_sql_selects_constants_once():
+    sql = build_insert_sql("OVERWRITE", "c.s.t", ["id"], "(:p0),(:p1)", {"region": "EU", "uploaded_by": "me"})
+    assert sql == "INSERT OVERWRITE c.s.t (`id`,`region`,`uploaded_by`) SELECT *, :c0, :c1 FROM (VALUES (:p0),(:p1))"
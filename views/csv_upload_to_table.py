@@ -1,24 +1,71 @@
-import io
 import pandas as pd
 import streamlit as st
 from databricks import sql
 from databricks.sdk import WorkspaceClient
 from databricks.sdk.core import Config
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Sequence
 from datetime import datetime
+from concurrent.futures import Future
+from functools import partial
+import time
 import pytz
 
+from services.table_writer import (
+    probe_table_exists,
+    drop_table,
+    create_table_from_schema,
+    insert_chunks_to_table,
+    insert_data_to_table,
+)
+from services.bulk_load import wrote_nothing, bulk_load_chunks, bulk_load_dataframe, bulk_load_parquet_file, volume_root, STAGING_DIR
+from services.staging import overwrite_via_staging, publish_staging_table
+from services.upsert import upsert_via_staging, diff_counts, merge_changed_rows
+from services.parallel_writer import parallel_insert_chunks, DEFAULT_WRITERS, MAX_WRITERS
+from services.volume_backup import backup_file_path, start_backup_upload, open_source_stream
+from services.upload_pipeline import run_stages
+from services.upload_jobs import UploadJob, UploadJobRunner, JobFile, MAX_UPLOAD_JOBS, QUEUED, RUNNING, SUCCEEDED
+from services.ttl_cache import TTLCache
+from services.csv_stream import DEFAULT_CHUNK_ROWS, scan_constant_columns
+from services.schema_inference import SAMPLE_ROWS
+from services.file_readers import UPLOADER_TYPES, READERS, reader_for, parquet_columns
+from services.batch_upload import prepare_batch, batch_chunk_factory, MAX_PREPARE_PROCESSES
+from services.upload_ledger import content_hash, find_previous_upload, record_upload, table_version
+from services.upload_checkpoints import resumable_upload
+from services.validation import validate_chunks, build_rejects_csv, filter_valid_rows, rejected_rows_digest
+from config.validation_rules import get_validation_rules
+
 # Pre-configured connection details
 DATABRICKS_HOST = "dbc-7d305f7c-9def.cloud.databricks.com"
 HTTP_PATH = "/sql/1.0/warehouses/80e5636f05f63c9b"
 UPLOAD_VOLUME = "dg_dev.sandbox.csv_uploads"
+UPLOAD_LEDGER_TABLE = "dg_dev.sandbox.csv_upload_ledger"
+UPLOAD_CHECKPOINT_TABLE = "dg_dev.sandbox.csv_upload_checkpoints"
+TARGET_TABLE = "dg_dev.z3_stg.merchant_asset_size_review"
+UPSERT_MODE = "Upsert by Key (MERGE)"
+DEFAULT_UPSERT_KEY = "merchant_id"
+BLOCK_INVALID_ROWS = "Block the upload"
+LOAD_VALID_ROWS = "Load only valid rows"
+
+# How long permission checks and table probes are reused across uploads
+PROBE_CACHE_TTL_SECONDS = 600
+
+# How often the upload job list refreshes while a job is running
+JOB_POLL_SECONDS = 1.0
 
 # Initialize Databricks clients
 w = WorkspaceClient()
 
 # Initialize session state
-if 'uploaded_df' not in st.session_state:
-    st.session_state.uploaded_df = None
+if 'csv_scan' not in st.session_state:
+    st.session_state.csv_scan = None
+if 'csv_scan_file_id' not in st.session_state:
+    st.session_state.csv_scan_file_id = None
+if 'csv_schema' not in st.session_state:
+    st.session_state.csv_schema = None
+if 'batch_scan' not in st.session_state:
+    st.session_state.batch_scan = None
+if 'batch_scan_key' not in st.session_state:
+    st.session_state.batch_scan_key = None
 if 'upload_success' not in st.session_state:
     st.session_state.upload_success = False
 
@@ -31,6 +78,51 @@ def get_connection(server_hostname: str, http_path: str):
         credentials_provider=lambda: Config().authenticate,
     )
 
+@st.cache_resource
+def get_probe_caches() -> Dict[str, TTLCache]:
+    """Process-wide caches for volume permission checks and table existence probes"""
+    return {
+        "Volume permissions": TTLCache(ttl_seconds=PROBE_CACHE_TTL_SECONDS),
+        "Table probes": TTLCache(ttl_seconds=PROBE_CACHE_TTL_SECONDS),
+    }
+
+@st.cache_resource
+def get_upload_job_runner() -> UploadJobRunner:
+    """Process-wide upload job pool; jobs outlive the session rerun that submitted them"""
+    return UploadJobRunner(MAX_UPLOAD_JOBS)
+
+# Resolved on the script thread; upload jobs use them from their worker threads
+probe_caches = get_probe_caches()
+upload_job_runner = get_upload_job_runner()
+
+def invalidate_probe_caches(user_email: str) -> int:
+    """Forget everything cached for a user, e.g. after a permission error"""
+    return sum(
+        cache.invalidate(lambda key: key[0] == user_email)
+        for cache in probe_caches.values()
+    )
+
+def is_permission_error(error: Exception) -> bool:
+    """Whether an upload error looks like a missing grant"""
+    message = str(error).upper()
+    return any(marker in message for marker in ["PERMISSION_DENIED", "INSUFFICIENT_PRIVILEGES", "FORBIDDEN", "UNAUTHORIZED"])
+
+def cached_permission_check(user_email: str, volume_name: str) -> str:
+    """check_upload_permissions, reused for PROBE_CACHE_TTL_SECONDS when it passed"""
+    return probe_caches["Volume permissions"].get_or_compute(
+        (user_email, volume_name),
+        lambda: check_upload_permissions(volume_name),
+        should_cache=lambda result: result == "valid",
+    )
+
+def open_connection():
+    """Open an uncached warehouse connection for a parallel writer thread"""
+    return sql.connect(
+        server_hostname=DATABRICKS_HOST,
+        http_path=HTTP_PATH,
+        credentials_provider=lambda: Config().authenticate,
+    )
+
 def get_current_user_email() -> str:
     """Get the current user's Databricks email - no caching to ensure fresh data"""
     try:
@@ -100,9 +192,14 @@ def get_manila_timestamp() -> str:
 def check_upload_permissions(volume_name: str) -> str:
     """Check if user has permissions to upload to volume"""
     try:
-        volume = w.volumes.read(name=volume_name)
-        current_user = w.current_user.me()
-        catalog = w.catalogs.get(name=volume.catalog_name)
+        # The volume, current user and catalog lookups are independent
+        catalog_name = volume_name.strip().split(".")[0]
+        lookups, _ = run_stages({
+            "volume": lambda: w.volumes.read(name=volume_name),
+            "current_user": lambda: w.current_user.me(),
+            "catalog": lambda: w.catalogs.get(name=catalog_name),
+        })
+        volume, current_user, catalog = lookups["volume"], lookups["current_user"], lookups["catalog"]
         grants = w.grants.get_effective(
             securable_type="volume",
             full_name=volume.full_name,
@@ -124,126 +221,787 @@ def check_upload_permissions(volume_name: str) -> str:
     except Exception as e:
         return f"Error: {str(e)}"
 
-def upload_csv_to_volume(uploaded_file, volume_path: str) -> str:
-    """Upload CSV to Unity Catalog Volume"""
-    uploaded_file.seek(0)  # Reset file pointer
-    file_bytes = uploaded_file.read()
-    binary_data = io.BytesIO(file_bytes)
-    
-    # Add timestamp to filename to avoid conflicts
-    timestamp = get_manila_timestamp()
-    original_name = uploaded_file.name.rsplit('.', 1)[0]
-    extension = uploaded_file.name.rsplit('.', 1)[1] if '.' in uploaded_file.name else 'csv'
-    file_name = f"{original_name}_{timestamp}.{extension}"
-    
-    parts = volume_path.strip().split(".")
-    catalog, schema, volume_name = parts[0], parts[1], parts[2]
-    volume_file_path = f"/Volumes/{catalog}/{schema}/{volume_name}/{file_name}"
-    
-    w.files.upload(volume_file_path, binary_data, overwrite=True)
-    return volume_file_path
-
-def infer_sql_type(dtype) -> str:
-    """Infer SQL data type from pandas dtype"""
-    if dtype == 'object':
-        return 'STRING'
-    elif dtype == 'int64':
-        return 'BIGINT'
-    elif dtype == 'float64':
-        return 'DOUBLE'
-    elif dtype == 'bool':
-        return 'BOOLEAN'
-    elif 'datetime' in str(dtype):
-        return 'TIMESTAMP'
-    else:
-        return 'STRING'
+def upload_csv_to_volume(uploaded_file, volume_path: str, compress: bool = False) -> Future:
+    """Start streaming the CSV backup to the Unity Catalog Volume in the background"""
+    # Timestamp in the filename avoids conflicts
+    volume_file_path = backup_file_path(volume_path, uploaded_file.name, get_manila_timestamp(), compress)
+    return start_backup_upload(uploaded_file, volume_file_path, w.files, compress)
+
+def wait_for_backup(job: UploadJob, backup_future: Future, stage_timings: Dict[str, float], load_started: float, stage: str = "Volume backup (overlapped with load)") -> str:
+    """Wait for the background CSV backup, record stage timings and report where it landed"""
+    # A batch waits for several backups; the load ended before the first wait
+    stage_timings.setdefault("Table create + load", time.perf_counter() - load_started)
+    try:
+        volume_path, stage_timings[stage] = backup_future.result()
+    except Exception as e:
+        if is_permission_error(e):
+            invalidate_probe_caches(job.owner)
+        job.log("error", f"❌ Table load finished but the CSV backup to the volume failed: {str(e)}")
+        return "backup failed"
+    job.log("success", f"✅ CSV uploaded to: `{volume_path}`")
+    return volume_path
+
+def connect_and_probe(user_email: str, table_name: str):
+    """Open the job's own warehouse connection and check the target table; also warms the warehouse
+
+    Only an answer is cached: a probe that failed raises instead of passing for "no table".
+    """
+    conn = open_connection()
+    try:
+        exists = probe_caches["Table probes"].get_or_compute(
+            (user_email, table_name),
+            lambda: probe_table_exists(table_name, conn),
+        )
+    except Exception:
+        conn.close()
+        raise
+    return conn, exists
+
+def remember_table_exists(user_email: str, table_name: str, exists: bool):
+    """Keep the table probe cache in step with DDL an upload just ran"""
+    probe_caches["Table probes"].set((user_email, table_name), exists)
+
+@st.cache_data(max_entries=16, show_spinner="Scanning and profiling file...")
+def scan_upload(file_hash: str, file_name: str, _uploaded_file) -> Dict[str, Any]:
+    """Schema, scan and column profile of an upload, memoized by content hash across reruns and sessions"""
+    reader = reader_for(file_name)
+    csv_schema = reader.infer_schema(_uploaded_file, SAMPLE_ROWS)
+    csv_scan = reader.scan(_uploaded_file, DEFAULT_CHUNK_ROWS, csv_schema, profile=True)
+    return {"schema": csv_schema, "scan": {**csv_scan, "file_hash": file_hash}}
+
+def get_csv_scan(uploaded_file) -> Dict[str, Any]:
+    """Hash the CSV once per file and look up its scan, keeping only the summaries in session state"""
+    if st.session_state.csv_scan_file_id != uploaded_file.file_id:
+        # The reader depends on the suffix, so the same bytes under another name scan separately
+        result = scan_upload(content_hash(uploaded_file), uploaded_file.name.lower(), uploaded_file)
+        st.session_state.csv_schema = result["schema"]
+        st.session_state.csv_scan = result["scan"]
+        st.session_state.csv_scan_file_id = uploaded_file.file_id
+    return st.session_state.csv_scan
+
+@st.cache_data(max_entries=4, show_spinner="Scanning and validating files in parallel...")
+def scan_upload_batch(file_hashes: tuple, file_names: tuple, table_name: str, _uploaded_files) -> Dict[str, Any]:
+    """Per-file scans and validation of a multi-file batch, memoized by the files' content hashes and the table"""
+    return prepare_batch(
+        [(uploaded_file.name, uploaded_file, file_hash) for uploaded_file, file_hash in zip(_uploaded_files, file_hashes)],
+        get_validation_rules(table_name),
+        DEFAULT_CHUNK_ROWS,
+        MAX_PREPARE_PROCESSES,
+    )
+
+def get_batch_scan(uploaded_files, table_name: str) -> Dict[str, Any]:
+    """Hash each file of a batch once and look up the batch scan, keeping it in session state"""
+    batch_key = (tuple(uploaded_file.file_id for uploaded_file in uploaded_files), table_name)
+    if st.session_state.batch_scan_key != batch_key:
+        # Names are part of the key because each file's reader depends on its suffix
+        st.session_state.batch_scan = scan_upload_batch(
+            tuple(content_hash(uploaded_file) for uploaded_file in uploaded_files),
+            tuple(uploaded_file.name.lower() for uploaded_file in uploaded_files),
+            table_name,
+            uploaded_files,
+        )
+        st.session_state.batch_scan_key = batch_key
+    return st.session_state.batch_scan
 
-def table_exists(table_name: str, conn) -> bool:
-    """Check if table exists"""
+@st.cache_data(max_entries=16, show_spinner="Validating rows...")
+def validate_upload(file_hash: str, table_name: str, _uploaded_file, _csv_scan: Dict[str, Any]) -> Dict[str, Any]:
+    """Check every row against the table's validation rules, memoized by content hash and table"""
+    make_chunks = reader_for(_uploaded_file.name).chunk_factory(_uploaded_file, _csv_scan, DEFAULT_CHUNK_ROWS)
+    return validate_chunks(make_chunks(), get_validation_rules(table_name))
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def rejects_csv(file_hash: str, table_name: str, _uploaded_file, _csv_scan: Dict[str, Any], _validation: Dict[str, Any]) -> bytes:
+    """Rejected rows with their reasons as a downloadable CSV"""
+    make_chunks = reader_for(_uploaded_file.name).chunk_factory(_uploaded_file, _csv_scan, DEFAULT_CHUNK_ROWS)
+    return build_rejects_csv(make_chunks(), _validation)
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def batch_rejects_csv(batch_hash: str, file_index: int, _uploaded_file, _file_report: Dict[str, Any]) -> bytes:
+    """Rejected rows of one file of a batch, including keys repeated in other files"""
+    make_chunks = reader_for(_uploaded_file.name).chunk_factory(_uploaded_file, _file_report["scan"], DEFAULT_CHUNK_ROWS)
+    return build_rejects_csv(make_chunks(), _file_report["validation"])
+
+def format_profile_value(value) -> str:
+    return "" if value is None else str(value)
+
+def format_top_values(column_profile: Dict[str, Any]) -> str:
+    """Most frequent values as "value (count)"; blank for columns where every value is unique"""
+    top_values = column_profile["top_values"]
+    if not top_values or (top_values[0][1] == 1 and not column_profile["top_is_exact"]):
+        return ""
+    prefix = "" if column_profile["top_is_exact"] else "≈ "
+    return prefix + ", ".join(f"{value} ({count:,})" for value, count in top_values)
+
+def find_duplicate_upload(file_hash: str, table_name: str) -> Optional[Dict[str, Any]]:
+    """Earlier upload of the same file into the table, if the table is unchanged since; None when unknown"""
     try:
-        with conn.cursor() as cursor:
-            cursor.execute(f"DESCRIBE TABLE {table_name}")
-            return True
+        return find_previous_upload(UPLOAD_LEDGER_TABLE, file_hash, table_name, get_connection(DATABRICKS_HOST, HTTP_PATH))
     except Exception:
-        return False
-
-def drop_table(table_name: str, conn):
-    """Drop a table if it exists"""
-    with conn.cursor() as cursor:
-        cursor.execute(f"DROP TABLE IF EXISTS {table_name}")
-
-def create_table_from_dataframe(df: pd.DataFrame, table_name: str, conn):
-    """Create Delta table from DataFrame"""
-    columns_def = []
-    for col, dtype in df.dtypes.items():
-        sql_type = infer_sql_type(dtype)
-        # Escape column names with backticks
-        columns_def.append(f"`{col}` {sql_type}")
-    
-    create_sql = f"""
-    CREATE TABLE IF NOT EXISTS {table_name} (
-        {', '.join(columns_def)}
-    ) USING DELTA
+        # No ledger yet, or no access to it: upload as usual
+        return None
+
+def record_ingest(job: UploadJob, file_hash: str, table_name: str, backup_path: str, row_count: int, conn):
+    """Record a finished upload in the ledger; failures only warn, the upload itself succeeded"""
+    try:
+        record_upload(UPLOAD_LEDGER_TABLE, {
+            'file_hash': file_hash,
+            'target_table': table_name,
+            'table_version': table_version(table_name, conn),
+            'backup_path': backup_path,
+            'row_count': row_count,
+            'uploaded_by': job.owner,
+            'uploaded_at': get_manila_timestamp(),
+        }, conn)
+    except Exception as e:
+        job.log("warning", f"⚠️ Upload finished but could not be recorded in the upload ledger: {str(e)}")
+
+def volume_browser_url(volume_name: str) -> str:
+    """Catalog Explorer page of a Unity Catalog volume"""
+    return f"https://{DATABRICKS_HOST}/explore/data/volumes/{volume_name.replace('.', '/')}"
+
+def write_data_to_table(job: UploadJob, make_chunks, table_name: str, conn, mode: str, use_bulk_load: bool, writers: int = 1, constants: Dict[str, Any] = None, parquet_file=None,
+                        constant_columns: Sequence[str] = ()) -> str:
+    """Load the chunk stream with the Parquet bulk path, falling back to batched INSERTs if it wrote nothing
+
+    An uploaded Parquet file (parquet_file) is bulk loaded as it is, without reading it into chunks.
+    constant_columns (scan_constant_columns) are bound once per INSERT like the metadata constants.
     """
+    if use_bulk_load and parquet_file is not None:
+        try:
+            bulk_load_parquet_file(open_source_stream(parquet_file), table_name, parquet_columns(parquet_file), conn, w.files, UPLOAD_VOLUME, mode=mode, constants=constants)
+            return "Parquet file loaded as uploaded"
+        except Exception as e:
+            if not wrote_nothing(e):
+                raise
+            job.log("warning", f"⚠️ Loading the Parquet file directly failed, reading it in chunks instead: {str(e)}")
+    make_chunks = job.track_chunks(make_chunks)
+    if use_bulk_load:
+        try:
+            bulk_load_chunks(make_chunks(), table_name, conn, w.files, UPLOAD_VOLUME, mode=mode, constants=constants)
+            return "Parquet bulk load"
+        except Exception as e:
+            # Falling back after a load that may have committed would write every row twice
+            if not wrote_nothing(e):
+                raise
+            job.log("warning", f"⚠️ Bulk load failed, falling back to batched INSERT: {str(e)}")
+    if writers > 1 and mode == "append":
+        # Appends can be spread over several connections; overwrites go through staging
+        parallel_insert_chunks(make_chunks(), table_name, open_connection, workers=writers, constants=constants,
+                               constant_columns=constant_columns)
+        return f"Batched INSERT ({writers} parallel writers)"
+    insert_chunks_to_table(make_chunks(), table_name, conn, mode=mode, constants=constants, constant_columns=constant_columns)
+    return "Batched INSERT"
+
+def resumable_batch_writer(job: UploadJob, conn, use_bulk_load: bool, constant_columns: Sequence[str] = ()):
+    """write_batch for resumable uploads: one Parquet load per batch, falling back to batched INSERTs"""
+    state = {"bulk": use_bulk_load}
     
-    with conn.cursor() as cursor:
-        cursor.execute(create_sql)
-
-def insert_data_to_table(df: pd.DataFrame, table_name: str, conn, mode: str = "append"):
-    """Insert DataFrame data into Delta table with batching to avoid parameter limit"""
-    rows = list(df.itertuples(index=False, name=None))
-    if not rows:
-        return
-    
-    cols = list(df.columns)
-    col_list_sql = ",".join([f"`{col}`" for col in cols])
-    
-    # Databricks SQL has a 256 parameter limit
-    # Calculate batch size: 256 / number_of_columns (with some buffer)
-    max_params = 250  # Use 250 to be safe
-    num_cols = len(cols)
-    batch_size = max(1, max_params // num_cols)
-    
-    # For overwrite mode, we need to handle the first batch specially
-    is_first_batch = True
-    
-    # Process rows in batches
-    for i in range(0, len(rows), batch_size):
-        batch_rows = rows[i:i + batch_size]
-        params = {}
-        values_sql_parts = []
-        p = 0
-        
-        # Build parameterized query for this batch
-        for row in batch_rows:
-            ph = []
-            for v in row:
-                key = f"p{p}"
-                ph.append(f":{key}")
-                # Handle None/NaN values
-                if pd.isna(v):
-                    params[key] = None
-                else:
-                    params[key] = v
-                p += 1
-            values_sql_parts.append("(" + ",".join(ph) + ")")
-        
-        values_sql = ",".join(values_sql_parts)
-        
-        with conn.cursor() as cursor:
-            if mode == "overwrite" and is_first_batch:
-                # First batch in overwrite mode uses INSERT OVERWRITE
-                cursor.execute(
-                    f"INSERT OVERWRITE {table_name} ({col_list_sql}) VALUES {values_sql}",
-                    params
+    def write_batch(chunk: pd.DataFrame, staging_table: str, constants: Dict[str, Any]):
+        if state["bulk"]:
+            try:
+                bulk_load_dataframe(chunk, staging_table, conn, w.files, UPLOAD_VOLUME, constants=constants)
+                return
+            except Exception as e:
+                # Only a batch that certainly left nothing behind is written again
+                if not wrote_nothing(e):
+                    raise
+                state["bulk"] = False
+                job.log("warning", f"⚠️ Bulk load failed, falling back to batched INSERT: {str(e)}")
+        insert_data_to_table(chunk, staging_table, conn, constants=constants, constant_columns=constant_columns)
+    
+    write_batch.method = lambda: "Parquet bulk load" if state["bulk"] else "Batched INSERT"
+    return write_batch
+
+def load_resumable(
+    job: UploadJob,
+    make_chunks,
+    file_hash: str,
+    target_table: str,
+    target_exists: bool,
+    upload_mode: str,
+    upsert_key: Optional[str],
+    csv_columns,
+    upload_schema: Dict[str, str],
+    metadata: Dict[str, Any],
+    chunk_rows: int,
+    use_bulk_load: bool,
+    skipped_rows: str,
+    conn,
+    constant_columns: Sequence[str] = (),
+) -> Dict[str, Any]:
+    """Stage the upload batch by batch with checkpoints, then overwrite or upsert the target in one statement
+
+    skipped_rows identifies the rows left out by validation (rejected_rows_digest); with
+    the mode, key, schema and metadata columns it decides which checkpoint can be resumed.
+    """
+    user_email = job.owner
+    columns = list(upload_schema)
+    options = {
+        "mode": upload_mode,
+        "upsert_key": upsert_key,
+        "schema": upload_schema,
+        "metadata_columns": sorted(metadata),
+        "skipped_rows": skipped_rows,
+    }
+    
+    if not target_exists:
+        create_table_from_schema(upload_schema, target_table, conn)
+        remember_table_exists(user_email, target_table, True)
+        job.log("info", f"ℹ️ Table `{target_table}` created (did not exist)")
+    
+    def publish(staging_table: str) -> Dict[str, int]:
+        job.set_stage("📤 Publishing staged rows into the table...")
+        # Both publishes are idempotent, so a resumed upload may safely run them again
+        if upload_mode == UPSERT_MODE:
+            compare_columns = [col for col in csv_columns if col != upsert_key]
+            counts = diff_counts(staging_table, target_table, upsert_key, compare_columns, conn)
+            if counts["inserted"] or counts["updated"]:
+                merge_changed_rows(staging_table, target_table, upsert_key, columns, compare_columns, conn)
+            return counts
+        publish_staging_table(staging_table, target_table, columns, conn)
+        return {}
+    
+    write_batch = resumable_batch_writer(job, conn, use_bulk_load, constant_columns)
+    result = resumable_upload(
+        job.track_chunks(make_chunks),
+        write_batch,
+        publish,
+        target_table,
+        upload_schema,
+        file_hash,
+        chunk_rows,
+        metadata,
+        UPLOAD_CHECKPOINT_TABLE,
+        conn,
+        owner=job.job_id,
+        options=options,
+    )
+    if result["resumed_from_rows"] is not None:
+        job.log("info", f"ℹ️ Resumed an interrupted upload of this file: {result['resumed_from_rows']:,} rows were already staged")
+    return {**result, "load_method": f"{write_batch.method()} per batch into a checkpointed staging table"}
+
+def upload_schema_and_metadata(sql_types: Dict[str, str], add_metadata: bool, user_email: str) -> tuple:
+    """Target schema of an upload and its metadata columns (constant values), if requested"""
+    upload_schema = dict(sql_types)
+    metadata = {}
+    if add_metadata:
+        manila_tz = pytz.timezone('Asia/Manila')
+        metadata['upload_timestamp'] = datetime.now(manila_tz).strftime('%Y-%m-%d %H:%M:%S')
+        metadata['uploaded_by'] = user_email
+        upload_schema.update({col: 'STRING' for col in metadata})
+    return upload_schema, metadata
+
+def run_upload(
+    job: UploadJob,
+    uploaded_file,
+    csv_scan: Dict[str, Any],
+    validation: Optional[Dict[str, Any]],
+    target_table: str,
+    upload_mode: str,
+    upsert_key: Optional[str],
+    add_metadata: bool,
+    chunk_rows: int,
+    use_bulk_load: bool,
+    parallel_writers: int,
+    compress_backup: bool,
+    use_staging_table: bool,
+    resumable: bool,
+) -> Dict[str, Any]:
+    """Body of an upload job: backup, preflight, table load and ledger entry; runs on a job worker thread"""
+    user_email = job.owner
+    reader = reader_for(uploaded_file.name)
+    conn = None
+    try:
+        # Step 1: Start the volume backup; it streams in the background while the table loads
+        job.set_stage("🔐 Checking permissions, backing up file and connecting to SQL warehouse...")
+        # Compressed and columnar uploads would barely shrink under gzip
+        backup_future = upload_csv_to_volume(uploaded_file, UPLOAD_VOLUME, compress_backup and not reader.compressed)
+        
+        # Step 2: Permission check and warehouse connection + table probe run concurrently
+        preflight, stage_timings = run_stages({
+            "Permission check": lambda: cached_permission_check(user_email, UPLOAD_VOLUME),
+            "Warehouse connect + table probe": lambda: connect_and_probe(user_email, target_table),
+        }, release={"Warehouse connect + table probe": lambda probe: probe[0].close()})
+        conn, target_exists = preflight["Warehouse connect + table probe"]
+        
+        # A backup that already failed is a real error: stop before writing
+        if backup_future.done() and backup_future.exception() is not None:
+            raise backup_future.exception()
+        
+        permission_check = preflight["Permission check"]
+        if permission_check != "valid":
+            job.log("warning", f"⚠️ Volume permission check: {permission_check}. Proceeding with upload attempt...")
+        
+        # Step 3: Prepare data
+        job.set_stage("📊 Preparing data...")
+        
+        # Chunks are conformed to the scanned schema as they stream; metadata
+        # columns are constants the writers bind once per statement
+        upload_schema, metadata = upload_schema_and_metadata(csv_scan["sql_types"], add_metadata, user_email)
+        
+        make_chunks = reader.chunk_factory(uploaded_file, csv_scan, chunk_rows)
+        # Data columns with one value in the whole file are bound like the metadata, decided
+        # once here so every INSERT of the upload has the same statement text
+        scan_constants = scan_constant_columns(csv_scan)
+        total_rows = csv_scan["rows"]
+        # A Parquet upload can be bulk loaded as it is unless rows have to be filtered out
+        parquet_file = uploaded_file if reader.columnar else None
+        if validation and validation["rejected_rows"]:
+            # Rejected rows are dropped from every chunk as it streams
+            make_chunks = filter_valid_rows(make_chunks, validation)
+            total_rows -= validation["rejected_rows"]
+            parquet_file = None
+            job.log("info", f"ℹ️ Skipping {validation['rejected_rows']:,} rows that failed validation")
+        if resumable and parquet_file is not None and use_bulk_load:
+            # One load statement either lands whole or not at all; there is nothing to checkpoint
+            resumable = False
+            job.log("info", "ℹ️ Parquet file is loaded as uploaded in one statement, so no batch checkpoints are needed")
+        
+        # Step 4: Create or check table
+        load_started = time.perf_counter()
+        job.set_stage("🏗️ Creating/checking table...")
+        
+        if resumable:
+            # Step 5: Stage batch by batch with checkpoints, then publish in one statement
+            job.set_stage("💾 Staging data batch by batch (resumable)...")
+            resumable_result = load_resumable(
+                job, make_chunks, csv_scan["file_hash"], target_table, target_exists, upload_mode, upsert_key,
+                csv_scan["columns"], upload_schema, metadata, chunk_rows, use_bulk_load,
+                rejected_rows_digest([validation if validation and validation["rejected_rows"] else None]), conn,
+                constant_columns=scan_constants,
+            )
+            volume_path = wait_for_backup(job, backup_future, stage_timings, load_started)
+            
+            counts = resumable_result["publish_result"] or {}
+            summary_lines = [
+                f"{resumable_result['rows']} rows staged in {resumable_result['batches']} checkpointed batches ({upload_mode})",
+                *(f"{counts[key]} rows {key}" for key in ("inserted", "updated", "unchanged") if key in counts),
+                f"Table: `{target_table}`",
+                f"Backup: `{volume_path}`",
+                f"Load method: {resumable_result['load_method']}",
+            ]
+            summary = "**Upload Summary:**\n" + "\n".join(f"- ✅ {line}" for line in summary_lines)
+        
+        elif upload_mode == "Create New Table":
+            if target_exists:
+                raise ValueError(f"Table `{target_table}` already exists. Choose 'Append' or 'Overwrite' mode.")
+            create_table_from_schema(upload_schema, target_table, conn)
+            remember_table_exists(user_email, target_table, True)
+            job.log("success", f"✅ Table `{target_table}` created successfully!")
+            
+            # Step 5: Insert data
+            job.set_stage("💾 Inserting data...")
+            load_method = write_data_to_table(job, make_chunks, target_table, conn, "append", use_bulk_load, parallel_writers, metadata, parquet_file, scan_constants)
+            volume_path = wait_for_backup(job, backup_future, stage_timings, load_started)
+            
+            summary = f"""
+            **Upload Summary:**
+            - ✅ {total_rows} rows inserted
+            - ✅ Table: `{target_table}`
+            - ✅ Backup: `{volume_path}`
+            - ✅ Load method: {load_method}
+            """
+        
+        elif upload_mode == "Append to Existing Table":
+            if not target_exists:
+                raise ValueError(f"Table `{target_table}` does not exist. Choose 'Create New Table' mode.")
+            
+            # Step 5: Insert data
+            job.set_stage("💾 Appending data...")
+            load_method = write_data_to_table(job, make_chunks, target_table, conn, "append", use_bulk_load, parallel_writers, metadata, parquet_file, scan_constants)
+            volume_path = wait_for_backup(job, backup_future, stage_timings, load_started)
+            
+            summary = f"""
+            **Upload Summary:**
+            - ✅ {total_rows} rows appended
+            - ✅ Table: `{target_table}`
+            - ✅ Backup: `{volume_path}`
+            - ✅ Load method: {load_method}
+            """
+        
+        elif upload_mode == "Overwrite Existing Table":
+            if not target_exists:
+                create_table_from_schema(upload_schema, target_table, conn)
+                remember_table_exists(user_email, target_table, True)
+                job.log("info", f"ℹ️ Table `{target_table}` created (did not exist)")
+            
+            # Step 5: Overwrite data
+            timing_summary = ""
+            if use_staging_table:
+                # Load into a staging table, then publish it in one statement
+                job.set_stage("💾 Loading data into staging table...")
+                staging_result = overwrite_via_staging(
+                    lambda staging_table: write_data_to_table(job, make_chunks, staging_table, conn, "append", use_bulk_load, parallel_writers, metadata, parquet_file, scan_constants),
+                    target_table,
+                    upload_schema,
+                    conn,
+                )
+                load_method = f"{staging_result['load_result']} via staging table"
+                timing_summary = (
+                    f"- ✅ Staging load: {staging_result['stage_seconds']:.1f}s, "
+                    f"publish: {staging_result['publish_seconds']:.1f}s"
                 )
-                is_first_batch = False
             else:
-                # Subsequent batches or append mode use INSERT INTO
-                cursor.execute(
-                    f"INSERT INTO {table_name} ({col_list_sql}) VALUES {values_sql}",
-                    params
+                job.set_stage("💾 Overwriting data...")
+                load_method = write_data_to_table(job, make_chunks, target_table, conn, "overwrite", use_bulk_load, constants=metadata, parquet_file=parquet_file, constant_columns=scan_constants)
+            
+            volume_path = wait_for_backup(job, backup_future, stage_timings, load_started)
+            
+            summary = f"""
+            **Upload Summary:**
+            - ✅ {total_rows} rows written (overwrite mode)
+            - ✅ Table: `{target_table}`
+            - ✅ Backup: `{volume_path}`
+            - ✅ Load method: {load_method}
+            {timing_summary}
+            """
+        
+        elif upload_mode == UPSERT_MODE:
+            if not target_exists:
+                create_table_from_schema(upload_schema, target_table, conn)
+                remember_table_exists(user_email, target_table, True)
+                job.log("info", f"ℹ️ Table `{target_table}` created (did not exist)")
+            
+            # Step 5: Stage the file, diff it against the table and merge the changes
+            job.set_stage("💾 Loading data into staging table and merging changes...")
+            upsert_result = upsert_via_staging(
+                lambda staging_table: write_data_to_table(job, make_chunks, staging_table, conn, "append", use_bulk_load, parallel_writers, metadata, parquet_file, scan_constants),
+                target_table,
+                upload_schema,
+                upsert_key,
+                csv_scan["columns"],
+                conn,
+            )
+            load_method = f"MERGE INTO on `{upsert_key}` ({upsert_result['load_result']} into staging)"
+            # Unchanged rows are not rewritten; estimate their share of the file
+            bytes_saved = uploaded_file.size * upsert_result['unchanged'] / total_rows if total_rows else 0
+            
+            volume_path = wait_for_backup(job, backup_future, stage_timings, load_started)
+            
+            summary = f"""
+            **Upload Summary:**
+            - ✅ {upsert_result['inserted']} rows inserted
+            - ✅ {upsert_result['updated']} rows updated
+            - ✅ {upsert_result['unchanged']} rows unchanged (not rewritten, ~{bytes_saved / 1024:.1f} KB saved)
+            - ✅ Table: `{target_table}`
+            - ✅ Backup: `{volume_path}`
+            - ✅ Load method: {load_method}
+            - ✅ Staging load: {upsert_result['stage_seconds']:.1f}s, diff + merge: {upsert_result['merge_seconds']:.1f}s
+            """
+        
+        else:  # Replace Table (Schema + Data)
+            # Step 5: Drop and recreate table
+            job.set_stage("🗑️ Dropping existing table...")
+            drop_table(target_table, conn)
+            remember_table_exists(user_email, target_table, False)
+            job.log("info", f"ℹ️ Table `{target_table}` dropped")
+            
+            job.set_stage("🏗️ Creating new table with CSV schema...")
+            create_table_from_schema(upload_schema, target_table, conn)
+            remember_table_exists(user_email, target_table, True)
+            job.log("success", f"✅ Table `{target_table}` recreated with new schema!")
+            
+            # Step 6: Insert data
+            job.set_stage("💾 Inserting data...")
+            load_method = write_data_to_table(job, make_chunks, target_table, conn, "append", use_bulk_load, parallel_writers, metadata, parquet_file, scan_constants)
+            volume_path = wait_for_backup(job, backup_future, stage_timings, load_started)
+            
+            summary = f"""
+            **Upload Summary:**
+            - ✅ Table replaced with new schema
+            - ✅ {total_rows} rows inserted
+            - ✅ Table: `{target_table}`
+            - ✅ Backup: `{volume_path}`
+            - ✅ Load method: {load_method}
+            """
+        
+        if volume_path != "backup failed":
+            job.set_stage("📒 Recording upload in the ledger...")
+            record_ingest(job, csv_scan["file_hash"], target_table, volume_path, total_rows, conn)
+        
+        return {"summary": summary, "stage_timings": stage_timings}
+    
+    except Exception as e:
+        if is_permission_error(e) or "TABLE_OR_VIEW_NOT_FOUND" in str(e).upper():
+            # Cached grants or probes may be stale; re-check on the next upload
+            invalidate_probe_caches(user_email)
+        raise
+    finally:
+        if conn is not None:
+            conn.close()
+
+def run_batch_upload(
+    job: UploadJob,
+    uploaded_files,
+    batch: Dict[str, Any],
+    target_table: str,
+    upload_mode: str,
+    upsert_key: Optional[str],
+    add_metadata: bool,
+    chunk_rows: int,
+    use_bulk_load: bool,
+    parallel_writers: int,
+    compress_backup: bool,
+    resumable: bool,
+) -> Dict[str, Any]:
+    """Body of a multi-file upload job: every file's valid rows go through one staging table and one publish"""
+    user_email = job.owner
+    conn = None
+    try:
+        # Step 1: Start one background backup per file
+        job.set_stage("🔐 Checking permissions, backing up files and connecting to SQL warehouse...")
+        backup_futures = [
+            upload_csv_to_volume(uploaded_file, UPLOAD_VOLUME, compress_backup and not reader_for(uploaded_file.name).compressed)
+            for uploaded_file in uploaded_files
+        ]
+        
+        # Step 2: Permission check and warehouse connection + table probe run concurrently
+        preflight, stage_timings = run_stages({
+            "Permission check": lambda: cached_permission_check(user_email, UPLOAD_VOLUME),
+            "Warehouse connect + table probe": lambda: connect_and_probe(user_email, target_table),
+        }, release={"Warehouse connect + table probe": lambda probe: probe[0].close()})
+        conn, target_exists = preflight["Warehouse connect + table probe"]
+        
+        for backup_future in backup_futures:
+            if backup_future.done() and backup_future.exception() is not None:
+                raise backup_future.exception()
+        
+        permission_check = preflight["Permission check"]
+        if permission_check != "valid":
+            job.log("warning", f"⚠️ Volume permission check: {permission_check}. Proceeding with upload attempt...")
+        
+        # Step 3: One chunk stream over the valid rows of every file, in upload order
+        job.set_stage("📊 Preparing data...")
+        upload_schema, metadata = upload_schema_and_metadata(batch["sql_types"], add_metadata, user_email)
+        make_chunks = batch_chunk_factory(uploaded_files, batch, chunk_rows)
+        total_rows = batch["valid_rows"]
+        if batch["rows"] > total_rows:
+            job.log("info", f"ℹ️ Skipping {batch['rows'] - total_rows:,} rows that failed validation")
+        
+        # Step 4: Stage the whole batch and publish it into the target in one statement
+        load_started = time.perf_counter()
+        if resumable:
+            job.set_stage("💾 Staging all files batch by batch (resumable)...")
+            resumable_result = load_resumable(
+                job, make_chunks, batch["file_hash"], target_table, target_exists, upload_mode, upsert_key,
+                batch["columns"], upload_schema, metadata, chunk_rows, use_bulk_load,
+                rejected_rows_digest([
+                    # A file left out whole is told apart from a file with no rejected rows
+                    {"rejected_positions": [-1]} if f["error"] else f["validation"] for f in batch["files"]
+                ]), conn,
+            )
+            counts = resumable_result["publish_result"] or {}
+            load_method = resumable_result["load_method"]
+        else:
+            if not target_exists:
+                create_table_from_schema(upload_schema, target_table, conn)
+                remember_table_exists(user_email, target_table, True)
+                job.log("info", f"ℹ️ Table `{target_table}` created (did not exist)")
+            load_into = lambda staging_table: write_data_to_table(job, make_chunks, staging_table, conn, "append", use_bulk_load, parallel_writers, metadata)
+            if upload_mode == UPSERT_MODE:
+                job.set_stage("💾 Loading all files into one staging table and merging changes...")
+                staged = upsert_via_staging(load_into, target_table, upload_schema, upsert_key, batch["columns"], conn)
+                counts = {key: staged[key] for key in ("inserted", "updated", "unchanged")}
+                load_method = f"MERGE INTO on `{upsert_key}` ({staged['load_result']} into staging)"
+            else:  # Overwrite Existing Table: always through staging, so the batch lands whole or not at all
+                job.set_stage("💾 Loading all files into one staging table...")
+                staged = overwrite_via_staging(load_into, target_table, upload_schema, conn)
+                counts = {}
+                load_method = f"{staged['load_result']} via staging table"
+        
+        job.set_stage("📦 Waiting for the file backups...")
+        volume_paths = [
+            wait_for_backup(job, backup_future, stage_timings, load_started, f"Volume backup: {uploaded_file.name}")
+            for uploaded_file, backup_future in zip(uploaded_files, backup_futures)
+        ]
+        
+        if "backup failed" not in volume_paths:
+            # The batch is recorded as one upload, so the same set of files is skipped next time
+            job.set_stage("📒 Recording upload in the ledger...")
+            record_ingest(job, batch["file_hash"], target_table, ", ".join(volume_paths), total_rows, conn)
+        
+        summary_lines = [
+            f"{total_rows} rows from {len(uploaded_files)} files loaded in one publish ({upload_mode})",
+            *(f"{counts[key]} rows {key}" for key in ("inserted", "updated", "unchanged") if key in counts),
+            *(
+                f"`{f['name']}`: {f['valid_rows']} of {f['rows']} rows" + (f" ({f['rejected_rows']} rejected)" if f["rejected_rows"] else "")
+                for f in batch["files"]
+            ),
+            f"Table: `{target_table}`",
+            f"Load method: {load_method}",
+        ]
+        summary = "**Batch Upload Summary:**\n" + "\n".join(f"- ✅ {line}" for line in summary_lines)
+        return {"summary": summary, "stage_timings": stage_timings}
+    
+    except Exception as e:
+        if is_permission_error(e) or "TABLE_OR_VIEW_NOT_FOUND" in str(e).upper():
+            invalidate_probe_caches(user_email)
+        raise
+    finally:
+        if conn is not None:
+            conn.close()
+
+def format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    return f"{minutes}m {seconds:02d}s" if minutes else f"{seconds}s"
+
+def show_upload_job(job: Dict[str, Any]):
+    """Progress, messages and outcome of one upload job"""
+    with st.container(border=True):
+        icon = {QUEUED: "⏳", RUNNING: "🔄", SUCCEEDED: "✅"}.get(job["status"], "❌")
+        st.markdown(f"{icon} **{job['title']}** — {job['stage']}")
+        
+        if job["status"] != QUEUED and job["total_rows"]:
+            details = [f"{job['rows_done']:,} / {job['total_rows']:,} rows", f"{job['batches_done']:,} batches"]
+            if job["rows_per_second"]:
+                details.append(f"{job['rows_per_second']:,.0f} rows/s")
+            if job["eta_seconds"] is not None:
+                details.append(f"ETA {format_duration(job['eta_seconds'])}")
+            st.progress(min(1.0, job["rows_done"] / job["total_rows"]), text=" · ".join(details))
+        
+        for level, text in job["messages"]:
+            getattr(st, level)(text)
+        
+        if job["status"] == SUCCEEDED:
+            st.success(job["result"]["summary"])
+            with st.expander("⏱️ Stage Timings"):
+                stage_timings = job["result"]["stage_timings"]
+                st.dataframe(
+                    pd.DataFrame({
+                        'Stage': list(stage_timings.keys()),
+                        'Seconds': [round(seconds, 2) for seconds in stage_timings.values()]
+                    }),
+                    use_container_width=True,
+                    hide_index=True
                 )
+        elif job["error"]:
+            st.error(f"❌ Error during upload: {job['error']}")
+            if job["resumable"] and st.button("▶️ Resume from last checkpoint", key=f"resume_{job['job_id']}"):
+                upload_job_runner.resume(job["job_id"])
+                # Full rerun so the job list starts polling again
+                st.rerun()
+
+def show_upload_jobs(user_email: str):
+    """This user's upload jobs; polls while any of them is still queued or running"""
+    polling = upload_job_runner.has_active_jobs(user_email)
+    
+    @st.fragment(run_every=JOB_POLL_SECONDS if polling else None)
+    def upload_jobs_panel():
+        jobs = upload_job_runner.jobs_for(user_email)
+        if polling and not upload_job_runner.has_active_jobs(user_email):
+            # Everything finished: rerun the page once to stop polling
+            st.rerun()
+        if jobs:
+            st.subheader("📦 Upload Jobs")
+            for job in jobs:
+                show_upload_job(job)
+    
+    upload_jobs_panel()
+
+def show_file_details(uploaded_file, csv_scan: Dict[str, Any]):
+    """Preview, row counts and column profile of a single uploaded file"""
+    reader = reader_for(uploaded_file.name)
+    preview_df = reader.preview(uploaded_file, csv_scan)
+    
+    # Display preview
+    st.success(f"✅ {reader.label} loaded successfully!")
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Rows", csv_scan["rows"])
+    with col2:
+        st.metric("Columns", len(csv_scan["columns"]))
+    with col3:
+        st.metric("File Size", f"{uploaded_file.size / 1024:.1f} KB")
+    
+    # Preview data
+    with st.expander("📋 Data Preview (First 10 rows)", expanded=True):
+        st.dataframe(preview_df, use_container_width=True)
+    
+    # Column information
+    with st.expander("📊 Column Information"):
+        columns = csv_scan["columns"]
+        csv_schema = st.session_state.csv_schema
+        profile = csv_scan["profile"]
+        col_info = pd.DataFrame({
+            'Column Name': columns,
+            'Data Type': [csv_scan["dtypes"][col] for col in columns],
+            'SQL Type': [csv_scan["sql_types"][col] for col in columns],
+            'Non-Null Count': [csv_scan["non_null"][col] for col in columns],
+            'Null Count': [csv_scan["null"][col] for col in columns],
+            'Distinct': [
+                f"{profile[col]['distinct']:,}" if profile[col]['distinct_is_exact'] else f"≈ {profile[col]['distinct']:,}"
+                for col in columns
+            ],
+            'Min': [format_profile_value(profile[col]['min']) for col in columns],
+            'Max': [format_profile_value(profile[col]['max']) for col in columns],
+            'Top Values': [format_top_values(profile[col]) for col in columns],
+        })
+        if csv_schema and not csv_scan["schema_fallback"]:
+            col_info.insert(1, 'Inferred As', [csv_schema["columns"][col]["kind"] for col in columns])
+        st.dataframe(col_info, use_container_width=True, hide_index=True)
+        
+        parser = {
+            "arrow": "parsed with the multithreaded Arrow reader",
+            "pandas": "parsed with the pandas C reader",
+            "parquet": "read column-wise with the types stored in the file",
+            "openpyxl": "read row by row from the first worksheet",
+        }[csv_scan["engine"]]
+        st.caption(f"{reader.label}, {parser}. ≈ marks estimates (HyperLogLog distinct counts for high-cardinality columns).")
+        
+        # Memory of the sampled rows with default vs inferred dtypes (CSV only)
+        memory = csv_schema["memory"] if csv_schema else None
+        if not memory:
+            pass
+        elif csv_scan["schema_fallback"]:
+            st.warning(f"⚠️ Rows beyond the first {memory['sample_rows']:,} did not match the inferred types; using default type detection.")
+        elif memory["default_bytes"]:
+            saved = 1 - memory["typed_bytes"] / memory["default_bytes"]
+            st.caption(
+                f"Memory for the first {memory['sample_rows']:,} rows: "
+                f"{memory['default_bytes'] / 1024:.1f} KB with default types → "
+                f"{memory['typed_bytes'] / 1024:.1f} KB with inferred types ({saved:.0%} smaller)"
+            )
+
+def show_batch_details(batch: Dict[str, Any]):
+    """Per-file row counts and status of a multi-file batch, and the combined schema"""
+    files = batch["files"]
+    st.success(f"✅ {len(files)} files scanned in parallel — they are loaded together and published in one statement")
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Files", len(files))
+    with col2:
+        st.metric("Rows", batch["rows"])
+    with col3:
+        st.metric("Columns", len(batch["columns"]))
+    
+    st.dataframe(
+        pd.DataFrame({
+            'File': [f["name"] for f in files],
+            'Format': [f["label"] for f in files],
+            'Rows': [f["rows"] for f in files],
+            'Valid Rows': [f["valid_rows"] for f in files],
+            'Rejected Rows': [f["rejected_rows"] for f in files],
+            'Status': [f"❌ {f['error']}" if f["error"] else "✅ OK" for f in files],
+        }),
+        use_container_width=True,
+        hide_index=True
+    )
+    if batch["errors"]:
+        st.error(f"❌ {len(batch['errors'])} file(s) could not be read or do not match the others; fix or remove them to upload the batch.")
+    
+    with st.expander("📊 Column Information"):
+        columns = batch["columns"]
+        st.dataframe(
+            pd.DataFrame({
+                'Column Name': columns,
+                'SQL Type': [batch["sql_types"][col] for col in columns],
+            }),
+            use_container_width=True,
+            hide_index=True
+        )
+        st.caption(f"Columns of {files[0]['name'] if not files[0]['error'] else 'the first readable file'}; types are widened where the files disagree.")
 
 # Page header
 st.header(body="CSV Upload to Databricks Table", divider=True)
@@ -260,47 +1018,30 @@ else:
 tab_upload, tab_config, tab_help = st.tabs(["📤 Upload CSV", "⚙️ Configuration", "❓ Help"])
 
 with tab_upload:
-    st.write("Upload a CSV file to create or update a Databricks Delta table.")
+    st.write("Upload a CSV file (plain, gzip or zstd compressed), a Parquet file or an Excel workbook to create or update a Databricks Delta table.")
     
     # File uploader
-    uploaded_file = st.file_uploader(
-        "Choose a CSV file",
-        type=['csv'],
-        help="Select a CSV file to upload. Maximum recommended size: 100MB"
+    uploaded_files = st.file_uploader(
+        "Choose one or more files",
+        type=UPLOADER_TYPES,
+        accept_multiple_files=True,
+        help=f"Supported: {', '.join(READERS)}. Compressed CSV and Parquet upload several times faster than plain CSV. "
+             "Select several files with the same columns to load them together as one batch."
     )
+    # Several files are uploaded as one batch: one staged load and one publish
+    uploaded_file = uploaded_files[0] if len(uploaded_files) == 1 else None
+    batch_files = uploaded_files if len(uploaded_files) > 1 else None
     
-    if uploaded_file:
+    if uploaded_files:
         try:
-            # Read and preview CSV
-            uploaded_file.seek(0)
-            df = pd.read_csv(uploaded_file)
-            st.session_state.uploaded_df = df
-            
-            # Display preview
-            st.success(f"✅ CSV loaded successfully!")
-            
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                st.metric("Rows", len(df))
-            with col2:
-                st.metric("Columns", len(df.columns))
-            with col3:
-                st.metric("File Size", f"{uploaded_file.size / 1024:.1f} KB")
-            
-            # Preview data
-            with st.expander("📋 Data Preview (First 10 rows)", expanded=True):
-                st.dataframe(df.head(10), use_container_width=True)
-            
-            # Column information
-            with st.expander("📊 Column Information"):
-                col_info = pd.DataFrame({
-                    'Column Name': df.columns,
-                    'Data Type': df.dtypes.astype(str),
-                    'SQL Type': [infer_sql_type(dtype) for dtype in df.dtypes],
-                    'Non-Null Count': [df[col].notna().sum() for col in df.columns],
-                    'Null Count': [df[col].isna().sum() for col in df.columns]
-                })
-                st.dataframe(col_info, use_container_width=True, hide_index=True)
+            if batch_files:
+                # Every file is scanned and validated in its own worker process
+                csv_scan = get_batch_scan(batch_files, TARGET_TABLE)
+                show_batch_details(csv_scan)
+            else:
+                # Scan the CSV in chunks and read only the preview rows
+                csv_scan = get_csv_scan(uploaded_file)
+                show_file_details(uploaded_file, csv_scan)
             
             st.markdown("---")
             
@@ -308,7 +1049,7 @@ with tab_upload:
             st.subheader("🎯 Target Table Configuration")
             
             # Fixed target table - user cannot change
-            target_table = "dg_dev.z3_stg.merchant_asset_size_review"
+            target_table = TARGET_TABLE
             st.text_input(
                 "Target Table Name:",
                 value=target_table,
@@ -316,15 +1057,72 @@ with tab_upload:
                 help="This table is pre-configured for merchant asset size review data"
             )
             
-            # Upload mode - fixed to Overwrite Existing Table
-            upload_mode = "Overwrite Existing Table"
-            st.text_input(
+            # Upload mode - overwrite, or merge only new and changed rows by key
+            upload_mode = st.selectbox(
                 "Upload Mode:",
-                value=upload_mode,
-                disabled=True,
-                help="Upload mode is set to overwrite existing table data"
+                ["Overwrite Existing Table", UPSERT_MODE],
+                help="Overwrite replaces all table data; upsert only inserts new keys and updates changed rows"
             )
-            st.info("ℹ️ This will replace all existing data in the table with the uploaded CSV data.")
+            if upload_mode == UPSERT_MODE:
+                upsert_columns = csv_scan["columns"]
+                upsert_key = st.selectbox(
+                    "Key Column:",
+                    upsert_columns,
+                    index=upsert_columns.index(DEFAULT_UPSERT_KEY) if DEFAULT_UPSERT_KEY in upsert_columns else 0,
+                    help="Column identifying a row; values must be unique and non-empty in the CSV"
+                )
+                st.info(f"ℹ️ Rows are matched on `{upsert_key}`: new keys are inserted, changed rows are updated, unchanged rows are left as they are.")
+            else:
+                st.info("ℹ️ This will replace all existing data in the table with the uploaded CSV data.")
+            
+            # Validate rows against the target table's rules before anything is written
+            validation = None
+            on_invalid_rows = BLOCK_INVALID_ROWS
+            validation_rules = get_validation_rules(target_table)
+            if validation_rules:
+                if batch_files:
+                    # Checked by the scan workers, with keys repeated across files rejected too
+                    validation = csv_scan["validation"]
+                else:
+                    validation = validate_upload(csv_scan["file_hash"], target_table, uploaded_file, csv_scan)
+                if validation["missing_columns"]:
+                    st.error(f"❌ CSV is missing column(s) required by the validation rules: {', '.join(validation['missing_columns'])}")
+                elif validation["rejected_rows"]:
+                    st.warning(f"⚠️ {validation['rejected_rows']:,} of {validation['rows']:,} rows failed validation")
+                    st.dataframe(
+                        pd.DataFrame({
+                            'Rule': list(validation["rule_counts"].keys()),
+                            'Rows Failing': list(validation["rule_counts"].values()),
+                        }),
+                        use_container_width=True,
+                        hide_index=True
+                    )
+                    if batch_files:
+                        # One error report per file, with row numbers within that file
+                        for file_index, (batch_file, file_report) in enumerate(zip(batch_files, csv_scan["files"])):
+                            if file_report["rejected_rows"]:
+                                st.download_button(
+                                    f"📥 Download Rejected Rows: {batch_file.name} ({file_report['rejected_rows']:,})",
+                                    data=batch_rejects_csv(csv_scan["file_hash"], file_index, batch_file, file_report),
+                                    file_name=f"{batch_file.name.split('.', 1)[0]}_rejects.csv",
+                                    mime="text/csv",
+                                    key=f"batch_rejects_{file_index}"
+                                )
+                    else:
+                        st.download_button(
+                            "📥 Download Rejected Rows",
+                            data=rejects_csv(csv_scan["file_hash"], target_table, uploaded_file, csv_scan, validation),
+                            file_name=f"{uploaded_file.name.rsplit('.', 1)[0]}_rejects.csv",
+                            mime="text/csv"
+                        )
+                    on_invalid_rows = st.radio(
+                        "When rows fail validation:",
+                        [BLOCK_INVALID_ROWS, LOAD_VALID_ROWS],
+                        horizontal=True,
+                        help="Block the whole upload, or load the rows that passed and leave the rejected ones out"
+                    )
+                else:
+                    st.success(f"✅ All {validation['rows']:,} rows passed {len(validation_rules)} validation rules")
             
             # Additional options
             with st.expander("🔧 Advanced Options"):
@@ -340,171 +1138,141 @@ with tab_upload:
 upload_timestamp: TIMESTAMP (Manila timezone)
 uploaded_by: STRING (user email)
                     """)
+                
+                chunk_rows = st.number_input(
+                    "Rows per chunk",
+                    min_value=1_000,
+                    max_value=1_000_000,
+                    value=DEFAULT_CHUNK_ROWS,
+                    step=10_000,
+                    help="The file is read and loaded in chunks of this many rows, so memory use depends on this value rather than the file size"
+                )
+                
+                use_bulk_load = st.checkbox(
+                    "Bulk load via Parquet",
+                    value=True,
+                    help="Stage the data as Parquet on the upload volume and load it with one server-side statement. "
+                         "Falls back to batched INSERT statements if the bulk load fails."
+                )
+                
+                resumable = st.checkbox(
+                    "Resumable upload (checkpoint every batch)",
+                    value=False,
+                    help="Stage the file one chunk at a time with a checkpoint after each, then publish it in one statement. "
+                         "If the upload is interrupted, resuming it (or uploading the same file again) continues from the "
+                         "last committed batch. Batches are loaded one after another on one connection, so the parallel "
+                         "writer and staging table options below are turned off."
+                )
+                
+                parallel_writers = st.number_input(
+                    "Parallel writers",
+                    min_value=1,
+                    max_value=MAX_WRITERS,
+                    value=DEFAULT_WRITERS,
+                    disabled=resumable,
+                    help="Connections used for batched INSERTs when appending or loading the staging table"
+                )
+                
+                compress_backup = st.checkbox(
+                    "Compress CSV backup (gzip)",
+                    value=False,
+                    help="Gzip the backup copy on the fly while streaming it to the upload volume"
+                )
+                
+                use_staging_table = st.checkbox(
+                    "Atomic overwrite via staging table",
+                    value=True,
+                    disabled=resumable,
+                    help="Load into a temporary staging table and replace the target in one statement, "
+                         "so a failed upload never leaves the target truncated or partially loaded"
+                )
+                skip_duplicate_uploads = st.checkbox(
+                    "Skip identical re-uploads",
+                    value=True,
+                    help="If this exact file was already loaded into the target table and the table has not "
+                         "changed since, finish without backing it up or writing to the table again"
+                )
             
             # Upload button
             st.markdown("---")
             
             if st.button("🚀 Upload and Create/Update Table", type="primary", use_container_width=True):
+                previous_upload = None
+                if target_table and skip_duplicate_uploads:
+                    previous_upload = find_duplicate_upload(csv_scan["file_hash"], target_table)
+                
                 if not target_table:
                     st.error("❌ Please specify a target table name")
+                elif batch_files and csv_scan["errors"]:
+                    st.error("❌ Upload blocked: fix or remove the files marked with errors in the file list above.")
+                elif validation and (validation["missing_columns"] or (validation["rejected_rows"] and on_invalid_rows == BLOCK_INVALID_ROWS)):
+                    st.error("❌ Upload blocked: fix the rejected rows (see the download above) and upload again, or choose to load only valid rows.")
+                elif previous_upload:
+                    # Same bytes, same table, table untouched since: nothing to do
+                    st.success(f"""
+                    **Already uploaded — nothing to do:**
+                    - ✅ {"These files were" if batch_files else "This file was"} loaded into `{target_table}` on {previous_upload['uploaded_at']} by {previous_upload['uploaded_by']}
+                    - ✅ {previous_upload['row_count']} rows; the table has not changed since
+                    - ✅ Earlier backup: `{previous_upload['backup_path']}` ([open volume]({volume_browser_url(UPLOAD_VOLUME)}))
+                    """)
+                    st.caption("Untick \"Skip identical re-uploads\" under Advanced Options to load it again.")
+                elif batch_files:
+                    upload_job_runner.submit(
+                        current_user,
+                        f"{len(batch_files)} files → {target_table} ({upload_mode})",
+                        csv_scan["valid_rows"],
+                        partial(
+                            run_batch_upload,
+                            uploaded_files=[JobFile(batch_file) for batch_file in batch_files],
+                            batch=csv_scan,
+                            target_table=target_table,
+                            upload_mode=upload_mode,
+                            upsert_key=upsert_key if upload_mode == UPSERT_MODE else None,
+                            add_metadata=add_metadata,
+                            chunk_rows=int(chunk_rows),
+                            use_bulk_load=use_bulk_load,
+                            parallel_writers=int(parallel_writers),
+                            compress_backup=compress_backup,
+                            resumable=resumable,
+                        ),
+                        resumable=resumable,
+                    )
+                    st.info("🚀 Batch upload started in the background. Progress is shown under Upload Jobs below; you can leave this page or start another upload.")
                 else:
-                    try:
-                        progress_bar = st.progress(0)
-                        status_text = st.empty()
-                        
-                        # Step 1: Check permissions
-                        status_text.info("🔐 Checking permissions...")
-                        progress_bar.progress(10)
-                        
-                        permission_check = check_upload_permissions(UPLOAD_VOLUME)
-                        if permission_check != "valid":
-                            st.warning(f"⚠️ Volume permission check: {permission_check}")
-                            st.info("Proceeding with upload attempt...")
-                        
-                        # Step 2: Upload to volume
-                        status_text.info("📤 Uploading CSV to Unity Catalog Volume...")
-                        progress_bar.progress(30)
-                        
-                        volume_path = upload_csv_to_volume(uploaded_file, UPLOAD_VOLUME)
-                        st.success(f"✅ CSV uploaded to: `{volume_path}`")
-                        
-                        # Step 3: Prepare data
-                        status_text.info("📊 Preparing data...")
-                        progress_bar.progress(50)
-                        
-                        df_to_upload = df.copy()
-                        
-                        # Add metadata if requested
-                        if add_metadata:
-                            manila_tz = pytz.timezone('Asia/Manila')
-                            df_to_upload['upload_timestamp'] = datetime.now(manila_tz).strftime('%Y-%m-%d %H:%M:%S')
-                            df_to_upload['uploaded_by'] = current_user
-                        
-                        # Step 4: Connect to SQL warehouse
-                        status_text.info("🔌 Connecting to SQL warehouse...")
-                        progress_bar.progress(60)
-                        
-                        conn = get_connection(DATABRICKS_HOST, HTTP_PATH)
-                        
-                        # Step 5: Create or check table
-                        status_text.info("🏗️ Creating/checking table...")
-                        progress_bar.progress(70)
-                        
-                        if upload_mode == "Create New Table":
-                            if table_exists(target_table, conn):
-                                st.error(f"❌ Table `{target_table}` already exists. Choose 'Append' or 'Overwrite' mode.")
-                                progress_bar.empty()
-                                status_text.empty()
-                            else:
-                                create_table_from_dataframe(df_to_upload, target_table, conn)
-                                st.success(f"✅ Table `{target_table}` created successfully!")
-                                
-                                # Step 6: Insert data
-                                status_text.info("💾 Inserting data...")
-                                progress_bar.progress(85)
-                                
-                                insert_data_to_table(df_to_upload, target_table, conn, mode="append")
-                                
-                                progress_bar.progress(100)
-                                status_text.success("✅ Upload complete!")
-                                st.balloons()
-                                
-                                st.success(f"""
-                                **Upload Summary:**
-                                - ✅ {len(df_to_upload)} rows inserted
-                                - ✅ Table: `{target_table}`
-                                - ✅ Backup: `{volume_path}`
-                                """)
-                        
-                        elif upload_mode == "Append to Existing Table":
-                            if not table_exists(target_table, conn):
-                                st.error(f"❌ Table `{target_table}` does not exist. Choose 'Create New Table' mode.")
-                                progress_bar.empty()
-                                status_text.empty()
-                            else:
-                                # Step 6: Insert data
-                                status_text.info("💾 Appending data...")
-                                progress_bar.progress(85)
-                                
-                                insert_data_to_table(df_to_upload, target_table, conn, mode="append")
-                                
-                                progress_bar.progress(100)
-                                status_text.success("✅ Upload complete!")
-                                st.balloons()
-                                
-                                st.success(f"""
-                                **Upload Summary:**
-                                - ✅ {len(df_to_upload)} rows appended
-                                - ✅ Table: `{target_table}`
-                                - ✅ Backup: `{volume_path}`
-                                """)
-                        
-                        elif upload_mode == "Overwrite Existing Table":
-                            if not table_exists(target_table, conn):
-                                create_table_from_dataframe(df_to_upload, target_table, conn)
-                                st.info(f"ℹ️ Table `{target_table}` created (did not exist)")
-                            
-                            # Step 6: Overwrite data
-                            status_text.info("💾 Overwriting data...")
-                            progress_bar.progress(85)
-                            
-                            insert_data_to_table(df_to_upload, target_table, conn, mode="overwrite")
-                            
-                            progress_bar.progress(100)
-                            status_text.success("✅ Upload complete!")
-                            st.balloons()
-                            
-                            st.success(f"""
-                            **Upload Summary:**
-                            - ✅ {len(df_to_upload)} rows written (overwrite mode)
-                            - ✅ Table: `{target_table}`
-                            - ✅ Backup: `{volume_path}`
-                            """)
-                        
-                        else:  # Replace Table (Schema + Data)
-                            # Step 6: Drop and recreate table
-                            status_text.info("🗑️ Dropping existing table...")
-                            progress_bar.progress(75)
-                            
-                            drop_table(target_table, conn)
-                            st.info(f"ℹ️ Table `{target_table}` dropped")
-                            
-                            status_text.info("🏗️ Creating new table with CSV schema...")
-                            progress_bar.progress(80)
-                            
-                            create_table_from_dataframe(df_to_upload, target_table, conn)
-                            st.success(f"✅ Table `{target_table}` recreated with new schema!")
-                            
-                            # Step 7: Insert data
-                            status_text.info("💾 Inserting data...")
-                            progress_bar.progress(90)
-                            
-                            insert_data_to_table(df_to_upload, target_table, conn, mode="append")
-                            
-                            progress_bar.progress(100)
-                            status_text.success("✅ Upload complete!")
-                            st.balloons()
-                            
-                            st.success(f"""
-                            **Upload Summary:**
-                            - ✅ Table replaced with new schema
-                            - ✅ {len(df_to_upload)} rows inserted
-                            - ✅ Table: `{target_table}`
-                            - ✅ Backup: `{volume_path}`
-                            """)
-                        
-                        st.session_state.upload_success = True
-                        
-                    except Exception as e:
-                        st.error(f"❌ Error during upload: {str(e)}")
-                        st.exception(e)
+                    upload_job_runner.submit(
+                        current_user,
+                        f"{uploaded_file.name} → {target_table} ({upload_mode})",
+                        csv_scan["rows"] - (validation["rejected_rows"] if validation else 0),
+                        # Settings are bound now; the job must not read this script run's state later
+                        partial(
+                            run_upload,
+                            uploaded_file=JobFile(uploaded_file),
+                            csv_scan=csv_scan,
+                            validation=validation,
+                            target_table=target_table,
+                            upload_mode=upload_mode,
+                            upsert_key=upsert_key if upload_mode == UPSERT_MODE else None,
+                            add_metadata=add_metadata,
+                            chunk_rows=int(chunk_rows),
+                            use_bulk_load=use_bulk_load,
+                            parallel_writers=int(parallel_writers),
+                            compress_backup=compress_backup,
+                            use_staging_table=use_staging_table,
+                            resumable=resumable,
+                        ),
+                        resumable=resumable,
+                    )
+                    st.info("🚀 Upload started in the background. Progress is shown under Upload Jobs below; you can leave this page or start another upload.")
         
         except Exception as e:
-            st.error(f"❌ Error reading CSV file: {str(e)}")
-            st.info("Please ensure the file is a valid CSV format.")
+            st.error(f"❌ Error reading file: {str(e)}")
+            st.info(f"Please ensure the file is a valid {', '.join(READERS)} file.")
     
     else:
-        st.info("👆 Upload a CSV file to get started")
+        st.info("👆 Upload a file, or several files to load as one batch, to get started")
+    
+    # Jobs keep running across reruns and page changes; show them whether or not a file is selected
+    show_upload_jobs(current_user)
 
 with tab_config:
     st.subheader("Current Configuration")
@@ -514,12 +1282,33 @@ with tab_config:
 Host: {DATABRICKS_HOST}
 SQL Warehouse Path: {HTTP_PATH}
 Upload Volume: {UPLOAD_VOLUME}
+Bulk Load Staging: {volume_root(UPLOAD_VOLUME)}/{STAGING_DIR}
+Upload Ledger: {UPLOAD_LEDGER_TABLE}
+Upload Checkpoints: {UPLOAD_CHECKPOINT_TABLE}
     """)
     
+    st.write("**Permission & Table Probe Cache:**")
+    cache_stats = {name: cache.stats() for name, cache in get_probe_caches().items()}
+    st.dataframe(
+        pd.DataFrame({
+            'Cache': list(cache_stats.keys()),
+            'Entries': [stats["entries"] for stats in cache_stats.values()],
+            'Hits': [stats["hits"] for stats in cache_stats.values()],
+            'Misses': [stats["misses"] for stats in cache_stats.values()],
+            'Hit Rate': [f"{stats['hit_rate']:.0%}" for stats in cache_stats.values()],
+        }),
+        use_container_width=True,
+        hide_index=True
+    )
+    st.caption(f"Entries expire after {PROBE_CACHE_TTL_SECONDS // 60} minutes and are dropped on permission errors.")
+    if st.button("🧹 Clear My Cached Checks"):
+        st.success(f"✅ Cleared {invalidate_probe_caches(current_user)} cached check(s)")
+    
     st.write("**Supported Data Types:**")
     type_mapping = pd.DataFrame({
-        'Pandas Type': ['object', 'int64', 'float64', 'bool', 'datetime64'],
-        'SQL Type': ['STRING', 'BIGINT', 'DOUBLE', 'BOOLEAN', 'TIMESTAMP']
+        'Detected From Sample': ['true / false', 'Whole numbers', 'Decimals (up to 15 digits)', 'YYYY-MM-DD', 'YYYY-MM-DD HH:MM:SS', 'Repeated labels', 'Other text and IDs'],
+        'Pandas Type': ['boolean', 'Int64', 'float64', 'datetime64', 'datetime64', 'category', 'object'],
+        'SQL Type': ['BOOLEAN', 'BIGINT', 'DECIMAL(18,s)', 'DATE', 'TIMESTAMP', 'STRING', 'STRING']
     })
     st.dataframe(type_mapping, use_container_width=True, hide_index=True)
     
@@ -531,8 +1320,10 @@ Upload Volume: {UPLOAD_VOLUME}
     - `WRITE VOLUME` on the volume
     
     **For Table Operations:**
-    - `CREATE TABLE` on the schema (for new tables)
+    - `CREATE TABLE` on the schema (for new tables and the overwrite staging table)
     - `MODIFY` on the table (for append/overwrite)
+    - `SELECT` and `MODIFY` on the upload ledger table (to skip identical re-uploads)
+    - `SELECT` and `MODIFY` on the upload checkpoint table (for resumable uploads)
     - `SELECT` on the table (for validation)
     
     **For SQL Warehouse:**
@@ -542,60 +1333,52 @@ Upload Volume: {UPLOAD_VOLUME}
 with tab_help:
     st.subheader("How to Use CSV Upload")
     
-    st.markdown("""
+    st.markdown(f"""
     ### Step-by-Step Guide
     
-    1. **Prepare Your CSV File**
-       - Ensure your CSV has proper headers
+    1. **Prepare Your File**
+       - CSV (`.csv`, or compressed as `.csv.gz` / `.csv.zst`), Parquet (`.parquet`) or Excel (`.xlsx`, first worksheet)
+       - Ensure the file has proper headers (the first row of a CSV or worksheet)
        - Check for data quality (no extra commas, proper encoding)
        - Recommended max size: 100MB
     
     2. **Upload the File**
-       - Click "Choose a CSV file" button
-       - Select your CSV file
+       - Click "Choose a file" button
+       - Select your file
        - Preview the data to verify it loaded correctly
+       - To load several files at once (e.g. one per region), select them together: they are scanned and validated in parallel, listed with their own row counts and status, and loaded as one batch
     
     3. **Configure Target Table**
        - Enter the full table name: `catalog.schema.table_name`
        - Choose upload mode:
-         - **Create New**: Creates a new table (fails if exists)
-         - **Append**: Adds data to existing table
-         - **Overwrite**: Replaces all data in existing table
+         - **Overwrite**: Replaces all data in the table (creates it if it does not exist)
+         - **Upsert by Key**: Inserts new keys and updates changed rows
     
     4. **Review Options**
        - Enable metadata columns to track upload info
        - Check column types in the preview
+       - Check the validation results; download the rejected rows to fix them
     
     5. **Upload**
        - Click "Upload and Create/Update Table"
-       - Wait for confirmation
+       - The upload runs in the background and shows up under **Upload Jobs** with its stage, rows loaded, rows/s and ETA
+       - You can leave the page or start more uploads; each job finishes on its own
        - CSV is backed up to Volume automatically
     
     ### Upload Modes Explained
     
-    **Create New Table:**
-    - Best for first-time uploads
-    - Creates table structure from CSV
-    - Fails if table already exists (safety feature)
-    
-    **Append to Existing Table:**
-    - Adds new rows to existing data
-    - Keeps all existing records
-    - Column names must match existing table
-    - Table schema remains unchanged
-    
     **Overwrite Existing Table:**
     - Replaces all data in table
+    - Loads into a staging table first and swaps it in with one statement, so the table is never left half-loaded
     - Keeps table structure/schema
     - Column names must match existing table
     - Use with caution!
     
-    **Replace Table (Schema + Data):** ⚠️ DESTRUCTIVE
-    - Drops the existing table completely
-    - Creates a new table with CSV's schema
-    - Inserts all CSV data
-    - Use when CSV has different columns than existing table
-    - **Warning:** All existing data is permanently lost!
+    **Upsert by Key (MERGE):**
+    - Matches CSV rows to table rows on a key column (`merchant_id` by default)
+    - Inserts new keys and updates rows whose values changed, in one `MERGE INTO`
+    - Leaves unchanged rows untouched, so re-uploading a mostly unchanged file is fast
+    - Key values must be unique and non-empty in the CSV
     
     ### Integration with Maker-Checker Workflow
     
@@ -610,15 +1393,38 @@ with tab_help:
     **"Permission denied" error:**
     - Contact admin to grant volume/table permissions
     
-    **"Table already exists" error:**
-    - Use "Append" or "Overwrite" mode instead
-    
     **"Column mismatch" error:**
     - Ensure CSV columns match table structure
     - Check column names and types
-    - Or use "Replace Table (Schema + Data)" mode to replace the schema
+    
+    **"Upload blocked" after validation:**
+    - Some rows break the target table's rules (missing key, duplicate key, value outside the allowed list)
+    - Download the rejected rows — each carries its row number and reason — fix them and upload again
+    - Or choose "Load only valid rows" to load the rest and leave the rejected rows out
+    
+    **"Already uploaded — nothing to do":**
+    - The same file was already loaded into this table and the table has not changed since
+    - The earlier backup path is shown; untick "Skip identical re-uploads" to load it again
+    
+    **Upload interrupted (connection dropped, app restarted):**
+    - Tick "Resumable upload" under Advanced Options before uploading large files over an unreliable connection: every committed batch is checkpointed and the target is only written at the end
+    - It loads one batch at a time on one connection, so it is off by default and turns off parallel writers and the staging table option
+    - Click "Resume from last checkpoint" on the failed job, or upload the same file to the same table again with the same options
+    - Batches that were written but not yet checkpointed are replayed, never duplicated
+    - While one upload of a file is still running, a second upload of it with the same options is refused
+    - A failed publish, or an upload not resumed within a day, drops its staged batches; the next attempt starts over
+    
+    **Batch upload blocked:**
+    - Every file of a batch must have the same columns as the first one and be readable; the file list shows which file failed and why
+    - A `merchant_id` that appears in more than one file is rejected in each of them; download each file's rejected rows from its own button
+    - The batch is published in one statement, so either every file lands or none does
+    
+    **Upload job stays "queued":**
+    - At most {MAX_UPLOAD_JOBS} uploads run at once across all users; it starts when one finishes
     
     **Large file upload slow:**
+    - Upload gzip/zstd-compressed CSV or Parquet instead of plain CSV: less to send, and Parquet is loaded as uploaded
+    - Keep "Bulk load via Parquet" enabled under Advanced Options
     - Consider splitting into smaller files
     - Upload during off-peak hours
     """)
@@ -5,7 +5,7 @@ from databricks.sdk import WorkspaceClient
 from databricks.sdk.core import Config
 from typing import Dict, Any, List, Optional
 import json
-from datetime import datetime
+from datetime import datetime, timedelta
 import pytz
 import sys
 import os
@@ -13,6 +13,11 @@ import os
 # Add config directory to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 from config.user_roles import get_user_role, is_admin, is_maker, is_checker
+from config.review_options import BUSINESS_SIZE_OPTIONS, GENDER_OPTIONS
+from services.edit_diff import editor_changes, editor_edits, apply_edits, fill_blank, is_blank
+from services.review_reader import DEFAULT_PAGE_SIZE, PAGE_SIZE_OPTIONS, PagePrefetcher, count_by, read_page
+from services.review_sync import SYNC_OVERLAP_SECONDS, changes_past_page, merge_changes, read_changed_since, written_rows
+from services.review_writer import merge_rows, update_where_keys_in
 
 # Pre-configured connection details
 DATABRICKS_HOST = "dbc-7d305f7c-9def.cloud.databricks.com"
@@ -24,22 +29,29 @@ AVAILABLE_TABLES = {
     "Prod Test - Merchant Business Size": "dg_prod.sandbox.out_merchant_business_size_for_bank_test"
 }
 
-# Dropdown values for review fields (no blank option)
-BUSINESS_SIZE_OPTIONS = ["MICRO", "SMALL", "MEDIUM", "LARGE"]
-GENDER_OPTIONS = ["MALE", "FEMALE"]
-
 # Workflow statuses
 STATUS_PENDING = "PENDING"
 STATUS_APPROVED = "APPROVED"
 STATUS_REJECTED = "REJECTED"
 
+# Columns shown by the read-only tabs; only these are selected
+SUBMISSION_COLUMNS = ['cpm_id', 'business_name', 'trade_name',
+                      'business_reviewed_size_pending', 'business_reviewed_gender_pending',
+                      'review_status', 'reviewed_date_maker', 'reviewed_by_checker',
+                      'reviewed_date_checker', 'checker_comments']
+REVIEW_COLUMNS = ['cpm_id', 'business_name', 'trade_name',
+                  'business_reviewed_size_pending', 'business_reviewed_gender_pending',
+                  'business_reviewed_size', 'business_reviewed_gender',
+                  'review_status', 'reviewed_by_maker', 'reviewed_date_maker',
+                  'reviewed_by_checker', 'reviewed_date_checker', 'checker_comments']
+
 # Initialize session state
 if 'selected_record' not in st.session_state:
     st.session_state.selected_record = None
 if 'form_data' not in st.session_state:
     st.session_state.form_data = {}
-if 'table_data' not in st.session_state:
-    st.session_state.table_data = None
+if 'views' not in st.session_state:
+    st.session_state.views = {}  # Paging state of each tab's query, by view name
 if 'table_schema' not in st.session_state:
     st.session_state.table_schema = None
 if 'connection_established' not in st.session_state:
@@ -50,6 +62,12 @@ if 'current_table_name' not in st.session_state:
     st.session_state.current_table_name = AVAILABLE_TABLES[list(AVAILABLE_TABLES.keys())[0]]
 if 'user_role' not in st.session_state:
     st.session_state.user_role = "MAKER"  # Default role
+if 'write_message' not in st.session_state:
+    st.session_state.write_message = None  # Outcome of the last write, shown after the rerun
+if 'sync_mark' not in st.session_state:
+    st.session_state.sync_mark = None  # Refresh reads the rows changed since this time
+if 'page_size' not in st.session_state:
+    st.session_state.page_size = DEFAULT_PAGE_SIZE
 
 @st.cache_resource(ttl="1h")
 def get_connection(server_hostname: str, http_path: str):
@@ -60,6 +78,14 @@ def get_connection(server_hostname: str, http_path: str):
         credentials_provider=lambda: Config().authenticate,
     )
 
+def open_connection():
+    """Open an uncached warehouse connection for a page prefetch worker thread"""
+    return sql.connect(
+        server_hostname=DATABRICKS_HOST,
+        http_path=HTTP_PATH,
+        credentials_provider=lambda: Config().authenticate,
+    )
+
 def get_current_user_email() -> str:
     """Get the current user's Databricks email from request headers"""
     try:
@@ -117,34 +143,133 @@ def get_table_schema(table_name: str, conn) -> Dict[str, str]:
         schema_info = cursor.fetchall()
         return {row[0]: row[1] for row in schema_info}
 
-def read_table(table_name: str, conn, limit: int = 1000, status_filter: str = None) -> pd.DataFrame:
-    """Read table data with optional status filter"""
-    with conn.cursor() as cursor:
-        if status_filter:
-            query = f"SELECT * FROM {table_name} WHERE review_status = '{status_filter}' LIMIT {limit}"
-        else:
-            query = f"SELECT * FROM {table_name} LIMIT {limit}"
-        cursor.execute(query)
-        return cursor.fetchall_arrow().to_pandas()
+def view_state(name: str) -> Dict[str, Any]:
+    """Paging state of a view: its query, the key each page read so far starts after, the page on screen and its counts"""
+    if name not in st.session_state.views:
+        st.session_state.views[name] = {
+            "query": None, "starts": [None], "info": None, "data": None, "counts": None,
+            "prefetcher": PagePrefetcher()
+        }
+    return st.session_state.views[name]
 
-def update_record(table_name: str, record_data: Dict[str, Any], where_clause: str, conn):
-    """Update an existing record"""
-    set_clauses = []
-    
-    for col, val in record_data.items():
-        if val is None or val == "":
-            set_clauses.append(f"{col} = NULL")
-        elif isinstance(val, str):
-            escaped_val = val.replace("'", "''")  # Escape single quotes
-            set_clauses.append(f"{col} = '{escaped_val}'")
+def get_sync_mark() -> str:
+    """High-water mark for the next refresh: now in Manila time, less an overlap for writes committed late"""
+    manila_tz = pytz.timezone('Asia/Manila')
+    manila_time = datetime.now(manila_tz) - timedelta(seconds=SYNC_OVERLAP_SECONDS)
+    return manila_time.strftime('%Y-%m-%d %H:%M:%S')
+
+def sync_views(changed: pd.DataFrame):
+    """Merge changed rows by key into the page on screen of every view; counts are re-counted on the next run"""
+    if changed.empty:
+        return
+    key_column = list(st.session_state.table_schema.keys())[0]
+    for view in st.session_state.views.values():
+        view["counts"] = None
+        if view["data"] is None:
+            continue
+        if changes_past_page(changed, key_column, view["info"]):
+            # The prefetched next page may hold stale copies of these rows
+            view["prefetcher"] = PagePrefetcher()
+        merged = merge_changes(view["data"], changed, key_column, view["query"]["filters"], view["info"])
+        if (~view["data"][key_column].isin(merged[key_column])).any():
+            # Rows left a filtered page: re-read it from where it starts so it fills up again
+            view["data"] = None
         else:
-            set_clauses.append(f"{col} = {val}")
-    
-    set_clause = ", ".join(set_clauses)
+            view["data"] = merged
+
+def refresh_views(table_name: str, conn) -> int:
+    """Read only the rows changed since the last refresh and merge them into the views; returns how many"""
+    mark = get_sync_mark()
+    changed = read_changed_since(table_name, st.session_state.sync_mark, conn)
+    sync_views(changed)
+    st.session_state.sync_mark = mark
+    return len(changed)
+
+def apply_write(before: pd.DataFrame, keys, values: Optional[pd.DataFrame], constants: Dict[str, Any], editor_key: str):
+    """Show a write at once: merge the rows it changed into the views without reading them back"""
+    key_column = list(st.session_state.table_schema.keys())[0]
+    sync_views(written_rows(before, key_column, keys, values, constants))
+    # The editor's edits are written; start it clean on the updated page
+    if editor_key in st.session_state:
+        del st.session_state[editor_key]
+
+def view_page(name: str, table_name: str, conn, columns: Optional[List[str]] = None, filters: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+    """The page on screen of a view reading columns (all when None) of the rows matching filters
+
+    A change of columns, filters or page size starts the view again from its first page.
+    The page after it is prefetched in the background.
+    """
+    view = view_state(name)
+    query = {"columns": columns, "filters": filters, "page_size": st.session_state.page_size}
+    if view["query"] != query:
+        view.update(query=query, starts=[None], data=None, prefetcher=PagePrefetcher())
     
-    with conn.cursor() as cursor:
-        query = f"UPDATE {table_name} SET {set_clause} WHERE {where_clause}"
-        cursor.execute(query)
+    if view["data"] is None:
+        key_column = list(st.session_state.table_schema.keys())[0]
+        page_size = st.session_state.page_size
+        after_key = view["starts"][-1]
+        try:
+            page = view["prefetcher"].take((table_name, after_key))
+            if page is None:
+                page = read_page(table_name, key_column, page_size, conn, after_key, columns, filters)
+        except Exception as e:
+            st.error(f"❌ Failed to load records: {str(e)}")
+            st.stop()
+        view["data"] = page["data"]
+        view["info"] = {k: v for k, v in page.items() if k != "data"}
+        
+        if page["has_next"]:
+            next_key = page["next_key"]
+            view["prefetcher"].start(
+                (table_name, next_key),
+                lambda prefetch_conn: read_page(table_name, key_column, page_size, prefetch_conn, next_key, columns, filters),
+                open_connection,
+            )
+    return view["data"]
+
+def view_counts(name: str, table_name: str, conn, filters: Optional[Dict[str, Any]] = None) -> Dict[str, int]:
+    """Number of rows matching filters per review_status, counted in the warehouse and kept with the view"""
+    view = view_state(name)
+    if view["counts"] is None:
+        view["counts"] = count_by(table_name, "review_status", conn, filters)
+    return view["counts"]
+
+def table_columns(columns: List[str]) -> List[str]:
+    """The given columns that the table has, in table order"""
+    return [col for col in st.session_state.table_schema if col in columns]
+
+def render_page_navigation(name: str):
+    """Previous/Next buttons over a view's keyset pages, shown when it has more than one"""
+    view = view_state(name)
+    page_number = len(view["starts"])
+    if page_number == 1 and not view["info"]["has_next"]:
+        return
+    first_row = (page_number - 1) * st.session_state.page_size + 1
+    page_rows = len(view["data"])
+    col_prev, col_page, col_next = st.columns([1, 3, 1])
+    with col_prev:
+        if st.button("◀ Previous", key=f"{name}_previous", disabled=page_number == 1):
+            view["starts"].pop()
+            view["data"] = None
+            st.rerun()
+    with col_page:
+        st.caption(f"Page {page_number} · records {first_row}–{first_row + page_rows - 1}" if page_rows else f"Page {page_number} · no records")
+    with col_next:
+        if st.button("Next ▶", key=f"{name}_next", disabled=not view["info"]["has_next"]):
+            view["starts"].append(view["info"]["next_key"])
+            view["data"] = None
+            st.rerun()
+
+def write_outcome(action: str, result: Dict[str, Any], statement: str = "MERGE") -> tuple:
+    """(level, message) for a set-based write: records sent and rows the warehouse updated"""
+    message = f"✅ {action} {result['rows']} record(s) in one {statement}"
+    if result["affected"] is None:
+        return "success", message + "!"
+    message += f" — {result['affected']} row(s) updated"
+    if result["affected"] < result["rows"]:
+        # Keys that no longer exist in the table (e.g. removed since the page loaded)
+        return "warning", f"{message}; {result['rows'] - result['affected']} record(s) were not found in the table"
+    return "success", message + "!"
 
 def render_form_field(column_name: str, column_type: str, current_value: Any = None, key_suffix: str = "", disabled: bool = False):
     """Render appropriate form field based on column type"""
@@ -258,7 +383,7 @@ with col_table:
         st.session_state.selected_table = selected_table_name
         st.session_state.current_table_name = AVAILABLE_TABLES[selected_table_name]
         st.session_state.connection_established = False
-        st.session_state.table_data = None
+        st.session_state.views = {}
         st.session_state.table_schema = None
 
 TABLE_NAME = st.session_state.current_table_name
@@ -270,8 +395,9 @@ if st.button("🔌 Connect to Table", type="primary"):
     try:
         with st.spinner("Connecting to Databricks..."):
             conn = get_connection(DATABRICKS_HOST, HTTP_PATH)
-            st.session_state.table_data = read_table(TABLE_NAME, conn)
             st.session_state.table_schema = get_table_schema(TABLE_NAME, conn)
+            st.session_state.views = {}
+            st.session_state.sync_mark = get_sync_mark()
             st.session_state.connection_established = True
         st.success("✅ Successfully connected!")
         st.rerun()
@@ -279,8 +405,24 @@ if st.button("🔌 Connect to Table", type="primary"):
         st.error(f"❌ Connection failed: {str(e)}")
         st.session_state.connection_established = False
 
+# Outcome of the write that triggered this rerun
+if st.session_state.write_message:
+    level, message = st.session_state.write_message
+    getattr(st, level)(message)
+    st.session_state.write_message = None
+
 # Main workflow interface
-if st.session_state.connection_established and st.session_state.table_data is not None:
+if st.session_state.connection_established and st.session_state.table_schema is not None:
+    conn = get_connection(DATABRICKS_HOST, HTTP_PATH)
+    
+    page_size = st.selectbox(
+        "Records per page:",
+        options=PAGE_SIZE_OPTIONS,
+        index=PAGE_SIZE_OPTIONS.index(st.session_state.page_size)
+    )
+    if page_size != st.session_state.page_size:
+        st.session_state.page_size = page_size
+        st.rerun()
     
     if user_role == "MAKER":
         # ============ MAKER INTERFACE ============
@@ -293,12 +435,18 @@ if st.session_state.connection_established and st.session_state.table_data is no
             st.write("**Inline Table Editor:** Edit business size and gender directly in the table, then click 'Submit for Approval'")
             
             if st.button("🔄 Refresh Records", key="maker_refresh"):
-                st.session_state.table_data = None
-                st.rerun()
+                try:
+                    changed_count = refresh_views(TABLE_NAME, conn)
+                    st.session_state.write_message = ("info", f"🔄 {changed_count} changed record(s) merged")
+                    st.rerun()
+                except Exception as e:
+                    st.error(f"❌ Refresh failed: {str(e)}")
+            
+            records = view_page("maker_records", TABLE_NAME, conn)
+            render_page_navigation("maker_records")
             
-            if len(st.session_state.table_data) > 0:
-                # Filter to show only records that are not pending or can be resubmitted
-                display_data = st.session_state.table_data.copy()
+            if len(records) > 0:
+                display_data = records.copy()
                 
                 # Configure column settings for inline editing
                 column_config = {}
@@ -354,50 +502,27 @@ if st.session_state.connection_established and st.session_state.table_data is no
                 # Submit button
                 if st.button("📤 Submit Selected Records for Approval", type="primary", key="maker_submit"):
                     try:
-                        conn = get_connection(DATABRICKS_HOST, HTTP_PATH)
-                        submitted_count = 0
+                        key_column = list(st.session_state.table_schema.keys())[0]
+                        pending_columns = ["business_reviewed_size_pending", "business_reviewed_gender_pending"]
                         
-                        for idx in display_data.index:
-                            original_row = display_data.loc[idx]
-                            edited_row = edited_data.loc[idx]
-                            
-                            # Check if review fields were filled or changed
-                            size_val = edited_row.get("business_reviewed_size_pending")
-                            gender_val = edited_row.get("business_reviewed_gender_pending")
-                            
-                            # Only submit if both fields are filled
-                            if pd.notna(size_val) and pd.notna(gender_val) and size_val != "" and gender_val != "":
-                                # Check if values changed or are new
-                                orig_size = original_row.get("business_reviewed_size_pending")
-                                orig_gender = original_row.get("business_reviewed_gender_pending")
-                                
-                                if (pd.isna(orig_size) or orig_size != size_val or 
-                                    pd.isna(orig_gender) or orig_gender != gender_val):
-                                    
-                                    # Create WHERE clause
-                                    first_col = list(st.session_state.table_schema.keys())[0]
-                                    first_val = original_row[first_col]
-                                    
-                                    if isinstance(first_val, str):
-                                        escaped_val = first_val.replace("'", "''")
-                                        where_clause = f"{first_col} = '{escaped_val}'"
-                                    else:
-                                        where_clause = f"{first_col} = {first_val}"
-                                    
-                                    update_data = {
-                                        "business_reviewed_size_pending": size_val,
-                                        "business_reviewed_gender_pending": gender_val,
-                                        "review_status": STATUS_PENDING,
-                                        "reviewed_by_maker": current_user,
-                                        "reviewed_date_maker": get_manila_timestamp()
-                                    }
-                                    
-                                    update_record(TABLE_NAME, update_data, where_clause, conn)
-                                    submitted_count += 1
+                        # Only the rows the maker changed, read from the editor's edit delta
+                        submissions = editor_changes(
+                            display_data, edited_data, st.session_state.get("maker_data_editor"),
+                            key_column, pending_columns
+                        )
+                        # Only submit if both fields are filled
+                        submissions = submissions[~submissions[pending_columns].apply(is_blank).any(axis=1)]
                         
-                        if submitted_count > 0:
-                            st.success(f"✅ Submitted {submitted_count} record(s) for approval!")
-                            st.session_state.table_data = None
+                        if len(submissions) > 0:
+                            constants = {
+                                "review_status": STATUS_PENDING,
+                                "reviewed_by_maker": current_user,
+                                "reviewed_date_maker": get_manila_timestamp()
+                            }
+                            # One MERGE for the whole submission: one statement, one Delta commit
+                            result = merge_rows(TABLE_NAME, key_column, submissions, conn, constants=constants, sql_types=st.session_state.table_schema)
+                            st.session_state.write_message = write_outcome("Submitted for approval:", result)
+                            apply_write(display_data, submissions[key_column], submissions, constants, "maker_data_editor")
                             st.rerun()
                         else:
                             st.info("ℹ️ No changes detected or no records with both fields filled.")
@@ -410,15 +535,18 @@ if st.session_state.connection_established and st.session_state.table_data is no
             st.write("View your submitted reviews and their status")
             
             if st.button("🔄 Refresh My Submissions"):
-                st.session_state.table_data = None
-                st.rerun()
+                try:
+                    changed_count = refresh_views(TABLE_NAME, conn)
+                    st.session_state.write_message = ("info", f"🔄 {changed_count} changed record(s) merged")
+                    st.rerun()
+                except Exception as e:
+                    st.error(f"❌ Refresh failed: {str(e)}")
             
-            # Filter for current user's submissions
-            my_submissions = st.session_state.table_data[
-                st.session_state.table_data['reviewed_by_maker'] == current_user
-            ]
+            # Current user's submissions, filtered and counted in the warehouse
+            my_filters = {"reviewed_by_maker": current_user}
+            my_counts = view_counts("maker_submissions", TABLE_NAME, conn, my_filters)
             
-            if len(my_submissions) > 0:
+            if sum(my_counts.values()) > 0:
                 # Status filter
                 status_filter = st.multiselect(
                     "Filter by status:",
@@ -426,7 +554,12 @@ if st.session_state.connection_established and st.session_state.table_data is no
                     default=[STATUS_PENDING, STATUS_APPROVED, STATUS_REJECTED]
                 )
                 
-                filtered_data = my_submissions[my_submissions['review_status'].isin(status_filter)]
+                filtered_data = view_page(
+                    "maker_submissions", TABLE_NAME, conn,
+                    columns=table_columns(SUBMISSION_COLUMNS),
+                    filters={**my_filters, "review_status": status_filter}
+                )
+                render_page_navigation("maker_submissions")
                 
                 # Configure column settings with frozen columns and visual indicators
                 column_config = {}
@@ -449,11 +582,7 @@ if st.session_state.connection_established and st.session_state.table_data is no
                 # Remove CSS styling as it doesn't work with st.dataframe
                 
                 # Select relevant columns to display
-                display_columns = [col for col in filtered_data.columns 
-                    if col in ['cpm_id', 'business_name', 'trade_name',
-                             'business_reviewed_size_pending', 'business_reviewed_gender_pending',
-                             'review_status', 'reviewed_date_maker', 'reviewed_by_checker',
-                             'reviewed_date_checker', 'checker_comments']]
+                display_columns = [col for col in filtered_data.columns if col in SUBMISSION_COLUMNS]
                 
                 st.dataframe(
                     filtered_data[display_columns],
@@ -462,14 +591,14 @@ if st.session_state.connection_established and st.session_state.table_data is no
                     column_config=column_config
                 )
                 
-                st.metric("Total Submissions", len(my_submissions))
+                st.metric("Total Submissions", sum(my_counts.values()))
                 col1, col2, col3 = st.columns(3)
                 with col1:
-                    st.metric("Pending", len(my_submissions[my_submissions['review_status'] == STATUS_PENDING]))
+                    st.metric("Pending", my_counts.get(STATUS_PENDING, 0))
                 with col2:
-                    st.metric("Approved", len(my_submissions[my_submissions['review_status'] == STATUS_APPROVED]))
+                    st.metric("Approved", my_counts.get(STATUS_APPROVED, 0))
                 with col3:
-                    st.metric("Rejected", len(my_submissions[my_submissions['review_status'] == STATUS_REJECTED]))
+                    st.metric("Rejected", my_counts.get(STATUS_REJECTED, 0))
             else:
                 st.info("You haven't submitted any reviews yet")
     
@@ -480,31 +609,38 @@ if st.session_state.connection_established and st.session_state.table_data is no
         
         tab_pending, tab_all = st.tabs(["Pending Reviews", "All Reviews"])
         
+        # Status counts of the whole table, used by both tabs
+        table_counts = view_counts("checker_all", TABLE_NAME, conn)
+        
         with tab_pending:
             if st.button("🔄 Refresh Pending", key="checker_refresh"):
-                st.session_state.table_data = None
-                st.rerun()
+                try:
+                    changed_count = refresh_views(TABLE_NAME, conn)
+                    st.session_state.write_message = ("info", f"🔄 {changed_count} changed record(s) merged")
+                    st.rerun()
+                except Exception as e:
+                    st.error(f"❌ Refresh failed: {str(e)}")
             
-            # Filter pending reviews
-            pending_reviews = st.session_state.table_data[
-                st.session_state.table_data['review_status'] == STATUS_PENDING
-            ].copy()  # Make a copy to avoid modifying original
+            # Pending reviews, filtered in the warehouse
+            pending_page = view_page(
+                "checker_pending", TABLE_NAME, conn, filters={"review_status": STATUS_PENDING}
+            )
+            pending_reviews = pending_page.copy()  # Make a copy to avoid modifying original
+            render_page_navigation("checker_pending")
             
             if len(pending_reviews) > 0:
-                st.info(f"📋 {len(pending_reviews)} pending review(s)")
+                st.info(f"📋 {table_counts.get(STATUS_PENDING, 0)} pending review(s)")
                 st.write("**Inline Table Editor:** Review and edit values directly in the table, then Approve or Reject")
                 
                 # Pre-populate the final columns with pending values for editing
                 # This allows the checker to see and modify the maker's proposed values
                 if 'business_reviewed_size' in pending_reviews.columns:
-                    pending_reviews['business_reviewed_size'] = pending_reviews.apply(
-                        lambda row: row['business_reviewed_size'] if pd.notna(row['business_reviewed_size']) and row['business_reviewed_size'] != '' 
-                        else row['business_reviewed_size_pending'], axis=1
+                    pending_reviews['business_reviewed_size'] = fill_blank(
+                        pending_reviews['business_reviewed_size'], pending_reviews['business_reviewed_size_pending']
                     )
                 if 'business_reviewed_gender' in pending_reviews.columns:
-                    pending_reviews['business_reviewed_gender'] = pending_reviews.apply(
-                        lambda row: row['business_reviewed_gender'] if pd.notna(row['business_reviewed_gender']) and row['business_reviewed_gender'] != '' 
-                        else row['business_reviewed_gender_pending'], axis=1
+                    pending_reviews['business_reviewed_gender'] = fill_blank(
+                        pending_reviews['business_reviewed_gender'], pending_reviews['business_reviewed_gender_pending']
                     )
                 
                 # Configure column settings for inline editing
@@ -578,48 +714,30 @@ if st.session_state.connection_established and st.session_state.table_data is no
                 with col_approve:
                     if st.button("✅ Approve Selected Records", type="primary", key="checker_approve"):
                         try:
-                            conn = get_connection(DATABRICKS_HOST, HTTP_PATH)
-                            approved_count = 0
+                            key_column = list(st.session_state.table_schema.keys())[0]
+                            final_columns = ["business_reviewed_size", "business_reviewed_gender"]
                             
-                            for idx in pending_reviews.index:
-                                original_row = pending_reviews.loc[idx]
-                                edited_row = edited_data.loc[idx]
-                                
-                                # Get the final values to approve
-                                # Priority: 1) Checker's edits, 2) Maker's pending values
-                                size_val = edited_row.get("business_reviewed_size")
-                                gender_val = edited_row.get("business_reviewed_gender")
-                                
-                                # If checker didn't edit (columns are empty/null), use pending values
-                                if pd.isna(size_val) or size_val == "":
-                                    size_val = original_row.get("business_reviewed_size_pending")
-                                if pd.isna(gender_val) or gender_val == "":
-                                    gender_val = original_row.get("business_reviewed_gender_pending")
-                                
-                                # Create WHERE clause
-                                first_col = list(st.session_state.table_schema.keys())[0]
-                                first_val = original_row[first_col]
-                                
-                                if isinstance(first_val, str):
-                                    escaped_val = first_val.replace("'", "''")
-                                    where_clause = f"{first_col} = '{escaped_val}'"
-                                else:
-                                    where_clause = f"{first_col} = {first_val}"
-                                
-                                update_data = {
-                                    "business_reviewed_size": size_val,
-                                    "business_reviewed_gender": gender_val,
-                                    "review_status": STATUS_APPROVED,
-                                    "reviewed_by_checker": current_user,
-                                    "reviewed_date_checker": get_manila_timestamp(),
-                                    "checker_comments": checker_comments if checker_comments else ""
-                                }
-                                
-                                update_record(TABLE_NAME, update_data, where_clause, conn)
-                                approved_count += 1
+                            # Get the final values to approve
+                            # Priority: 1) Checker's edits, 2) Maker's pending values
+                            edits = editor_edits(st.session_state.get("checker_data_editor"))
+                            if edits is None:
+                                approvals = edited_data[[key_column] + final_columns].astype(object)
+                            else:
+                                approvals = apply_edits(pending_reviews, edits, [key_column] + final_columns)
+                            # If checker cleared a value, use the pending one
+                            for col in final_columns:
+                                approvals[col] = fill_blank(approvals[col], pending_reviews[f"{col}_pending"])
                             
-                            st.success(f"✅ Approved {approved_count} record(s)!")
-                            st.session_state.table_data = None
+                            constants = {
+                                "review_status": STATUS_APPROVED,
+                                "reviewed_by_checker": current_user,
+                                "reviewed_date_checker": get_manila_timestamp(),
+                                "checker_comments": checker_comments if checker_comments else None
+                            }
+                            # Every approval in one MERGE: no partial approvals if it fails
+                            result = merge_rows(TABLE_NAME, key_column, approvals, conn, constants=constants, sql_types=st.session_state.table_schema)
+                            st.session_state.write_message = write_outcome("Approved", result)
+                            apply_write(pending_page, approvals[key_column], approvals, constants, "checker_data_editor")
                             st.rerun()
                         except Exception as e:
                             st.error(f"❌ Error: {str(e)}")
@@ -630,37 +748,24 @@ if st.session_state.connection_established and st.session_state.table_data is no
                             st.error("❌ Please provide comments when rejecting")
                         else:
                             try:
-                                conn = get_connection(DATABRICKS_HOST, HTTP_PATH)
-                                rejected_count = 0
+                                key_column = list(st.session_state.table_schema.keys())[0]
                                 
-                                for idx in pending_reviews.index:
-                                    edited_row = edited_data.loc[idx]
-                                    
-                                    # Create WHERE clause
-                                    first_col = list(st.session_state.table_schema.keys())[0]
-                                    first_val = edited_row[first_col]
-                                    
-                                    if isinstance(first_val, str):
-                                        escaped_val = first_val.replace("'", "''")
-                                        where_clause = f"{first_col} = '{escaped_val}'"
-                                    else:
-                                        where_clause = f"{first_col} = {first_val}"
-                                    
-                                    update_data = {
-                                        "review_status": STATUS_REJECTED,
-                                        "reviewed_by_checker": current_user,
-                                        "reviewed_date_checker": get_manila_timestamp(),
-                                        "checker_comments": checker_comments
-                                    }
-                                    
-                                    update_record(TABLE_NAME, update_data, where_clause, conn)
-                                    rejected_count += 1
-                                
-                                st.success(f"✅ Rejected {rejected_count} record(s)!")
-                                st.session_state.table_data = None
+                                constants = {
+                                    "review_status": STATUS_REJECTED,
+                                    "reviewed_by_checker": current_user,
+                                    "reviewed_date_checker": get_manila_timestamp(),
+                                    "checker_comments": checker_comments
+                                }
+                                # Every rejection writes the same values: one UPDATE ... WHERE key IN (...)
+                                result = update_where_keys_in(TABLE_NAME, key_column, pending_reviews[key_column], conn, constants=constants, sql_types=st.session_state.table_schema)
+                                st.session_state.write_message = write_outcome("Rejected", result, "UPDATE")
+                                # Rows as read, not as pre-populated for the editor: a rejection leaves the final columns untouched
+                                apply_write(pending_page, pending_page[key_column], None, constants, "checker_data_editor")
                                 st.rerun()
                             except Exception as e:
                                 st.error(f"❌ Error: {str(e)}")
+            elif table_counts.get(STATUS_PENDING, 0) > 0:
+                st.info("No pending reviews on this page")
             else:
                 st.success("🎉 No pending reviews!")
         
@@ -675,9 +780,13 @@ if st.session_state.connection_established and st.session_state.table_data is no
                 key="all_status_filter"
             )
             
-            filtered_data = st.session_state.table_data[
-                st.session_state.table_data['review_status'].isin(status_filter)
-            ]
+            filtered_data = view_page(
+                "checker_all", TABLE_NAME, conn,
+                columns=table_columns(REVIEW_COLUMNS),
+                filters={"review_status": status_filter}
+            )
+            
+            render_page_navigation("checker_all")
             
             if len(filtered_data) > 0:
                 # Configure column settings with frozen columns and visual indicators
@@ -710,12 +819,7 @@ if st.session_state.connection_established and st.session_state.table_data is no
                 # Using emoji indicators instead: 🟣 for pending, 🟢 for final
                 
                 # Select relevant columns to display
-                display_columns = [col for col in filtered_data.columns 
-                    if col in ['cpm_id', 'business_name', 'trade_name',
-                             'business_reviewed_size_pending', 'business_reviewed_gender_pending',
-                             'business_reviewed_size', 'business_reviewed_gender',
-                             'review_status', 'reviewed_by_maker', 'reviewed_date_maker',
-                             'reviewed_by_checker', 'reviewed_date_checker', 'checker_comments']]
+                display_columns = [col for col in filtered_data.columns if col in REVIEW_COLUMNS]
                 
                 st.dataframe(
                     filtered_data[display_columns],
@@ -728,13 +832,13 @@ if st.session_state.connection_established and st.session_state.table_data is no
                 st.markdown("### 📊 Statistics")
                 col1, col2, col3, col4 = st.columns(4)
                 with col1:
-                    st.metric("Total", len(st.session_state.table_data))
+                    st.metric("Total", sum(table_counts.values()))
                 with col2:
-                    st.metric("Pending", len(st.session_state.table_data[st.session_state.table_data['review_status'] == STATUS_PENDING]))
+                    st.metric("Pending", table_counts.get(STATUS_PENDING, 0))
                 with col3:
-                    st.metric("Approved", len(st.session_state.table_data[st.session_state.table_data['review_status'] == STATUS_APPROVED]))
+                    st.metric("Approved", table_counts.get(STATUS_APPROVED, 0))
                 with col4:
-                    st.metric("Rejected", len(st.session_state.table_data[st.session_state.table_data['review_status'] == STATUS_REJECTED]))
+                    st.metric("Rejected", table_counts.get(STATUS_REJECTED, 0))
             else:
                 st.info("No reviews found")
 